@@ -0,0 +1,7 @@
+"""Benchmarks for BoxScript.
+
+Each module in this package can be run on its own, e.g. ``python -m
+benchmarks.bench_boxes``, and prints its timings as a table. ``python -m
+benchmarks.suite`` times every stage of the programs in `benchmarks.workloads`, and
+can save its timings as JSON to compare later runs with.
+"""
@@ -0,0 +1,81 @@
+"""Benchmark loop-invariant hoisting and dead line removal.
+
+This module times a loop whose body computes a value from cells the loop never writes,
+and compares which lines never do anything, with and without `boxscript.analysis`.
+"""
+
+import time
+
+from benchmarks.bench_loops import number
+from boxscript.analysis import analyze
+from boxscript.ast import Script
+from boxscript.context import Context
+from boxscript.lex import tokenize
+from boxscript.memory import Mem
+from boxscript.optimize import optimize_script
+from boxscript.streams import Buffer
+from boxscript.transpile import compile_script
+from boxscript.vm import compile_vm
+
+TRIPS = 100000
+
+
+def invariant_loop(trips: int) -> str:
+    """Generates a loop which outputs a value computed from cells 1 to 3.
+
+    Args:
+        trips (int): The number of iterations of the loop.
+
+    Returns:
+        str: The program.
+    """
+    lines = [
+        f"◇▀▄▨{number(trips)}",
+        "▭▕◇▀▀▘◇▀▀▄▐◇▀▀▀▏▗▀▀▄▀▀▄▐▀▀▀▄▄▄▄",
+        "◇▀▀▨◇▀▀▄",
+        "◇▀▀▤◇▀▀▀",
+        "▀▄◈◇▀▄▐▀▀",
+    ]
+    width = max(map(len, lines))
+    return "\n".join(
+        [
+            "┏" + "━" * width + "┓",
+            "┃" + lines[0].ljust(width) + "┃",
+            "┡" + "━" * width + "┩",
+            *("│" + line.ljust(width) + "│" for line in lines[1:]),
+            "└" + "─" * width + "┘",
+        ]
+    )
+
+
+def main() -> None:
+    """Prints the time taken by the loop, with and without the analysis."""
+    code = invariant_loop(TRIPS)
+
+    print(f"{'engine':>8} {'analyzed':>9} {'seconds':>8} {'iter/s':>10}")
+    for engine in ("tree", "python", "vm"):
+        for analyzed in (False, True):
+            script = Script(tokenize(code))
+            optimize_script(script)
+            if analyzed:
+                analyze(script)
+            function = script.execute
+            if engine == "python":
+                function = compile_script(script)
+            elif engine == "vm":
+                function = compile_vm(script)
+
+            memory = Mem()
+            memory[1], memory[2], memory[3] = 3, 5, 7
+            context = Context(memory, Buffer().write)
+
+            start = time.perf_counter()
+            function(context)
+            seconds = time.perf_counter() - start
+            print(
+                f"{engine:>8} {analyzed!s:>9} {seconds:>8.3f} {TRIPS / seconds:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark batch execution.
+
+This module compares running a script over many mappings of inputs one at a time with
+`boxscript.interpreter.Interpreter` against `boxscript.interpreter.run_many`, with an
+increasing number of worker processes.
+"""
+
+import os
+import time
+from textwrap import dedent
+
+from boxscript.interpreter import Interpreter, run_many
+
+RUNS = 2000
+
+# sums the numbers from the input down to 1, and outputs a letter of the sum
+SCRIPT = dedent("""
+    ┏━━━━━━━━━━━━━━━━━━━━━━┓
+    ┃◇▀▄▧▀▄                ┃
+    ┡━━━━━━━━━━━━━━━━━━━━━━┩
+    │▀▀◈◇▀▀▐◇▀▄            │
+    │▀▄◈◇▀▄▌▀▀             │
+    └──────────────────────┘
+    ┌──────────────────────┐
+    │▭▀▀▄▄▄▄▄▀▐◇▀▀▗▀▀▀▄▀▄  │
+    └──────────────────────┘
+    """)
+
+
+def main() -> None:
+    """Prints the time taken to run the batch."""
+    inputs = [{0: 100 + i % 50} for i in range(RUNS)]
+
+    print(f"{'workers':>8} {'seconds':>8} {'runs/s':>8}")
+
+    outputs = []
+    start = time.perf_counter()
+    for cells in inputs:
+        output = []
+        Interpreter(output=output.append).run(SCRIPT, cells)
+        outputs.append("".join(output))
+    serial = time.perf_counter() - start
+    print(f"{'serial':>8} {serial:>8.3f} {RUNS / serial:>8.0f}")
+
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        results = list(run_many(SCRIPT, inputs, workers=workers))
+        elapsed = time.perf_counter() - start
+        assert [result.output for result in results] == outputs
+        print(f"{workers:>8} {elapsed:>8.3f} {RUNS / elapsed:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Benchmark box validation.
+
+This module times `boxscript.boxes.valid` on programs of increasing size. The time per
+line should stay roughly constant, i.e. validation should scale linearly.
+"""
+
+import timeit
+
+from boxscript.boxes import valid
+
+
+def program(lines: int) -> str:
+    """Generates a valid program with a single box.
+
+    Args:
+        lines (int): The number of lines of code inside the box.
+
+    Returns:
+        str: The program.
+    """
+    body = "▀▄◈◇▀▄▐▀▀▕◇▀▀▘▀▀▄▏"
+    width = len(body) + 2
+    rows = [
+        "╔" + "═" * width + "╗",
+        "║" + " generated".ljust(width) + "║",
+        "╚" + "═" * width + "╝",
+        "┏" + "━" * width + "┓",
+        "┃" + "◇▀▄▨▀▀▄▀▄".ljust(width) + "┃",
+        "┡" + "━" * width + "┩",
+    ]
+    rows += ["│" + body.ljust(width) + "│"] * lines
+    rows.append("└" + "─" * width + "┘")
+    return "\n".join(rows)
+
+
+def main() -> None:
+    """Prints the time taken to validate programs of increasing size."""
+    print(f"{'lines':>8} {'seconds':>10} {'us/line':>10}")
+
+    for lines in (250, 500, 1000, 2000, 4000, 8000):
+        code = program(lines)
+        seconds = min(timeit.repeat(lambda: valid(code), number=1, repeat=5))
+        print(f"{lines:>8} {seconds:>10.4f} {seconds / lines * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
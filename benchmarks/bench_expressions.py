@@ -0,0 +1,54 @@
+"""Benchmark expression evaluation.
+
+This module compares evaluating RPN expressions token by token with
+`boxscript.ast.evaluate_rpn` against calling the functions built by
+`boxscript.ast.compile_rpn`, with and without `boxscript.optimize.optimize`.
+"""
+
+import timeit
+
+from boxscript.ast import Mem, compile_rpn, evaluate_rpn, shunting_yard
+from boxscript.lex import scan
+from boxscript.optimize import optimize
+
+EXPRESSIONS = {
+    "condition": "◇▀▄▨▀▀▄▀▄",
+    "output": "◇▀▄▐▀▀▀▄▄▄▄",
+    "increment": "◇▀▄▐▀▀",
+    "bitwise": "◇▀▄▒▀▀▀▄▄▄▄░▕◇▀▀▚▀▀▓◇▀▀▄▞▀▀▏▒▔◇▀▀▀",
+    "arithmetic": "▕◇▀▄▘▀▀▄▐◇▀▀▖▀▀▄▏▗▀▀▀▀▀▌◇▀▀▄▝▀▀▄▄",
+    "constant": "◇▕▀▀▚▀▀▀▏▐▕▀▀▀▀▘▀▀▄▌▀▀▏▗◇▀▀▘▀▀",
+}
+
+
+def main() -> None:
+    """Prints the time taken to evaluate each expression."""
+    memory = Mem()
+    for i in range(8):
+        memory[i] = i + 1
+
+    print(
+        f"{'expression':>12} {'evaluate ns':>12} {'compiled ns':>12} "
+        f"{'optimized ns':>13} {'speedup':>8}"
+    )
+
+    for name, code in EXPRESSIONS.items():
+        rpn = shunting_yard(list(scan(code)))
+        function = compile_rpn(rpn)
+        optimized = compile_rpn(optimize(rpn))
+        number = 100000
+
+        evaluated = min(
+            timeit.repeat(lambda: evaluate_rpn(rpn, memory), number=number, repeat=5)
+        )
+        compiled = min(timeit.repeat(lambda: function(memory), number=number, repeat=5))
+        best = min(timeit.repeat(lambda: optimized(memory), number=number, repeat=5))
+        print(
+            f"{name:>12} {evaluated / number * 1e9:>12.0f} "
+            f"{compiled / number * 1e9:>12.0f} {best / number * 1e9:>13.0f} "
+            f"{evaluated / best:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
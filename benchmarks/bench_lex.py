@@ -0,0 +1,30 @@
+"""Benchmark tokenization.
+
+This module times `boxscript.lex.scan` and `boxscript.lex.tokenize` on programs of
+several megabytes. The throughput should stay roughly constant as the size grows.
+"""
+
+import timeit
+
+from benchmarks.bench_boxes import program
+from boxscript.lex import scan, tokenize
+
+
+def main() -> None:
+    """Prints the time taken to tokenize programs of increasing size."""
+    print(f"{'MB':>6} {'tokens':>10} {'scan s':>8} {'MB/s':>8} {'tokenize s':>11}")
+
+    for lines in (20000, 40000, 80000, 160000):
+        code = program(lines)
+        size = len(code.encode()) / (1 << 20)
+        count = len(list(scan(code)))
+        scanning = min(timeit.repeat(lambda: list(scan(code)), number=1, repeat=3))
+        full = min(timeit.repeat(lambda: tokenize(code), number=1, repeat=3))
+        print(
+            f"{size:>6.1f} {count:>10} {scanning:>8.3f} "
+            f"{size / scanning:>8.1f} {full:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
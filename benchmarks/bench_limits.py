@@ -0,0 +1,47 @@
+"""Benchmark counting steps.
+
+This module times a tight counting loop on every engine without limits, with a limit
+on the number of steps, and with a time limit. Steps are always counted, so the
+difference is the cost of checking the limits.
+"""
+
+import time
+
+from benchmarks.bench_loops import counting_loop
+from boxscript.interpreter import ENGINES, Interpreter
+from boxscript.streams import Buffer
+
+TRIPS = 100000
+LIMITS = {
+    "none": {},
+    "max_steps": {"max_steps": 10 * TRIPS},
+    "timeout": {"timeout": 3600.0},
+}
+
+
+def main() -> None:
+    """Prints the number of loop iterations run per second with each limit."""
+    code = counting_loop(TRIPS)
+
+    print(f"{'engine':>8} {'limit':>10} {'seconds':>8} {'iter/s':>10} {'overhead':>9}")
+    for engine in ENGINES:
+        interpreter = Interpreter(engine, output=Buffer())
+        interpreter.run(code)  # the script is only compiled once
+        baseline = None
+
+        for name, limits in LIMITS.items():
+            seconds = float("inf")
+            for _ in range(5):
+                start = time.perf_counter()
+                interpreter.run(code, **limits)
+                seconds = min(seconds, time.perf_counter() - start)
+
+            baseline = baseline or seconds
+            print(
+                f"{engine:>8} {name:>10} {seconds:>8.3f} {TRIPS / seconds:>10.0f} "
+                f"{(seconds / baseline - 1) * 100:>8.1f}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
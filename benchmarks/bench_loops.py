@@ -0,0 +1,70 @@
+"""Benchmark loop execution.
+
+This module times counting loops in the style of ``docs/digits.bs`` with an
+increasing number of iterations on every engine, and reports the number of iterations
+per second.
+"""
+
+import io
+import time
+from contextlib import redirect_stdout
+
+from boxscript.interpreter import ENGINES, Interpreter
+
+
+def number(n: int) -> str:
+    """Writes an integer as a BoxScript number.
+
+    Args:
+        n (int): The integer.
+
+    Returns:
+        str: The BoxScript number.
+    """
+    digits = bin(abs(n))[2:].translate(str.maketrans("01", "▄▀"))
+    return ("▀" if n >= 0 else "▄") + digits
+
+
+def counting_loop(trips: int) -> str:
+    """Generates a loop which counts from 0 and outputs each count.
+
+    Args:
+        trips (int): The number of iterations of the loop.
+
+    Returns:
+        str: The program.
+    """
+    condition = f"◇▀▄▨{number(trips)}"
+    width = max(len(condition), 12)
+    return "\n".join(
+        [
+            "",
+            "┏" + "━" * width + "┓",
+            "┃" + condition.ljust(width) + "┃",
+            "┡" + "━" * width + "┩",
+            "│" + "▭◇▀▄▐▀▀▀▄▄▄▄".ljust(width) + "│",
+            "├" + "─" * width + "┤",
+            "│" + "▀▄◈◇▀▄▐▀▀".ljust(width) + "│",
+            "└" + "─" * width + "┘",
+        ]
+    )
+
+
+def main() -> None:
+    """Prints the number of loop iterations run per second."""
+    print(f"{'engine':>8} {'iterations':>10} {'seconds':>8} {'iter/s':>10}")
+
+    for engine in ENGINES:
+        for trips in (1000, 10000, 100000, 1000000):
+            code = counting_loop(trips)
+
+            with redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                Interpreter(engine).run(code)
+                seconds = time.perf_counter() - start
+
+            print(f"{engine:>8} {trips:>10} {seconds:>8.3f} {trips / seconds:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
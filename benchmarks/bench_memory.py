@@ -0,0 +1,62 @@
+"""Benchmark the memory backends.
+
+This module compares the throughput and the size of every backend in
+`boxscript.memory.BACKENDS`, when a million consecutive cells are written and read.
+"""
+
+import random
+import time
+import tracemalloc
+
+from boxscript.memory import BACKENDS
+
+CELLS = 1000000
+
+
+def main() -> None:
+    """Prints the time taken to access the cells, and the memory they take up."""
+    keys = list(range(CELLS))
+    shuffled = random.Random(0).sample(keys, CELLS)
+    values = [key * 7919 for key in keys]
+
+    print(
+        f"{'backend':>8} {'write ns':>9} {'read ns':>8} {'random ns':>10} "
+        f"{'MB':>7} {'bytes/cell':>11}"
+    )
+
+    for name, backend in BACKENDS.items():
+        memory = backend()
+
+        start = time.perf_counter()
+        for key, value in zip(keys, values):
+            memory[key] = value
+        write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for key in keys:
+            memory[key]
+        read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for key in shuffled:
+            memory[key]
+        scattered = time.perf_counter() - start
+
+        # the size is measured separately, since tracing slows down every allocation
+        del memory
+        tracemalloc.start()
+        memory = backend()
+        for key, value in zip(keys, values):
+            memory[key] = value
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del memory
+
+        print(
+            f"{name:>8} {write / CELLS * 1e9:>9.0f} {read / CELLS * 1e9:>8.0f} "
+            f"{scattered / CELLS * 1e9:>10.0f} {size / 1e6:>7.1f} {size / CELLS:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Benchmark output sinks.
+
+This module times a script which outputs a character on every iteration of a loop,
+writing to every kind of sink in `boxscript.streams`, and to a function which prints
+every character like the interpreter used to.
+"""
+
+import io
+import os
+import time
+from contextlib import redirect_stdout
+
+from benchmarks.bench_loops import counting_loop
+from boxscript.interpreter import ENGINES, Interpreter
+from boxscript.streams import Buffer
+
+# the loop outputs its count, which must stay below the surrogates to be encodable
+TRIPS = 50000
+
+
+def main() -> None:
+    """Prints the time taken to run the script with each sink."""
+    code = counting_loop(TRIPS)
+
+    with open(os.devnull, "w") as devnull:
+        sinks = {
+            "print": lambda text: print(end=text),
+            "stdout": None,
+            "callback": lambda text: None,
+            "buffer": Buffer(),
+            "file": devnull,
+        }
+
+        print(f"{'engine':>8} {'sink':>9} {'seconds':>8} {'chars/s':>9}")
+        for engine in ENGINES:
+            for name, output in sinks.items():
+                with redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    Interpreter(engine, output=output).run(code)
+                    elapsed = time.perf_counter() - start
+                print(f"{engine:>8} {name:>9} {elapsed:>8.3f} {TRIPS / elapsed:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
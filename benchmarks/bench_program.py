@@ -0,0 +1,38 @@
+"""Benchmark the cache of Programs.
+
+This module times running short scripts again and again, with and without keeping the
+Programs of scripts in a `boxscript.program.ProgramCache`.
+"""
+
+import time
+
+from benchmarks.bench_loops import counting_loop
+from boxscript.interpreter import ENGINES, Interpreter
+from boxscript.program import ProgramCache
+from boxscript.streams import Buffer
+
+RUNS = 500
+
+
+def main() -> None:
+    """Prints the number of runs per second with each cache."""
+    scripts = [counting_loop(trips) for trips in range(1, 11)]
+
+    print(f"{'engine':>8} {'cache':>6} {'seconds':>8} {'runs/s':>8} {'hits':>6}")
+    for engine in ENGINES:
+        for size in (0, 256):
+            cache = ProgramCache(size)
+            interpreter = Interpreter(engine, output=Buffer(), cache=cache)
+
+            start = time.perf_counter()
+            for i in range(RUNS):
+                interpreter.run(scripts[i % len(scripts)])
+            elapsed = time.perf_counter() - start
+            print(
+                f"{engine:>8} {size:>6} {elapsed:>8.3f} {RUNS / elapsed:>8.0f} "
+                f"{cache.hits:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
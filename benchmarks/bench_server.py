@@ -0,0 +1,74 @@
+"""Benchmark the latency of running short scripts in a Server.
+
+This module runs each of the example programs with ``python -m boxscript run`` in a new
+process, and then sends it to a `boxscript.server.Server` on a Unix socket, and reports
+the median and 99th percentile of the latency of each way. The Server keeps every
+Program after its first request, so only the first request parses the script.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.workloads import DOCS
+from boxscript.server import Client, Server
+
+PROCESSES = 20
+REQUESTS = 2000
+
+
+def percentiles(samples: list[float]) -> str:
+    """Describes the median and 99th percentile of some latencies.
+
+    Args:
+        samples (list[float]): The latencies, in seconds.
+
+    Returns:
+        str: The percentiles, in milliseconds.
+    """
+    samples = sorted(samples)
+    p99 = samples[max(round(0.99 * len(samples)) - 1, 0)]
+    return f"{statistics.median(samples) * 1000:>9.3f} {p99 * 1000:>9.3f}"
+
+
+def main() -> None:
+    """Prints the latency of each example program, in a new process and a Server."""
+    print(f"{'script':>16} {'way':>8} {'p50 ms':>9} {'p99 ms':>9}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        server = Server(workers=4)
+        address = server.listen(os.path.join(directory, "boxscript.sock"))
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        try:
+            with Client(address) as client:
+                for path in sorted(DOCS.glob("*.bs")):
+                    command = [sys.executable, "-m", "boxscript", "run", str(path)]
+                    samples = []
+                    for _ in range(PROCESSES):
+                        start = time.perf_counter()
+                        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+                        samples.append(time.perf_counter() - start)
+                    print(f"{path.stem:>16} {'process':>8} {percentiles(samples)}")
+
+                    source = path.read_text("utf-8")
+                    samples = []
+                    for _ in range(REQUESTS):
+                        start = time.perf_counter()
+                        client.run(source)
+                        samples.append(time.perf_counter() - start)
+                    print(f"{path.stem:>16} {'server':>8} {percentiles(samples)}")
+        finally:
+            server.shutdown()
+            thread.join()
+            server.close()
+        print(f"server: {server.latencies}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Benchmark conversion of expressions to RPN.
+
+This module times `boxscript.ast.shunting_yard` against the original implementation,
+which is kept in the tests, on long generated bitwise expressions.
+"""
+
+import itertools
+import timeit
+
+from boxscript.ast import shunting_yard
+from boxscript.lex import scan
+from tests.test_ast import reference_shunting_yard
+
+
+def expression(terms: int) -> str:
+    """Generates a long bitwise expression, with every fourth term parenthesized.
+
+    Args:
+        terms (int): The number of memory accesses in the expression.
+
+    Returns:
+        str: The expression.
+    """
+    ops = itertools.cycle("▒░▓▚")
+    code = []
+    for i in range(terms):
+        code.append(f"▕◇▀{bin(i % 8)[2:]}" if i % 4 == 0 else f"◇▀{bin(i % 8)[2:]}")
+        code.append(next(ops))
+    code.append("▀▀")
+    code.append("▏" * len(range(0, terms, 4)))
+    return "".join(code).replace("0", "▄").replace("1", "▀")
+
+
+def main() -> None:
+    """Prints the time taken to convert expressions of increasing length."""
+    print(f"{'tokens':>8} {'table us':>10} {'ns/token':>9} {'original us':>12}")
+
+    for terms in (100, 400, 1600, 6400):
+        tokens = list(scan(expression(terms)))
+        table = min(timeit.repeat(lambda: shunting_yard(tokens), number=3, repeat=3))
+        original = min(
+            timeit.repeat(lambda: reference_shunting_yard(tokens), number=1, repeat=1)
+        )
+        print(
+            f"{len(tokens):>8} {table / 3 * 1e6:>10.0f} "
+            f"{table / 3 / len(tokens) * 1e9:>9.0f} {original * 1e6:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Benchmark running a batch of inputs on lanes.
+
+This module compares `boxscript.vector.run_lanes` against running the same batch with
+`boxscript.interpreter.run_many` in a single worker process, with an increasing number
+of lanes in each batch.
+"""
+
+import time
+
+from benchmarks.bench_batch import SCRIPT
+from boxscript.interpreter import run_many
+from boxscript.vector import run_lanes
+
+RUNS = 4000
+
+
+def main() -> None:
+    """Prints the time taken to run the batch."""
+    inputs = [{0: 100 + i % 50} for i in range(RUNS)]
+
+    print(f"{'lanes':>8} {'seconds':>8} {'runs/s':>8}")
+
+    start = time.perf_counter()
+    expected = [result.output for result in run_many(SCRIPT, inputs, workers=1)]
+    elapsed = time.perf_counter() - start
+    print(f"{'scalar':>8} {elapsed:>8.3f} {RUNS / elapsed:>8.0f}")
+
+    for lanes in (16, 256, 4096):
+        start = time.perf_counter()
+        results = list(run_lanes(SCRIPT, inputs, lanes=lanes))
+        elapsed = time.perf_counter() - start
+        assert [result.output for result in results] == expected
+        print(f"{lanes:>8} {elapsed:>8.3f} {RUNS / elapsed:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark the virtual machine on loop-heavy scripts.
+
+This module times a counting loop, nested loops with long bodies and a loop with an
+invariant expression on every engine, and reports the time each one takes and how
+much faster it is than the "tree" engine. Every Program is built before it is timed,
+so only execution is measured, and the fastest of REPEAT runs is kept.
+"""
+
+import time
+
+from benchmarks.bench_analysis import invariant_loop
+from benchmarks.bench_loops import counting_loop
+from benchmarks.workloads import generate
+from boxscript.context import Context
+from boxscript.interpreter import ENGINES
+from boxscript.lex import tokenize
+from boxscript.memory import Mem
+from boxscript.program import Program
+from boxscript.streams import Buffer
+
+SCRIPTS = {
+    "counting": counting_loop(100000),
+    "nested": generate(lines=10, depth=2, length=4, trips=100),
+    "deep": generate(lines=2, depth=4, length=2, trips=12),
+    "invariant": invariant_loop(50000),
+}
+REPEAT = 3
+
+
+def run(program: Program) -> tuple[float, str]:
+    """Runs a Program once, with cells 1 to 3 set.
+
+    Args:
+        program (Program): The Program.
+
+    Returns:
+        tuple[float, str]: The seconds it took, and its output.
+    """
+    memory = Mem()
+    memory[1], memory[2], memory[3] = 3, 5, 7
+    buffer = Buffer()
+
+    start = time.perf_counter()
+    program(Context(memory, buffer.write))
+    return time.perf_counter() - start, buffer.getvalue()
+
+
+def main() -> None:
+    """Prints the time taken by each script on each engine."""
+    print(f"{'script':>10} {'engine':>8} {'seconds':>8} {'speedup':>8}")
+
+    for name, code in SCRIPTS.items():
+        tokens = tokenize(code)
+        outputs, baseline = set(), None
+
+        for engine in ENGINES:
+            program = Program(tokens, engine)
+            seconds, output = min(run(program) for _ in range(REPEAT))
+
+            outputs.add(output)
+            baseline = baseline or seconds
+            print(f"{name:>10} {engine:>8} {seconds:>8.3f} {baseline / seconds:>7.2f}x")
+        assert len(outputs) == 1, f"the engines disagree on {name}"
+
+
+if __name__ == "__main__":
+    main()
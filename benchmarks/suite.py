@@ -0,0 +1,207 @@
+"""Run every benchmark workload, stage by stage.
+
+This module times each stage of running every program in `benchmarks.workloads`:
+validating it with `boxscript.boxes.valid`, tokenizing it with `boxscript.lex.tokenize`,
+parsing it into a `boxscript.ast.Script`, loading that Script from the format of
+`boxscript.compiled` instead, and executing it on every engine. The results
+can be saved as JSON, and compared with results which were saved before, e.g.::
+
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --baseline baseline.json
+
+Each stage is run until it has taken a fair amount of time, and the fastest of several
+repeats is kept, since it is the least disturbed by anything else the machine is doing.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+from typing import Callable, Optional
+
+from benchmarks.workloads import workloads
+from boxscript.ast import Script
+from boxscript.boxes import valid
+from boxscript.compiled import dumps, loads
+from boxscript.context import Context
+from boxscript.interpreter import ENGINES
+from boxscript.lex import tokenize
+from boxscript.memory import Mem
+from boxscript.program import Program
+from boxscript.streams import Buffer
+
+REPEAT = 5
+THRESHOLD = 0.1
+
+
+def measure(function: Callable[[], object], repeat: int = REPEAT) -> dict[str, float]:
+    """Times a function.
+
+    Args:
+        function (Callable[[], object]): The function.
+        repeat (int, optional): The number of times the timing is repeated. Defaults to
+            REPEAT.
+
+    Returns:
+        dict[str, float]: The fastest and the median seconds per call.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    times = [seconds / number for seconds in timer.repeat(repeat, number)]
+    return {"best": min(times), "median": statistics.median(times)}
+
+
+def stages(code: str) -> dict[str, Callable[[], object]]:
+    """Gets the stages of running a program.
+
+    Args:
+        code (str): The program.
+
+    Returns:
+        dict[str, Callable[[], object]]: A function which runs each stage once, by name.
+    """
+    tokens = tokenize(code)
+    data = dumps(Script(tokens), code)
+    functions = {
+        "valid": lambda: valid(code),
+        "tokenize": lambda: tokenize(code),
+        "script": lambda: Script(tokens),
+        "load": lambda: loads(data),
+    }
+
+    for engine in ENGINES:
+        program = Program(Script(tokens), engine)
+
+        def execute(program: Program = program) -> None:
+            context = Context(Mem(), Buffer().write)
+            program(context)
+
+        functions[f"execute/{engine}"] = execute
+    return functions
+
+
+def run(only: Optional[str] = None, repeat: int = REPEAT) -> dict[str, object]:
+    """Runs the benchmark suite.
+
+    Args:
+        only (Optional[str], optional): Only run the workloads whose names contain
+            this. Defaults to None, which runs all of them.
+        repeat (int, optional): The number of times each timing is repeated. Defaults
+            to REPEAT.
+
+    Returns:
+        dict[str, object]: The machine the suite ran on, and the timings of every
+            stage, by workload.
+    """
+    results = {}
+    for name, code in workloads().items():
+        if only is not None and only not in name:
+            continue
+        results[name] = {
+            stage: measure(function, repeat) for stage, function in stages(code).items()
+        }
+
+    return {
+        "machine": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: dict[str, object], baseline: dict[str, object], threshold: float
+) -> tuple[list[str], int]:
+    """Compares results with a baseline.
+
+    Args:
+        results (dict[str, object]): The results of `run`.
+        baseline (dict[str, object]): The results of an earlier `run`.
+        threshold (float): How much slower a stage may be before it is a regression,
+            e.g. 0.1 for 10%.
+
+    Returns:
+        tuple[list[str], int]: A table of the changes, and the number of regressions.
+    """
+    table = [
+        f"{'workload':>16} {'stage':>16} {'baseline us':>12} {'now us':>12} "
+        f"{'change':>8}"
+    ]
+    regressions = 0
+
+    for name, timings in results["results"].items():
+        for stage, timing in timings.items():
+            before = baseline["results"].get(name, {}).get(stage)
+            if before is None:
+                continue
+
+            change = timing["best"] / before["best"] - 1
+            verdict = ""
+            if change > threshold:
+                verdict = "slower"
+                regressions += 1
+            elif change < -threshold:
+                verdict = "faster"
+            row = (
+                f"{name:>16} {stage:>16} {before['best'] * 1e6:>12.1f} "
+                f"{timing['best'] * 1e6:>12.1f} {change * 100:>7.1f}% {verdict}"
+            )
+            table.append(row.rstrip())
+    return table, regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Runs the suite, and prints the timings or how they changed.
+
+    Args:
+        argv (Optional[list[str]], optional): The command line arguments. Defaults to
+            None, which uses `sys.argv`.
+
+    Returns:
+        int: 1 if a stage is slower than in the baseline, and 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results in this file")
+    parser.add_argument("--only", help="only run workloads whose names contain this")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="the fraction by which a stage may slow down, e.g. 0.1",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.only, args.repeat)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if not args.baseline:
+        print(f"{'workload':>16} {'stage':>16} {'best us':>12} {'median us':>12}")
+        for name, timings in results["results"].items():
+            for stage, timing in timings.items():
+                print(
+                    f"{name:>16} {stage:>16} {timing['best'] * 1e6:>12.1f} "
+                    f"{timing['median'] * 1e6:>12.1f}"
+                )
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    if baseline["machine"]["platform"] != results["machine"]["platform"]:
+        print("warning: the baseline was run on a different machine", file=sys.stderr)
+    table, regressions = compare(results, baseline, args.threshold)
+    print("\n".join(table))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
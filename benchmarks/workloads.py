@@ -0,0 +1,107 @@
+"""Programs to benchmark.
+
+This module provides the programs in ``docs/*.bs``, and a generator of valid programs
+of any size: the number of lines, how deeply the boxes are nested, how many operators
+each expression has, and how many times each loop runs can all be chosen.
+"""
+
+import pathlib
+
+from benchmarks.bench_loops import number
+
+DOCS = pathlib.Path(__file__).resolve().parent.parent / "docs"
+
+# operators which keep the values of the generated expressions small
+_OPERATORS = ["▐", "▒", "░"]
+_MASK = number(255)
+
+
+def docs() -> dict[str, str]:
+    """Reads the example programs.
+
+    Returns:
+        dict[str, str]: The programs, by the names of their files.
+    """
+    return {path.stem: path.read_text("utf-8") for path in sorted(DOCS.glob("*.bs"))}
+
+
+def expression(cell: int, length: int) -> str:
+    """Generates an expression which updates a cell.
+
+    Args:
+        cell (int): The cell, which is also the first operand.
+        length (int): The number of operators.
+
+    Returns:
+        str: The expression, which is an assignment to the cell.
+    """
+    operands = []
+    for i in range(length):
+        operator = _OPERATORS[i % len(_OPERATORS)]
+        operands.append(operator + (_MASK if operator == "░" else number(i + 1)))
+    return f"{number(cell)}◈◇{number(cell)}" + "".join(operands)
+
+
+def _box(condition: str, body: list[str]) -> list[str]:
+    """Draws a conditional box around rows, which may be boxes themselves."""
+    width = max(len(row) for row in [condition, *body])
+    return [
+        "┏" + "━" * width + "┓",
+        "┃" + condition.ljust(width) + "┃",
+        "┡" + "━" * width + "┩",
+        *("│" + row.ljust(width) + "│" for row in body),
+        "└" + "─" * width + "┘",
+    ]
+
+
+def generate(lines: int = 10, depth: int = 1, length: int = 4, trips: int = 100) -> str:
+    """Generates a valid program.
+
+    The program is a loop over cell 0, with a loop over cell 1 inside it, and so on.
+    The innermost loop updates the cells after the counters with one line each.
+
+    Args:
+        lines (int, optional): The number of lines in the innermost loop. Defaults to
+            10.
+        depth (int, optional): The number of nested loops, which is at least 1.
+            Defaults to 1.
+        length (int, optional): The number of operators in each line. Defaults to 4.
+        trips (int, optional): The number of iterations of each loop, so the lines
+            run `trips ** depth` times. Defaults to 100.
+
+    Returns:
+        str: The program.
+    """
+    depth = max(depth, 1)
+    body = [expression(depth + i, length) for i in range(lines)]
+
+    for counter in reversed(range(depth)):
+        cell = number(counter)
+        rows = _box(f"◇{cell}▨{number(trips)}", [*body, f"{cell}◈◇{cell}▐▀▀"])
+        # the counter starts again from 0 every time the loop is entered
+        body = [f"{cell}◈▀▄", *rows]
+
+    return "\n".join(body[1:])
+
+
+# the generated programs of the benchmark suite, by name
+GENERATED = {
+    "small": {"lines": 10, "depth": 1, "length": 4, "trips": 100},
+    "wide": {"lines": 500, "depth": 1, "length": 2, "trips": 10},
+    "deep": {"lines": 4, "depth": 4, "length": 2, "trips": 8},
+    "long": {"lines": 4, "depth": 1, "length": 64, "trips": 100},
+    "hot": {"lines": 2, "depth": 1, "length": 2, "trips": 20000},
+}
+
+
+def workloads() -> dict[str, str]:
+    """Gets every program of the benchmark suite.
+
+    Returns:
+        dict[str, str]: The programs, by name.
+    """
+    programs = docs()
+    programs.update(
+        (name, generate(**parameters)) for name, parameters in GENERATED.items()
+    )
+    return programs
@@ -0,0 +1,5 @@
+import sys
+
+from boxscript.cli import main
+
+sys.exit(main())
@@ -0,0 +1,288 @@
+"""Analyze which cells of memory parsed code reads and writes.
+
+This module provides a static analysis of the cells which Boxes, Blocks and Lines read
+and write, and a pass over a Script which uses it:
+
+- an expression in a loop which only reads cells that the loop never writes has the
+  same value on every iteration, so the value is kept after it is first evaluated
+- a line which has no output and no assignment, cannot raise an error, and whose value
+  is never used is removed, as are boxes which are left without any lines
+
+Note:
+    An invariant expression is still evaluated where it was first reached, rather than
+    before the loop, so it raises its errors at the same point as before. Its value is
+    kept in the `cache` of the Context, and forgotten every time the loop is entered.
+"""
+
+from typing import Iterator, Optional
+
+from boxscript.ast import Box, Container, Expression, IfBlock, Line, Number, Script
+from boxscript.context import Context
+from boxscript.lex import Atom, Node
+
+__all__ = ["Invariant", "Loop", "Report", "analyze", "pure", "reads", "writes"]
+
+
+# an expression is only worth keeping if evaluating it is slower than looking it up
+MIN_OPERATIONS = 2
+
+_COMPARISONS = {Atom.LT, Atom.GT, Atom.EQ, Atom.NE}
+
+
+class Invariant(Expression):
+    """An Expression whose value does not change while its loop runs."""
+
+    __slots__ = []
+
+    def execute(self, context: Context) -> Number:
+        """Evaluates the RPN expression, unless it has been evaluated in this loop.
+
+        Args:
+            context (Context): The memory and output to execute with.
+
+        Returns:
+            Number: The value of the expression.
+        """
+        value = context.cache.get(self)
+        if value is None:
+            value = context.cache[self] = self.function(context.memory)
+        return value
+
+
+class Loop(Box):
+    """A conditional Box which contains Invariants."""
+
+    __slots__ = ["invariants"]
+
+    def __init__(
+        self,
+        children: list[Node],
+        invariants: list[Invariant],
+        line_number: int = None,
+    ):
+        """Creates a Loop.
+
+        Args:
+            children (list[Node]): The blocks of the Box.
+            invariants (list[Invariant]): The Invariants of the Box, which are not in
+                any conditional Box inside it.
+            line_number (int, optional): The row of the top of the Box in the script.
+                Defaults to None.
+        """
+        super().__init__(children, line_number)
+        self.invariants = invariants
+
+    def reset(self, context: Context) -> None:
+        """Forgets the values of the Invariants.
+
+        Args:
+            context (Context): The Context which keeps the values.
+        """
+        for invariant in self.invariants:
+            context.cache.pop(invariant, None)
+
+    def execute(self, context: Context) -> int:
+        """Executes all children.
+
+        Args:
+            context (Context): The memory and output to execute with.
+
+        Returns:
+            int: 0 if a conditional fails on the first pass, 1 otherwise.
+        """
+        self.reset(context)
+        return super().execute(context)
+
+
+class Report:
+    """What `analyze` changed in a Script."""
+
+    __slots__ = ["hoisted", "removed"]
+
+    def __init__(self):
+        """Creates an empty Report."""
+        self.hoisted = []
+        self.removed = []
+
+    def __str__(self) -> str:
+        changes = [(row, "hoisted") for row in self.hoisted]
+        changes += [(row, "removed") for row in self.removed]
+        return "\n".join(f"line {row}: {change}" for row, change in sorted(changes))
+
+
+def reads(expression: Expression) -> Optional[set[Number]]:
+    """Gets the cells which an Expression reads.
+
+    Args:
+        expression (Expression): The Expression, which should be optimized so that
+            constant indices are Atom.LOAD.
+
+    Returns:
+        Optional[set[Number]]: The indices of the cells, or None if an index is only
+            known once the expression is evaluated, or if it reads the input, which
+            gives a different value every time.
+    """
+    cells = set()
+    for token in expression.children:
+        if token.type is Atom.MEM or token.type is Atom.IN:
+            return None
+        if token.type is Atom.LOAD:
+            cells.add(token.value)
+    return cells
+
+
+def writes(node: Node) -> Optional[set[Number]]:
+    """Gets the cells which are assigned to anywhere under a Node.
+
+    Args:
+        node (Node): The Node.
+
+    Returns:
+        Optional[set[Number]]: The indices of the cells, or None if an index is only
+            known once the assignment is executed.
+    """
+    cells = set()
+    for line in Line.get_lines(node):
+        expressions = line.expressions()
+        if len(expressions) == 2:
+            loc = expressions[0].children
+            if len(loc) != 1 or loc[0].type is not Atom.NUM:
+                return None
+            cells.add(loc[0].value)
+    return cells
+
+
+def pure(expression: Expression) -> bool:
+    """Checks whether evaluating an Expression can never raise an error.
+
+    Note:
+        Only reading memory and comparing are known to be safe, since most arithmetic
+        can raise errors for some values (e.g. dividing by 0, or shifting a float).
+
+    Args:
+        expression (Expression): The Expression.
+
+    Returns:
+        bool: Whether the Expression is pure.
+    """
+    depth = 1
+    for token in expression.children:
+        if token.type in (Atom.NUM, Atom.LOAD):
+            depth += 1
+        elif token.type in _COMPARISONS:
+            if depth < 2:
+                return False
+            depth -= 1
+        elif token.type is not Atom.MEM:
+            return False
+    return True
+
+
+def _dead(node: Node) -> bool:
+    """Checks whether executing a Node does nothing but give a value."""
+    if isinstance(node, Line):
+        expressions = node.expressions()
+        return not node.output and len(expressions) < 2 and all(map(pure, expressions))
+    if isinstance(node, Box):
+        # conditional boxes can loop forever, which must not be removed
+        return not node.conditional and not any(
+            block.children for block in node.children
+        )
+    return False
+
+
+def _lines(box: Box) -> Iterator[Line]:
+    """Gets the Lines of a Box which are not in any conditional Box inside it."""
+    for block in box.children:
+        for child in block.children:
+            if isinstance(child, Line):
+                yield child
+            elif isinstance(child, Box) and not child.conditional:
+                yield from _lines(child)
+
+
+def _operations(expression: Expression) -> int:
+    return sum(token.type is not Atom.NUM for token in expression.children)
+
+
+def _eliminate(block: Container, report: Report) -> None:
+    """Removes the dead children of a Block (or Script)."""
+    # the value of the last child is the value of the block
+    last = len(block.children) - 1 if isinstance(block, IfBlock) else None
+
+    children = []
+    for i, child in enumerate(block.children):
+        if i != last and _dead(child):
+            if isinstance(child, Line):
+                report.removed.append(child.line_number)
+            continue
+        children.append(child)
+    block.children = children
+
+
+def _hoist(box: Box, report: Report) -> Box:
+    """Turns the invariant expressions of a conditional Box into Invariants."""
+    written = writes(box)
+    if written is None:
+        return box
+
+    invariants = []
+    for line in _lines(box):
+        node = line.children[0]
+        parent = line if isinstance(node, Expression) else node
+        hoisted = False
+
+        for i, expression in enumerate(line.expressions()):
+            if _operations(expression) < MIN_OPERATIONS:
+                continue
+            cells = reads(expression)
+            if cells is None or not cells.isdisjoint(written):
+                continue
+            parent.children[i] = Invariant(expression.children)
+            invariants.append(parent.children[i])
+            hoisted = True
+
+        if hoisted:
+            report.hoisted.append(line.line_number)
+
+    if not invariants:
+        return box
+    return Loop(box.children, invariants, box.line_number)
+
+
+def _visit(node: Container, report: Report) -> Container:
+    """Analyzes a Box or a Block, and every Box in it."""
+    for i, child in enumerate(node.children):
+        if isinstance(child, Container) and not isinstance(child, Line):
+            node.children[i] = _visit(child, report)
+
+    if isinstance(node, Box):
+        if node.conditional:
+            return _hoist(node, report)
+        return node
+    _eliminate(node, report)
+    return node
+
+
+def analyze(script: Script) -> Report:
+    """Hoists the loop invariants and removes the dead lines of a Script.
+
+    Note:
+        The Script is changed in place. The expressions should already be optimized
+        with `boxscript.optimize.optimize_script`.
+
+    Args:
+        script (Script): The Script.
+
+    Returns:
+        Report: The rows of the lines which were hoisted and removed.
+    """
+    report = Report()
+    for i, child in enumerate(script.children):
+        if isinstance(child, Container):
+            script.children[i] = _visit(child, report)
+    _eliminate(script, report)
+
+    report.hoisted.sort()
+    report.removed.sort()
+    return report
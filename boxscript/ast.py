@@ -3,46 +3,38 @@
 This module provides the necessary functions to construct the AST for BoxScript.
 """
 
-import collections
+import functools
 import itertools
-from typing import Generator, Optional
-
-from boxscript.lex import Atom, Node, Token
-
-
-class Mem:
-    """A class to store the values in memory."""
-
-    def __init__(self):
-        """Initialize the memory."""
-        self.memory = collections.defaultdict(int)
-
-    def __getitem__(self, key: int) -> int:
-        """Get the value of the variable.
-
-        Args:
-            key (int): The key that is used to access the value.
-
-        Returns:
-            int: The value at the key. Defaults to 0.
-        """
-        return self.memory[key]
-
-    def __setitem__(self, key: int, value: int) -> None:
-        """Set the value of the variable.
-
-        Args:
-            key (int): The key that is used to set the value.
-            value (int): The value that is set at the key.
-        """
-        self.memory[key] = value
-
-    def reset(self) -> None:
-        """Reset the memory."""
-        self.memory = collections.defaultdict(int)
-
-
-Memory = Mem()
+import operator
+from typing import Callable, Generator, Optional, Union
+
+from boxscript.context import Context
+from boxscript.lex import Atom, Node, Token, Tokens, check_line
+from boxscript.memory import Mem
+
+Number = Union[int, float]
+
+
+PRECEDENCE = {
+    Atom.NE: 0,
+    Atom.EQ: 0,
+    Atom.LT: 0,
+    Atom.GT: 0,
+    Atom.OR: 1,
+    Atom.XOR: 2,
+    Atom.AND: 3,
+    Atom.L_SHIFT: 4,
+    Atom.R_SHIFT: 4,
+    Atom.ADD: 5,
+    Atom.SUB: 5,
+    Atom.MULT: 6,
+    Atom.DIV: 6,
+    Atom.MOD: 6,
+    Atom.MEM: 7,
+    Atom.NOT: 7,
+    Atom.POW: 8,
+}
+RIGHT_ASSOCIATIVE = {Atom.POW}
 
 
 def shunting_yard(tokens: list[Token]) -> list[Token]:
@@ -51,6 +43,13 @@ def shunting_yard(tokens: list[Token]) -> list[Token]:
     This function should not be used with certain Tokens, such as list assignment or
     output. These should be taken care of with special cases.
 
+    Note:
+        Before an operator is pushed, operators are popped from the stack while any
+        operator which binds at least as tightly is anywhere on the stack, and the top
+        of the stack is not a parenthesis. A memory access or NOT is treated as if
+        any open parenthesis on the stack binds at least as tightly. Operators on the
+        stack are counted by precedence, so this check takes constant time.
+
     Args:
         tokens (list[Token]): An input list of numerical Tokens.
 
@@ -59,180 +58,37 @@ def shunting_yard(tokens: list[Token]) -> list[Token]:
     """
     output = []
     stack = []
+    counts = [0] * (max(PRECEDENCE.values()) + 1)
+    parens = 0
+
     for token in tokens:
-        if token.type is Atom.NUM:
+        if token.type is Atom.NUM or token.type is Atom.IN:
             output.append(token)
-        elif token.type is Atom.POW:
-            stack.append(token)
-        elif token.type in [Atom.MEM, Atom.NOT]:
-            while (
-                any(
-                    op in map(lambda e: e.type, stack)
-                    for op in [Atom.MEM, Atom.NOT, Atom.POW, Atom.L_PAREN]
-                )
-                and stack[-1].type != Atom.L_PAREN
-            ):
-                output.append(stack.pop())
-            stack.append(token)
-        elif token.type in [Atom.MULT, Atom.DIV, Atom.MOD]:
-            while (
-                any(
-                    op in map(lambda e: e.type, stack)
-                    for op in [
-                        Atom.MULT,
-                        Atom.DIV,
-                        Atom.MOD,
-                        Atom.MEM,
-                        Atom.NOT,
-                        Atom.POW,
-                    ]
-                )
-                and stack[-1].type != Atom.L_PAREN
-            ):
-                output.append(stack.pop())
-            stack.append(token)
-        elif token.type in [Atom.ADD, Atom.SUB]:
-            while (
-                any(
-                    op in map(lambda e: e.type, stack)
-                    for op in [
-                        Atom.ADD,
-                        Atom.SUB,
-                        Atom.MULT,
-                        Atom.DIV,
-                        Atom.MOD,
-                        Atom.MEM,
-                        Atom.NOT,
-                        Atom.POW,
-                    ]
-                )
-                and stack[-1].type != Atom.L_PAREN
-            ):
-                output.append(stack.pop())
-            stack.append(token)
-        elif token.type in [Atom.L_SHIFT, Atom.R_SHIFT]:
-            while (
-                any(
-                    op in map(lambda e: e.type, stack)
-                    for op in [
-                        Atom.L_SHIFT,
-                        Atom.R_SHIFT,
-                        Atom.ADD,
-                        Atom.SUB,
-                        Atom.MULT,
-                        Atom.DIV,
-                        Atom.MOD,
-                        Atom.MEM,
-                        Atom.NOT,
-                        Atom.POW,
-                    ]
-                )
-                and stack[-1].type != Atom.L_PAREN
-            ):
-                output.append(stack.pop())
-            stack.append(token)
-        elif token.type is Atom.AND:
-            while (
-                any(
-                    op in map(lambda e: e.type, stack)
-                    for op in [
-                        Atom.AND,
-                        Atom.L_SHIFT,
-                        Atom.ADD,
-                        Atom.SUB,
-                        Atom.R_SHIFT,
-                        Atom.MULT,
-                        Atom.DIV,
-                        Atom.MOD,
-                        Atom.MEM,
-                        Atom.NOT,
-                        Atom.POW,
-                    ]
-                )
-                and stack[-1].type != Atom.L_PAREN
-            ):
-                output.append(stack.pop())
-            stack.append(token)
-        elif token.type is Atom.XOR:
-            while (
-                any(
-                    op in map(lambda e: e.type, stack)
-                    for op in [
-                        Atom.XOR,
-                        Atom.AND,
-                        Atom.L_SHIFT,
-                        Atom.R_SHIFT,
-                        Atom.ADD,
-                        Atom.SUB,
-                        Atom.MULT,
-                        Atom.DIV,
-                        Atom.MOD,
-                        Atom.MEM,
-                        Atom.NOT,
-                        Atom.POW,
-                    ]
-                )
-                and stack[-1].type != Atom.L_PAREN
-            ):
-                output.append(stack.pop())
-            stack.append(token)
-        elif token.type is Atom.OR:
-            while (
-                any(
-                    op in map(lambda e: e.type, stack)
-                    for op in [
-                        Atom.OR,
-                        Atom.XOR,
-                        Atom.AND,
-                        Atom.L_SHIFT,
-                        Atom.R_SHIFT,
-                        Atom.ADD,
-                        Atom.SUB,
-                        Atom.MULT,
-                        Atom.DIV,
-                        Atom.MOD,
-                        Atom.MEM,
-                        Atom.NOT,
-                        Atom.POW,
-                    ]
-                )
-                and stack[-1].type != Atom.L_PAREN
-            ):
-                output.append(stack.pop())
-            stack.append(token)
-        elif token.type in [Atom.NE, Atom.EQ, Atom.LT, Atom.GT]:
-            while (
-                any(
-                    op in map(lambda e: e.type, stack)
-                    for op in [
-                        Atom.NE,
-                        Atom.EQ,
-                        Atom.LT,
-                        Atom.GT,
-                        Atom.OR,
-                        Atom.XOR,
-                        Atom.AND,
-                        Atom.L_SHIFT,
-                        Atom.R_SHIFT,
-                        Atom.ADD,
-                        Atom.SUB,
-                        Atom.MULT,
-                        Atom.DIV,
-                        Atom.MOD,
-                        Atom.MEM,
-                        Atom.NOT,
-                        Atom.POW,
-                    ]
-                )
-                and stack[-1].type != Atom.L_PAREN
-            ):
-                output.append(stack.pop())
+        elif token.type in PRECEDENCE:
+            precedence = PRECEDENCE[token.type]
+
+            if token.type not in RIGHT_ASSOCIATIVE:
+                while (
+                    stack
+                    and stack[-1].type is not Atom.L_PAREN
+                    and (
+                        any(counts[precedence:])
+                        or (parens and token.type in (Atom.MEM, Atom.NOT))
+                    )
+                ):
+                    counts[PRECEDENCE[stack[-1].type]] -= 1
+                    output.append(stack.pop())
+
+            counts[precedence] += 1
             stack.append(token)
         elif token.type is Atom.L_PAREN:
+            parens += 1
             stack.append(token)
         elif token.type is Atom.R_PAREN:
             while stack[-1].type is not Atom.L_PAREN:
+                counts[PRECEDENCE[stack[-1].type]] -= 1
                 output.append(stack.pop())
+            parens -= 1
             stack.pop()
 
     while stack:
@@ -241,12 +97,232 @@ def shunting_yard(tokens: list[Token]) -> list[Token]:
     return output
 
 
+def evaluate_rpn(
+    rpn: list[Token], memory: Mem, read: Callable[[], Number] = None
+) -> Number:
+    """Evaluates an RPN expression one token at a time.
+
+    Args:
+        rpn (list[Token]): The expression in RPN order.
+        memory (Mem): The memory to read cells from.
+        read (Callable[[], Number], optional): The function which reads the next
+            input. Defaults to None, which is only allowed if the expression does not
+            read any input.
+
+    Returns:
+        Number: The value of the expression.
+    """
+    stack = [0]
+    for child in rpn:
+        # keep in mind that the stack's order is reversed, so some operations must
+        # be done in reverse order
+        if child.type is Atom.NUM:
+            stack.append(child.value)
+        elif child.type is Atom.IN:
+            stack.append(read())
+        elif child.type is Atom.MEM:
+            stack.append(memory[stack.pop()])
+        elif child.type is Atom.LOAD:
+            stack.append(memory[child.value])
+        elif child.type is Atom.L_SHIFT:
+            a, b = stack.pop(), stack.pop()
+            stack.append(b << a)
+        elif child.type is Atom.R_SHIFT:
+            a, b = stack.pop(), stack.pop()
+            stack.append(b >> a)
+        elif child.type is Atom.ADD:
+            stack.append(stack.pop() + stack.pop())
+        elif child.type is Atom.SUB:
+            a, b = stack.pop(), stack.pop()
+            stack.append(b - a)
+        elif child.type is Atom.MULT:
+            stack.append(stack.pop() * stack.pop())
+        elif child.type is Atom.DIV:
+            a, b = stack.pop(), stack.pop()
+            stack.append(b / a)
+        elif child.type is Atom.POW:
+            a, b = stack.pop(), stack.pop()
+            stack.append(b ** a)
+        elif child.type is Atom.MOD:
+            a, b = stack.pop(), stack.pop()
+            stack.append(b % a)
+        elif child.type is Atom.AND:
+            stack.append(stack.pop() & stack.pop())
+        elif child.type is Atom.OR:
+            stack.append(stack.pop() | stack.pop())
+        elif child.type is Atom.XOR:
+            stack.append(stack.pop() ^ stack.pop())
+        elif child.type is Atom.NOT:
+            stack.append(~stack.pop())
+        elif child.type is Atom.LT:
+            stack.append(
+                int(stack.pop() > stack.pop())
+            )  # reverse order because of how the stack is organized
+        elif child.type is Atom.GT:
+            stack.append(
+                int(stack.pop() < stack.pop())
+            )  # reverse order because of how the stack is organized
+        elif child.type is Atom.EQ:
+            stack.append(int(stack.pop() == stack.pop()))
+        elif child.type is Atom.NE:
+            stack.append(int(stack.pop() != stack.pop()))
+
+    return stack.pop()
+
+
+BINARY = {
+    Atom.L_SHIFT: operator.lshift,
+    Atom.R_SHIFT: operator.rshift,
+    Atom.ADD: operator.add,
+    Atom.SUB: operator.sub,
+    Atom.MULT: operator.mul,
+    Atom.DIV: operator.truediv,
+    Atom.POW: operator.pow,
+    Atom.MOD: operator.mod,
+    Atom.AND: operator.and_,
+    Atom.OR: operator.or_,
+    Atom.XOR: operator.xor,
+    Atom.LT: lambda a, b: int(a < b),
+    Atom.GT: lambda a, b: int(a > b),
+    Atom.EQ: lambda a, b: int(a == b),
+    Atom.NE: lambda a, b: int(a != b),
+}
+
+
+MAX_OPERATIONS = 200
+
+
+def _operand(entry: tuple) -> Callable[[Mem], Number]:
+    """Turns an entry of the stack used by `compile_rpn` into a function.
+
+    Args:
+        entry (tuple): A tuple of (function, None) or (None, constant).
+
+    Returns:
+        Callable[[Mem], Number]: A function which gives the value of the entry.
+    """
+    function, constant = entry
+    if function is None:
+        return lambda memory: constant
+    return function
+
+
+def _unary(kind: Atom, entry: tuple) -> Callable[[Mem], Number]:
+    """Compiles MEM or NOT applied to an entry of the stack used by `compile_rpn`.
+
+    Args:
+        kind (Atom): Either Atom.MEM or Atom.NOT.
+        entry (tuple): A tuple of (function, None) or (None, constant).
+
+    Returns:
+        Callable[[Mem], Number]: A function which applies the operation.
+    """
+    function, constant = entry
+    if kind is Atom.MEM:
+        if function is None:
+            return lambda memory: memory[constant]
+        return lambda memory: memory[function(memory)]
+    if function is None:
+        return lambda memory: ~constant
+    return lambda memory: ~function(memory)
+
+
+def _binary(kind: Atom, left: tuple, right: tuple) -> Callable[[Mem], Number]:
+    """Compiles a binary operation on two entries of the stack used by `compile_rpn`.
+
+    Args:
+        kind (Atom): The operation.
+        left (tuple): The left operand, as (function, None) or (None, constant).
+        right (tuple): The right operand, as (function, None) or (None, constant).
+
+    Returns:
+        Callable[[Mem], Number]: A function which applies the operation. The left
+            operand is always evaluated first.
+    """
+    op = BINARY[kind]
+    (f, a), (g, b) = left, right
+    if f is None and g is None:
+        return lambda memory: op(a, b)
+    if f is None:
+        return lambda memory: op(a, g(memory))
+    if g is None:
+        return lambda memory: op(f(memory), b)
+    return lambda memory: op(f(memory), g(memory))
+
+
+def reads_input(rpn: list[Token]) -> bool:
+    """Checks whether an RPN expression reads the input.
+
+    Args:
+        rpn (list[Token]): The expression in RPN order.
+
+    Returns:
+        bool: Whether the expression contains Atom.IN.
+    """
+    return any(child.type is Atom.IN for child in rpn)
+
+
+def compile_rpn(rpn: list[Token]) -> Callable[[Mem], Number]:
+    """Compiles an RPN expression into a Python function.
+
+    Note:
+        The function gives exactly the same value as `evaluate_rpn`, and raises the
+        same errors in the same order. Expressions which would pop from an empty stack,
+        or which have more than MAX_OPERATIONS operations and could therefore nest too
+        deeply for Python, are not compiled, and instead are evaluated with
+        `evaluate_rpn`. So are expressions which read the input, whose function also
+        takes the function which reads the next input.
+
+    Args:
+        rpn (list[Token]): The expression in RPN order.
+
+    Returns:
+        Callable[[Mem], Number]: A function which takes the memory and returns the
+            value of the expression.
+    """
+    if sum(child.type is not Atom.NUM for child in rpn) > MAX_OPERATIONS:
+        return functools.partial(evaluate_rpn, rpn)
+    if reads_input(rpn):
+        return functools.partial(evaluate_rpn, rpn)
+
+    stack = [(None, 0)]
+    for child in rpn:
+        if child.type is Atom.NUM:
+            stack.append((None, child.value))
+        elif child.type is Atom.MEM or child.type is Atom.NOT:
+            stack.append((_unary(child.type, stack.pop()), None))
+        elif child.type is Atom.LOAD:
+            stack.append((_unary(Atom.MEM, (None, child.value)), None))
+        elif child.type in BINARY:
+            if len(stack) < 2:
+                return functools.partial(evaluate_rpn, rpn)
+            right = stack.pop()
+            stack.append((_binary(child.type, stack.pop(), right), None))
+
+    result = _operand(stack.pop())
+
+    # values left on the stack are never used, but may still raise errors
+    unused = [function for function, _ in stack if function is not None]
+    if not unused:
+        return result
+
+    def function(memory: Mem) -> Number:
+        for value in unused:
+            value(memory)
+        return result(memory)
+
+    return function
+
+
 class Nil(Node):
     """A Node which does nothing."""
 
-    def execute(self) -> int:
+    def execute(self, context: Context) -> int:
         """Returns 1.
 
+        Args:
+            context (Context): The memory and output to execute with.
+
         Returns:
             int: 1.
         """
@@ -268,40 +344,36 @@ class Container(Node):
             children = []
         self.children = children
 
-    def execute(self) -> int:
+    def execute(self, context: Context) -> int:
         """Executes all children.
 
+        Args:
+            context (Context): The memory and output to execute with.
+
         Returns:
             int: The outcome of the last execution.
         """
         r = 0
         for child in self.children:
-            r = child.execute()
+            r = child.execute(context)
         return r
 
 
 class Block(Container):
-    """A class representing a "block" of code."""
+    """A class representing a "block" of code.
 
-    def execute(self) -> int:
-        """Executes all children.
+    Executing a Block executes all children, and gives the outcome of the last one.
+    Empty lines are removed when the Script is created, so they never give an outcome.
+    """
 
-        Returns:
-            int: The outcome of the last execution.
-        """
-        r = 0
-        for child in self.children:
-            if isinstance(child, Line):
-                child.parse()
-                if isinstance(child.children[0], Nil):
-                    continue
-            r = child.execute()
-        return r
+    condition = False
 
 
 class IfBlock(Block):
     """A class for denoting conditional blocks of code."""
 
+    condition = True
+
 
 class ExecBlock(Block):
     """A class for denoting executable blocks of code."""
@@ -313,88 +385,132 @@ class Box(Container):
     This is a loop in other languages. Sort of.
     """
 
-    def execute(self) -> int:
+    __slots__ = ["conditional", "line_number"]
+
+    def __init__(self, children: list[Node] = None, line_number: int = None):
+        """Create a new Box.
+
+        Args:
+            children (list, optional): The blocks of the Box. Defaults to None.
+            line_number (int, optional): The row of the top of the Box in the script.
+                Defaults to None.
+        """
+        super().__init__(children)
+        self.line_number = line_number
+        self.prepare()
+
+    def prepare(self) -> None:
+        """Finds out whether the Box is conditional, once all blocks are added."""
+        self.conditional = any(child.condition for child in self.children)
+
+    def execute(self, context: Context) -> int:
         """Executes all children.
 
+        Note:
+            Conditional boxes are run as a loop rather than through recursion, so
+            they can run for any number of iterations in constant stack space. Every
+            iteration is a step of the clock of the Context.
+
+        Args:
+            context (Context): The memory and output to execute with.
+
+        Raises:
+            LimitExceeded: The execution takes more steps or time than it is allowed.
+
         Returns:
-            int: 0 if a conditional fails, 1 otherwise. Infinite loops will give an
-                error because Python does not support infinite loops. Essentially,
-                any box which has a conditional will return 0.
+            int: 0 if a conditional fails on the first pass, 1 otherwise. So a box
+                which runs at least once returns 1, like the recursive pass it ran.
         """
-        conditional = any(isinstance(child, IfBlock) for child in self.children)
-        if conditional:
+        if not self.conditional:
             for child in self.children:
-                value = child.execute()
-                if isinstance(child, IfBlock) and not value:
-                    return 0
-            self.execute()
-        else:
+                child.execute(context)
+            return 1
+
+        result = 0
+        for _ in context.clock:
             for child in self.children:
-                child.execute()
-        return 1
+                if not child.execute(context) and child.condition:
+                    return result
+            result = 1
 
 
 class Expression(Container):
     """A class for denoting and evaluating an RPN expression."""
 
-    def execute(self) -> int:
+    __slots__ = ["function"]
+
+    def __init__(self, children: list[Token] = None):
+        """Create a new Expression.
+
+        Note:
+            The expression is compiled into a Python function when it is created.
+
+        Args:
+            children (list[Token], optional): The expression in RPN order. Defaults to
+                None.
+        """
+        super().__init__(children)
+        self.function = compile_rpn(self.children)
+
+    def execute(self, context: Context) -> int:
         """Evaluates the RPN expression.
 
+        Args:
+            context (Context): The memory and output to execute with.
+
         Returns:
             int: The value of the expression.
         """
-        stack = [0]
-        for child in self.children:
-            # keep in mind that the stack's order is reversed, so some operations must
-            # be done in reverse order
-            if child.type is Atom.NUM:
-                stack.append(child.value)
-            elif child.type is Atom.MEM:
-                stack.append(Memory[stack.pop()])
-            elif child.type is Atom.L_SHIFT:
-                a, b = stack.pop(), stack.pop()
-                stack.append(b << a)
-            elif child.type is Atom.R_SHIFT:
-                a, b = stack.pop(), stack.pop()
-                stack.append(b >> a)
-            elif child.type is Atom.ADD:
-                stack.append(stack.pop() + stack.pop())
-            elif child.type is Atom.SUB:
-                a, b = stack.pop(), stack.pop()
-                stack.append(b - a)
-            elif child.type is Atom.MULT:
-                stack.append(stack.pop() * stack.pop())
-            elif child.type is Atom.DIV:
-                a, b = stack.pop(), stack.pop()
-                stack.append(b / a)
-            elif child.type is Atom.POW:
-                a, b = stack.pop(), stack.pop()
-                stack.append(b ** a)
-            elif child.type is Atom.MOD:
-                a, b = stack.pop(), stack.pop()
-                stack.append(b % a)
-            elif child.type is Atom.AND:
-                stack.append(stack.pop() & stack.pop())
-            elif child.type is Atom.OR:
-                stack.append(stack.pop() | stack.pop())
-            elif child.type is Atom.XOR:
-                stack.append(stack.pop() ^ stack.pop())
-            elif child.type is Atom.NOT:
-                stack.append(~stack.pop())
-            elif child.type is Atom.LT:
-                stack.append(
-                    int(stack.pop() > stack.pop())
-                )  # reverse order because of how the stack is organized
-            elif child.type is Atom.GT:
-                stack.append(
-                    int(stack.pop() < stack.pop())
-                )  # reverse order because of how the stack is organized
-            elif child.type is Atom.EQ:
-                stack.append(int(stack.pop() == stack.pop()))
-            elif child.type is Atom.NE:
-                stack.append(int(stack.pop() != stack.pop()))
-
-        return stack.pop()
+        return self.function(context.memory)
+
+
+class Input(Expression):
+    """An Expression which reads the input, each time it is evaluated."""
+
+    __slots__ = []
+
+    def execute(self, context: Context) -> Number:
+        """Evaluates the RPN expression.
+
+        Args:
+            context (Context): The memory, input and output to execute with.
+
+        Returns:
+            Number: The value of the expression.
+        """
+        return self.function(context.memory, context.input)
+
+
+def expression(rpn: list[Token]) -> Expression:
+    """Creates an Expression, which is an Input if it reads the input.
+
+    Args:
+        rpn (list[Token]): The expression in RPN order.
+
+    Returns:
+        Expression: The Expression.
+    """
+    return (Input if reads_input(rpn) else Expression)(rpn)
+
+
+class Assign(Container):
+    """A class for an assignment, whose children are the location and the value."""
+
+    __slots__ = []
+
+    def execute(self, context: Context) -> Number:
+        """Assigns the value to the location.
+
+        Args:
+            context (Context): The memory and output to execute with.
+
+        Returns:
+            Number: The value, before it is rounded.
+        """
+        loc = self.children[0].execute(context)
+        value = self.children[1].execute(context)
+        context.memory[loc] = round(value)
+        return value
 
 
 class Line(Container):
@@ -408,18 +524,22 @@ class Line(Container):
     __slots__ = ["line_number", "parsed", "output"]
     lineno = 0
 
-    def __init__(self, children: list[Node] = None):
+    def __init__(self, children: list[Node] = None, line_number: int = None):
         """Create a new Line.
 
         Args:
             children (list, optional): The children of the Line. Defaults to None.
+            line_number (int, optional): The row of the Line in the script. Defaults
+                to None, which numbers Lines in the order they are created.
         """
         super().__init__(children)
         self.parsed = False
-        self.line_number = Line.lineno
         self.output = False
 
-        Line.lineno += 1
+        if line_number is None:
+            line_number = Line.lineno
+            Line.lineno += 1
+        self.line_number = line_number
 
     def parse(self) -> None:
         """Parses the line.
@@ -445,83 +565,53 @@ class Line(Container):
         ]
 
         if len(split_assign) > 1:
-            loc = Expression(shunting_yard(split_assign[0]))
-            value = Expression(shunting_yard(split_assign[1]))
-
-            class Assign(Container):
-                def execute(self) -> int:
-                    loc = self.children[0].execute()
-                    value = self.children[1].execute()
-                    Memory[loc] = round(value)
-                    return value
-
+            loc = expression(shunting_yard(split_assign[0]))
+            value = expression(shunting_yard(split_assign[1]))
             assignment = Assign(children=[loc, value])
 
             self.children = [assignment]
         elif len(split_assign) == 1:
-            value = Expression(shunting_yard(split_assign[0]))
+            value = expression(shunting_yard(split_assign[0]))
             self.children = [value]
         else:
             self.children = [Nil()]
 
         self.parsed = True
 
+    def expressions(self) -> list["Expression"]:
+        """Gets the Expressions of the parsed line.
+
+        Returns:
+            list[Expression]: The location and the value of an assignment, the value
+                of any other expression, or nothing for an empty line.
+        """
+        node = self.children[0]
+        if isinstance(node, Expression):
+            return [node]
+        if isinstance(node, Container):
+            return node.children
+        return []
+
     def valid(self) -> Optional[SyntaxError]:
         """Checks whether the line is valid.
 
         Returns:
             Optional[SyntaxError]: The syntax error, if any.
         """
-        # test parentheses
-        parens = 0
-        for token in self.children:
-            if token.type == Atom.L_PAREN:
-                parens += 1
-            elif token.type == Atom.R_PAREN:
-                parens -= 1
-            if parens < 0:
-                return SyntaxError(f"Unmatched parentheses at line {self.line_number}")
-        if parens:
-            return SyntaxError(f"Unmatched parentheses at line {self.line_number}")
+        return check_line(self.children, self.line_number)
 
-        split_assign = [
-            list(group)
-            for key, group in itertools.groupby(
-                self.children, lambda tok: tok.type is Atom.ASSIGN
-            )
-            if not key
-        ]
-
-        # test assignments
-        if len(split_assign) > 2:
-            return SyntaxError(
-                f"Too many assignment operations on line {self.line_number}"
-            )
-
-        # test outputs
-        out_count = len([child for child in self.children if child.type is Atom.OUT])
-        if out_count > 1:
-            return SyntaxError(f"Too many output operations on line {self.line_number}")
-        elif out_count == 1:
-            if self.children[0].type is not Atom.OUT:
-                return SyntaxError(
-                    f"Output operation must be at the beginning of line "
-                    f"{self.line_number}"
-                )
-
-    def execute(self) -> int:
+    def execute(self, context: Context) -> int:
         """Executes all children
 
+        Args:
+            context (Context): The memory and output to execute with.
+
         Returns:
             int: The outcome of the execution.
         """
-        if self.children:
-            r = self.children[0].execute()
-        else:
-            r = 0
-
+        r = self.children[0].execute(context)
         if self.output:
-            print(end=chr(round(r)))
+            context.output(chr(round(r)))
 
         return r
 
@@ -546,6 +636,24 @@ class Line(Container):
             pass
 
 
+def _remove_empty_lines(node: Container) -> None:
+    """Removes the parsed Lines which are Nil from every Block under a Node.
+
+    Args:
+        node (Container): The root Node.
+    """
+    for child in node.children:
+        if isinstance(child, (Box, Block)):
+            _remove_empty_lines(child)
+
+    if isinstance(node, Block):
+        node.children = [
+            child
+            for child in node.children
+            if not isinstance(child, Line) or not isinstance(child.children[0], Nil)
+        ]
+
+
 class Script(Container):
     """A class for the Container which contains all code.
 
@@ -558,23 +666,32 @@ class Script(Container):
 
         Note:
             This also parses the script into a list of Containers, which are then
-            assigned as children.
+            assigned as children. Lines are checked for errors, unless the tokens
+            come from `boxscript.lex.tokenize`, which has already checked them. Every
+            Line is then parsed and empty Lines are removed, so executing the Script
+            does not parse anything.
 
         Args:
             children (list[Token], optional): All tokens belonging to a script. Defaults
                 to None.
+
+        Raises:
+            SyntaxError: A line is not valid.
         """
         if children is None:
             children = []
 
         super().__init__()
         box_stack = [Container()]
+        row = 0
 
         for child in children:
             if child.type in [Atom.BOX_START, Atom.EXEC_START, Atom.IF_START]:
                 if child.type is Atom.BOX_START:
-                    b = Box()
-                    box_stack.pop()  # remove newline from the stack
+                    b = Box(line_number=row)
+                    # a box on the first row of the script has no newline before it
+                    if isinstance(box_stack[-1], Line):
+                        box_stack.pop()  # remove newline from the stack
                 elif child.type is Atom.EXEC_START:
                     b = ExecBlock()
                 elif child.type is Atom.IF_START:
@@ -584,11 +701,14 @@ class Script(Container):
             elif child.type in [Atom.BOX_END, Atom.EXEC_END, Atom.IF_END]:
                 if child.type in [Atom.EXEC_END, Atom.IF_END]:
                     box_stack.pop()  # remove newline from stack
-                box_stack.pop()
+                    box_stack.pop()
+                else:
+                    box_stack.pop().prepare()
             elif child.type is Atom.NEWLINE:
+                row += 1
                 if isinstance(box_stack[-1], Line):
                     box_stack.pop()
-                box_stack[-1].children.append(Line())
+                box_stack[-1].children.append(Line(line_number=row))
                 box_stack.append(box_stack[-1].children[-1])
             else:
                 box_stack[-1].children.append(child)
@@ -597,7 +717,12 @@ class Script(Container):
             child for child in box_stack[0].children if not isinstance(child, Line)
         ]
 
+        if not isinstance(children, Tokens):
+            for line in Line.get_lines(self):
+                line_error = line.valid()
+                if isinstance(line_error, SyntaxError):
+                    raise line_error
+
         for line in Line.get_lines(self):
-            line_error = line.valid()
-            if isinstance(line_error, SyntaxError):
-                raise line_error
+            line.parse()
+        _remove_empty_lines(self)
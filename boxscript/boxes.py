@@ -61,113 +61,157 @@ CHARACTERS = " │┃║─━═┌┐└┘┏┓┗┛╔╗╚╝├┤┞
 BORDERS = "┛┣─├┌│┤┡┏┧┪┟┞━┓┐┢└┦┩┗┫┃┘╔╗╚╝║╠═╣"
 
 
-def _neighbors(text: str, pos: list[int]) -> dict[str, str]:
-    """Finds the characters neighboring a position
+_ANY_BORDER = re.compile(f"[{''.join(ADJACENT)}]")
+_CORNERS = re.compile(r"[┌┐└┘┏┓┗┛╔╗╚╝]")
+_TOP_CORNERS = re.compile(r".*[┌┐┏┓╔╗]")
+_TOP_EDGE = re.compile(r"[┌┏╔].*[┐┓╗]")
+_COMMENT = re.compile(r"║.*║")
+_COMMENT_BOX = re.compile(r"[╔╚║╠].*[╗╝║╣]")
+_WALLS = re.compile(r"[│┃]")
+_NOT_WALLS = re.compile(r"[^│┃║]+")
+_WHITESPACE = re.compile(r"\s")
+_STATEMENTS = re.compile(rf"[^{BORDERS}]+")
+_BORDER = re.compile(rf"[{BORDERS}]")
+_OFFSETS = {"N": (-1, 0), "S": (1, 0), "E": (0, 1), "W": (0, -1)}
+
+
+def _neighbor(rows: list[str], r: int, c: int, direction: str) -> str:
+    """Finds the character neighboring a position
 
     Args:
-        text (str): The text to use when finding neighbors
-        pos (list[int]): The location in the form [row, column]
+        rows (list[str]): The lines of the text to use when finding neighbors
+        r (int): The row of the position
+        c (int): The column of the position
+        direction (str): The cardinal direction to look in, one of "NSEW"
 
     Returns:
-        dict[str, str]: A dictionary of neighbors of the form
-            {"N": `chr`, "S": `chr`, "E": `chr`, "W": `chr`}.
-            If there is no neighboring character in a cardinal direction,
-            then that `chr` will be \0.
+        str: The neighboring character. If there is no neighboring character in that
+            direction, then this will be \\0.
     """
-    r, c = pos
-    chars = [[*line] for line in text.splitlines()]
-    near = {}
+    dr, dc = _OFFSETS[direction]
 
-    find = {
-        "E": lambda: chars[r][c + 1],
-        "W": lambda: chars[r][c - 1],
-        "S": lambda: chars[r + 1][c],
-        "N": lambda: chars[r - 1][c],
-    }
+    try:
+        return rows[r + dr][c + dc]
+    except IndexError:
+        return "\0"
 
-    for direction in find:
-        try:
-            near[direction] = find[direction]()
-        except IndexError:
-            near[direction] = "\0"
 
-    return near
-
-
-def valid(text: str) -> Optional[SyntaxError]:
-    """Checks whether the code only contains valid boxes
+def _continuous(rows: list[str], i: int) -> Optional[SyntaxError]:
+    """Checks that every border on a line connects to its neighbors
 
     Args:
-        text (str): The code to check
+        rows (list[str]): The lines of the code to check
+        i (int): The index of the line to check
 
     Returns:
         Optional[SyntaxError]: The syntax error, if any.
     """
-    lines = text.splitlines()
+    line = rows[i]
 
-    # check continuity
-    for i, line in enumerate(lines):
-        for j, char in enumerate(line):
-            if "║" in line[:j] and "║" in line[-~j:]:
-                continue
+    # borders strictly between the first and last comment walls are part of a comment
+    first, last = line.find("║"), line.rfind("║")
 
-            expected = ADJACENT.get(char, {})
+    for m in _ANY_BORDER.finditer(line):
+        j = m.start()
 
-            neighbor = _neighbors(text, (i, j))
+        if first < j < last:
+            continue
 
-            for direction, expected_neighbors in expected.items():
-                if neighbor[direction] not in expected_neighbors:
-                    return SyntaxError(f"Discontinuous box at line {i}")
+        for direction, expected in ADJACENT[m.group()].items():
+            if _neighbor(rows, i, j, direction) not in expected:
+                return SyntaxError(f"Discontinuous box at line {i}")
 
-    for i, line in enumerate(lines):
-        # remove comments
-        strip_c = line
-        for comment in re.findall(r"║.*║", line):
-            strip_c = strip_c.replace(comment, " " * len(comment))
 
-        # check for invalid characters
-        for _j, char in enumerate(strip_c):
-            if char not in CHARACTERS:
-                return SyntaxError(f"Invalid character `{char}` at line {i}")
+def _check_line(line: str, i: int) -> Optional[SyntaxError]:
+    """Checks the contents of a single line, ignoring its neighbors
 
-        # check for duplicate boxes
-        if len(re.findall(r"[┌┐└┘┏┓┗┛╔╗╚╝]", strip_c)) not in (0, 2):
-            return SyntaxError(f"Duplicate box at line {i}")
+    Args:
+        line (str): The line to check
+        i (int): The index of the line, used in the error message
 
-        # remove whitespace
-        strip_w = re.sub(r"\s", "", strip_c)
+    Returns:
+        Optional[SyntaxError]: The syntax error, if any.
+    """
+    # remove comments
+    strip_c = line
+    for comment in _COMMENT.findall(line):
+        strip_c = strip_c.replace(comment, " " * len(comment))
+
+    # check for invalid characters
+    for char in strip_c:
+        if char not in CHARACTERS:
+            return SyntaxError(f"Invalid character `{char}` at line {i}")
+
+    # check for duplicate boxes
+    if len(_CORNERS.findall(strip_c)) not in (0, 2):
+        return SyntaxError(f"Duplicate box at line {i}")
+
+    # remove whitespace
+    strip_w = _WHITESPACE.sub("", strip_c)
 
-        # check for duplicate/malformed boxes
-        if re.match(r".*[┌┐┏┓╔╗]", strip_w):
-            sides = re.split(r"[┌┏╔].*[┐┓╗]", strip_w)
+    # check for duplicate/malformed boxes
+    if _TOP_CORNERS.match(strip_w):
+        sides = _TOP_EDGE.split(strip_w)
 
-            if len(re.findall(r"[│┃]", sides[0])) != len(re.findall(r"[│┃]", sides[1])):
-                return SyntaxError(f"Duplicate box at line {i}")
+        # e.g. the right corner is before the left one
+        if len(sides) != 2:
+            return SyntaxError(f"Duplicate box at line {i}")
 
-        # check for unmatched walls
-        sides = [walls for walls in re.split(r"[^│┃║]+", strip_w)] if strip_w else []
+        if len(_WALLS.findall(sides[0])) != len(_WALLS.findall(sides[1])):
+            return SyntaxError(f"Duplicate box at line {i}")
 
-        if sides:
-            if len(sides) != 2:
-                if sides[0] != sides[0][::-1]:
-                    return SyntaxError(f"Unmatched wall at line {i}")
+    # check for unmatched walls
+    sides = [walls for walls in _NOT_WALLS.split(strip_w)] if strip_w else []
 
-            elif sides[0] != sides[1][::-1]:
+    if sides:
+        if len(sides) != 2:
+            if sides[0] != sides[0][::-1]:
                 return SyntaxError(f"Unmatched wall at line {i}")
 
-        # check that no code is outside of a box
-        strip_w = re.sub(r"[╔╚║╠].*[╗╝║╣]", "", strip_w)
+        elif sides[0] != sides[1][::-1]:
+            return SyntaxError(f"Unmatched wall at line {i}")
+
+    # check that no code is outside of a box
+    strip_w = _COMMENT_BOX.sub("", strip_w)
+
+    statements = _STATEMENTS.findall(strip_w)
+    borders = _BORDER.findall(strip_w)
 
-        statements = re.findall(fr"[^{BORDERS}]+", strip_w)
-        borders = re.findall(fr"[{BORDERS}]", strip_w)
+    if strip_w and not borders:
+        return SyntaxError(f"Code outside of box at line {i}")
 
-        if strip_w and not borders:
-            print(strip_w)
+    if any(char in strip_w for char in "┛┣─├┌┤┡┏┧┪┟┞━┓┐┢└┦┩┗┫┘"):
+        if len(statements) > 0:
             return SyntaxError(f"Code outside of box at line {i}")
+    else:
+        if len(statements) > 1:
+            return SyntaxError(f"Code outside of box at line {i}")
+
+
+def valid(text: str) -> Optional[SyntaxError]:
+    """Checks whether the code only contains valid boxes
+
+    Note:
+        The text is split into lines once and every line is visited once, so this runs
+        in time linear to the length of the code. Discontinuous boxes are reported
+        before any other error, regardless of which line they are on.
+
+    Args:
+        text (str): The code to check
+
+    Returns:
+        Optional[SyntaxError]: The syntax error, if any.
+    """
+    rows = text.splitlines()
+    line_error = None
+
+    for i, line in enumerate(rows):
+        box_error = _continuous(rows, i)
+
+        if box_error is not None:
+            return box_error
+
+        if line_error is None:
+            line_error = _check_line(line, i)
 
-        if any(char in strip_w for char in "┛┣─├┌┤┡┏┧┪┟┞━┓┐┢└┦┩┗┫┘"):
-            if len(statements) > 0:
-                return SyntaxError(f"Code outside of box at line {i}")
-        else:
-            if len(statements) > 1:
-                return SyntaxError(f"Code outside of box at line {i}")
+    return line_error
@@ -0,0 +1,177 @@
+"""Run BoxScript from the command line.
+
+This module is run by ``python -m boxscript``, which has two commands::
+
+    python -m boxscript run docs/digits.bs --cell 0=5
+    python -m boxscript serve --socket /tmp/boxscript.sock --workers 4
+
+``run`` runs a script once, and with ``--cache`` keeps the parsed script next to it
+like `boxscript.compiled.load_source` does. ``serve`` starts a
+`boxscript.server.Server`, which runs the scripts that are sent to it until it is
+stopped, and then reports the percentiles of the latency of its requests.
+"""
+
+import argparse
+import signal
+import sys
+from typing import Optional
+
+from boxscript.ast import Number, Script
+from boxscript.compiled import load_source
+from boxscript.context import LimitExceeded
+from boxscript.interpreter import Interpreter
+from boxscript.lex import tokenize
+from boxscript.memory import BACKENDS
+from boxscript.program import ENGINES, Program
+from boxscript.server import Server
+
+__all__ = ["main"]
+
+
+def _cell(text: str) -> tuple[Number, Number]:
+    """Reads a cell which is set on the command line, e.g. "0=5"."""
+    try:
+        index, value = text.split("=")
+        return int(index), int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"`{text}` is not a cell, e.g. 0=5") from None
+
+
+def _options(parser: argparse.ArgumentParser) -> None:
+    """Adds the options of how scripts are run."""
+    parser.add_argument("--engine", choices=ENGINES, default="tree")
+    parser.add_argument("--memory", choices=list(BACKENDS), default="sparse")
+    parser.add_argument("--max-steps", type=int, help="the most steps of a run")
+    parser.add_argument("--timeout", type=float, help="the most seconds of a run")
+    parser.add_argument(
+        "--no-optimize",
+        dest="optimize",
+        action="store_false",
+        help="do not optimize scripts before they are run",
+    )
+
+
+def run(args: argparse.Namespace) -> int:
+    """Runs a script once, writing its output to the standard output.
+
+    Args:
+        args (argparse.Namespace): The arguments of the command.
+
+    Returns:
+        int: 1 if the script cannot be read, is not valid or takes too long, and 0
+            otherwise.
+    """
+    try:
+        if args.file == "-":
+            script = Script(tokenize(sys.stdin.read()))
+        elif args.cache:
+            script = load_source(args.file)
+        else:
+            with open(args.file, encoding="utf-8") as file:
+                script = Script(tokenize(file.read()))
+        program = Program(script, args.engine, args.optimize)
+    except (OSError, SyntaxError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    interpreter = Interpreter(
+        args.engine,
+        args.memory,
+        optimize=args.optimize,
+        input=sys.stdin.buffer if args.stdin else None,
+    )
+    try:
+        result = interpreter.execute(
+            program, dict(args.cell), args.max_steps, args.timeout
+        )
+    except LimitExceeded as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 1 if isinstance(result.error, SyntaxError) else 0
+
+
+def serve(args: argparse.Namespace) -> int:
+    """Runs a Server until it is interrupted or terminated.
+
+    Args:
+        args (argparse.Namespace): The arguments of the command.
+
+    Returns:
+        int: 0, once the Server is stopped.
+    """
+    server = Server(
+        args.engine,
+        args.memory,
+        args.workers,
+        args.cache_size,
+        args.optimize,
+        args.max_steps,
+        args.timeout,
+    )
+    address = server.listen(args.socket or ("127.0.0.1", args.port))
+    print(f"listening on {address}", file=sys.stderr)
+
+    def terminate(signum: int, frame: object) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, terminate)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        print(server.latencies, file=sys.stderr)
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Runs a command.
+
+    Args:
+        argv (Optional[list[str]], optional): The command line arguments. Defaults to
+            None, which uses `sys.argv`.
+
+    Returns:
+        int: The exit status of the command.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m boxscript", description=__doc__.splitlines()[0]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_run = commands.add_parser("run", help="run a script once")
+    parser_run.add_argument("file", help="the script, or - to read it from stdin")
+    parser_run.add_argument(
+        "--cell",
+        type=_cell,
+        action="append",
+        default=[],
+        help="set a cell before the run, e.g. 0=5",
+    )
+    parser_run.add_argument(
+        "--stdin", action="store_true", help="read the input of ▯ from stdin"
+    )
+    parser_run.add_argument(
+        "--cache",
+        action="store_true",
+        help="keep the parsed script in a __bscache__ directory next to it",
+    )
+    _options(parser_run)
+    parser_run.set_defaults(function=run)
+
+    parser_serve = commands.add_parser("serve", help="run scripts which are sent")
+    address = parser_serve.add_mutually_exclusive_group(required=True)
+    address.add_argument("--socket", help="listen on this Unix socket")
+    address.add_argument("--port", type=int, help="listen on this port of localhost")
+    parser_serve.add_argument("--workers", type=int, default=4)
+    parser_serve.add_argument(
+        "--cache-size", type=int, default=256, help="the most programs which are kept"
+    )
+    _options(parser_serve)
+    parser_serve.set_defaults(function=serve)
+
+    args = parser.parse_args(argv)
+    if args.command == "run" and args.file == "-" and args.stdin:
+        parser_run.error("the script and the input of ▯ cannot both be read from stdin")
+    return args.function(args)
@@ -0,0 +1,313 @@
+"""Save parsed code, so it does not have to be parsed again.
+
+This module provides a compact binary format for a parsed Script, which is kept in
+``.bsc`` files. Loading a ``.bsc`` file skips the whole front end: the boxes are not
+validated again, and the lines are not scanned, checked or put into RPN order.
+
+Scripts which are loaded with `load_source` are cached in a ``__bscache__`` directory
+next to their source, like Python caches modules in ``__pycache__``. A cached file is
+only used if it has the current VERSION of the format, and was compiled from source
+with the same hash.
+
+Note:
+    Every number of the format is little-endian. A file starts with MAGIC, the VERSION
+    as 2 bytes, and the SHA-256 hash of the source. After it come the number of large
+    literals as 4 bytes, each of them as 4 bytes of length and then the bytes of a
+    signed integer, and then the number of words as 4 bytes, and the words. Words are
+    signed 4-byte integers, which hold the tree of the Script in pre-order:
+
+    - the Script is its number of Boxes, and then every Box
+    - a Box is BOX, its row, its number of blocks, and then every block
+    - a block is IF or EXEC, its number of children, and then every Line or Box
+    - a Line is LINE, its row, whether it is output, and then either 1 expression or 2
+      for an assignment (the location, then the value)
+    - an expression is its number of Tokens, and then every Token, which is the value
+      of its `boxscript.lex.Atom`. NUM and LOAD are followed by their value, or by
+      LARGE and the index of a large literal, if the value does not fit into a word.
+"""
+
+import hashlib
+import os
+import struct
+import sys
+from array import array
+from typing import Callable, Optional
+
+from boxscript.ast import Assign, Box, ExecBlock, IfBlock, Line, Script, expression
+from boxscript.lex import Atom, Node, Token, tokenize
+
+__all__ = [
+    "CACHE_DIRECTORY",
+    "MAGIC",
+    "VERSION",
+    "cache_path",
+    "compile_to_file",
+    "dumps",
+    "load_compiled",
+    "load_source",
+    "loads",
+]
+
+
+MAGIC = b"BSC\x00"
+# this must change whenever the format, or the values of the Atoms, change
+VERSION = 1
+CACHE_DIRECTORY = "__bscache__"
+
+_HEADER = struct.Struct("<4sH32s")
+_COUNT = struct.Struct("<I")
+
+# the kinds of nodes
+_BOX, _IF, _EXEC, _LINE = range(4)
+# a value which does not fit into a word
+_LARGE = -(1 << 31)
+_ATOMS = {atom.value: atom for atom in Atom}
+
+
+def _word(value: int, literals: list[int]) -> list[int]:
+    """Encodes the value of a Token as words."""
+    if type(value) is not int:
+        raise ValueError("Only integer literals can be compiled")
+    if _LARGE < value < -_LARGE:
+        return [value]
+    literals.append(value)
+    return [_LARGE, len(literals) - 1]
+
+
+def _encode(node: Node, words: list[int], literals: list[int]) -> None:
+    """Encodes a Box, block or Line as words."""
+    if isinstance(node, Line):
+        expressions = node.expressions()
+        words += [_LINE, node.line_number, node.output, len(expressions) == 2]
+        for child in expressions:
+            words.append(len(child.children))
+            for token in child.children:
+                words.append(token.type.value)
+                if token.type is Atom.NUM or token.type is Atom.LOAD:
+                    words += _word(token.value, literals)
+    elif isinstance(node, Box):
+        words += [_BOX, node.line_number, len(node.children)]
+        for child in node.children:
+            _encode(child, words, literals)
+    else:
+        words += [_IF if node.condition else _EXEC, len(node.children)]
+        for child in node.children:
+            _encode(child, words, literals)
+
+
+def dumps(script: Script, source: str) -> bytes:
+    """Compiles a parsed Script.
+
+    Args:
+        script (Script): The Script, which must not be optimized.
+        source (str): The source of the Script, whose hash is kept.
+
+    Raises:
+        ValueError: The Script has literals which are not integers.
+
+    Returns:
+        bytes: The compiled Script.
+    """
+    words, literals = [len(script.children)], []
+    for child in script.children:
+        _encode(child, words, literals)
+
+    digest = hashlib.sha256(source.encode()).digest()
+    parts = [_HEADER.pack(MAGIC, VERSION, digest), _COUNT.pack(len(literals))]
+    for literal in literals:
+        data = literal.to_bytes(literal.bit_length() // 8 + 1, "little", signed=True)
+        parts += [_COUNT.pack(len(data)), data]
+
+    code = array("i", words)
+    if sys.byteorder != "little":
+        code.byteswap()
+    parts += [_COUNT.pack(len(code)), code.tobytes()]
+    return b"".join(parts)
+
+
+def _decode(read: Callable[[], int], literals: list[int]) -> Node:
+    """Decodes a Box, block or Line from the words."""
+    kind = read()
+    if kind == _LINE:
+        row, output, assign = read(), read(), read()
+        expressions = []
+        for _ in range(1 + assign):
+            rpn = []
+            for _ in range(read()):
+                atom = _ATOMS[read()]
+                if atom is Atom.NUM or atom is Atom.LOAD:
+                    value = read()
+                    rpn.append(
+                        Token(atom, literals[read()] if value == _LARGE else value)
+                    )
+                else:
+                    rpn.append(Token(atom))
+            expressions.append(expression(rpn))
+
+        line = Line([Assign(expressions)] if assign else expressions, row)
+        line.parsed = True
+        line.output = bool(output)
+        return line
+    if kind == _BOX:
+        row = read()
+        return Box([_decode(read, literals) for _ in range(read())], row)
+
+    block = IfBlock() if kind == _IF else ExecBlock()
+    block.children = [_decode(read, literals) for _ in range(read())]
+    return block
+
+
+def loads(data: bytes, source: Optional[str] = None) -> Script:
+    """Loads a compiled Script.
+
+    Args:
+        data (bytes): The compiled Script.
+        source (Optional[str], optional): The source it should be compiled from.
+            Defaults to None, which loads it whatever its source is.
+
+    Raises:
+        ValueError: The data is not a compiled Script of this version, or it was
+            compiled from a different source.
+
+    Returns:
+        Script: The Script, which is parsed but not optimized.
+    """
+    try:
+        magic, version, digest = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("This is not a compiled BoxScript file")
+        if version != VERSION:
+            raise ValueError(f"Version {version} of .bsc files is not {VERSION}")
+        if source is not None and digest != hashlib.sha256(source.encode()).digest():
+            raise ValueError("The file was compiled from a different source")
+
+        offset = _HEADER.size
+        literals = []
+        (count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        for _ in range(count):
+            (length,) = _COUNT.unpack_from(data, offset)
+            offset += _COUNT.size
+            literal = data[offset : offset + length]
+            literals.append(int.from_bytes(literal, "little", signed=True))
+            offset += length
+
+        (count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        code = array("i", data[offset : offset + 4 * count])
+        if len(code) != count:
+            raise ValueError("The file is truncated")
+        if sys.byteorder != "little":
+            code.byteswap()
+
+        read = iter(code).__next__
+        script = Script()
+        script.children = [_decode(read, literals) for _ in range(read())]
+    except (struct.error, StopIteration, KeyError, IndexError) as e:
+        raise ValueError("The file is not a valid compiled BoxScript file") from e
+    return script
+
+
+def compile_to_file(source_path: str, path: Optional[str] = None) -> str:
+    """Compiles a source file into a .bsc file.
+
+    Args:
+        source_path (str): The source file.
+        path (Optional[str], optional): The compiled file. Defaults to None, which is
+            the cache_path of the source.
+
+    Raises:
+        SyntaxError: The source is not valid.
+
+    Returns:
+        str: The path of the compiled file.
+    """
+    with open(source_path, encoding="utf-8") as file:
+        source = file.read()
+    if path is None:
+        path = cache_path(source_path)
+    _write(path, dumps(Script(tokenize(source)), source))
+    return path
+
+
+def load_compiled(path: str, source: Optional[str] = None) -> Script:
+    """Loads a .bsc file.
+
+    Args:
+        path (str): The compiled file.
+        source (Optional[str], optional): The source it should be compiled from.
+            Defaults to None, which loads it whatever its source is.
+
+    Raises:
+        ValueError: The file is not a compiled Script of this version, or it was
+            compiled from a different source.
+
+    Returns:
+        Script: The Script, which is parsed but not optimized.
+    """
+    with open(path, "rb") as file:
+        return loads(file.read(), source)
+
+
+def cache_path(source_path: str) -> str:
+    """Gets the path of the cached .bsc file of a source file.
+
+    Args:
+        source_path (str): The source file, e.g. "docs/digits.bs".
+
+    Returns:
+        str: The cached file, e.g. "docs/__bscache__/digits.bsc".
+    """
+    directory, name = os.path.split(source_path)
+    name = os.path.splitext(name)[0] + ".bsc"
+    return os.path.join(directory, CACHE_DIRECTORY, name)
+
+
+def load_source(source_path: str) -> Script:
+    """Loads a source file, from its cached .bsc file if it is up to date.
+
+    Note:
+        A source file whose cached file is missing, out of date or of another version
+        is parsed, and the cached file is written again. Errors writing it are
+        ignored, e.g. if the directory is read-only.
+
+    Args:
+        source_path (str): The source file.
+
+    Raises:
+        SyntaxError: The source is not valid.
+
+    Returns:
+        Script: The Script, which is parsed but not optimized.
+    """
+    with open(source_path, encoding="utf-8") as file:
+        source = file.read()
+
+    path = cache_path(source_path)
+    try:
+        return load_compiled(path, source)
+    except (OSError, ValueError):
+        pass
+
+    script = Script(tokenize(source))
+    try:
+        _write(path, dumps(script, source))
+    except OSError:
+        pass
+    return script
+
+
+def _write(path: str, data: bytes) -> None:
+    """Writes a file at once, so a file which is being written is never read."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
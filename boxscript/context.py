@@ -0,0 +1,165 @@
+"""Hold the state of an execution.
+
+This module provides the Context which every Node is executed in. A Context owns the
+memory, the input and the output of one execution, so scripts which are executed in
+different Contexts (e.g. by different interpreters, or in different threads) never
+share state.
+
+A Context also counts the steps of an execution, which are the iterations of every
+conditional box, and stops the execution once it takes too many steps or too long.
+"""
+
+import itertools
+import operator
+import sys
+import time
+from typing import Callable, Iterator, Optional, Union
+
+from boxscript.memory import Mem
+
+__all__ = ["CHECK_INTERVAL", "Context", "LimitExceeded", "no_input", "write_stdout"]
+
+
+# the number of steps between checks of the limits
+CHECK_INTERVAL = 1 << 10
+
+
+def write_stdout(text: str) -> None:
+    """Writes text to the current standard output, like `print` does.
+
+    Args:
+        text (str): The text.
+    """
+    sys.stdout.write(text)
+
+
+def no_input() -> int:
+    """Reads from an input which has already run out.
+
+    Returns:
+        int: -1, which is what `▯` gives at the end of the input.
+    """
+    return -1
+
+
+class LimitExceeded(RuntimeError):
+    """An error for a script which takes more steps or time than it is allowed.
+
+    Attributes:
+        steps (int): The number of steps which were taken.
+        output (Optional[str]): The output so far, if it is kept.
+    """
+
+    def __init__(self, message: str, steps: int, output: Optional[str] = None):
+        """Creates a LimitExceeded error.
+
+        Args:
+            message (str): The error message.
+            steps (int): The number of steps which were taken.
+            output (Optional[str], optional): The output so far. Defaults to None.
+        """
+        super().__init__(message)
+        self.steps = steps
+        self.output = output
+
+    def __reduce__(self) -> tuple:
+        return type(self), (str(self), self.steps, self.output)
+
+
+class Context:
+    """The memory, input and output of one execution of a script.
+
+    The Context also has a `cache` of values which are kept while a script runs, e.g.
+    the loop invariants of `boxscript.analysis`.
+
+    Note:
+        Steps are counted by iterating over the `clock` of the Context, which is shared
+        by every loop. The clock gives CHECK_INTERVAL steps at most before it checks
+        the limits again, so taking a step is no slower than `while True` is.
+    """
+
+    __slots__ = [
+        "memory",
+        "input",
+        "output",
+        "cache",
+        "clock",
+        "chunk",
+        "granted",
+        "taken",
+        "max_steps",
+        "deadline",
+    ]
+
+    def __init__(
+        self,
+        memory: Mem = None,
+        output: Callable[[str], None] = None,
+        input: Callable[[], Union[int, float]] = None,
+    ):
+        """Creates a Context.
+
+        Args:
+            memory (Mem, optional): The memory, which may be any backend from
+                `boxscript.memory`. Defaults to None, which creates a `Mem`.
+            output (Callable[[str], None], optional): A function which is called with
+                the output. Defaults to None, which writes to the standard output.
+            input (Callable[[], Union[int, float]], optional): A function which reads
+                the next input, such as the `read` method of a
+                `boxscript.streams.Source`. Defaults to None, which has no input.
+        """
+        self.memory = Mem() if memory is None else memory
+        self.input = no_input if input is None else input
+        self.output = write_stdout if output is None else output
+        self.cache = {}
+        self.limit()
+
+    @property
+    def steps(self) -> int:
+        """The number of steps which have been taken."""
+        return self.taken + self.granted - operator.length_hint(self.chunk)
+
+    def limit(self, max_steps: int = None, timeout: float = None) -> None:
+        """Starts counting steps from 0 with a new clock, which has new limits.
+
+        Note:
+            Once the clock raises LimitExceeded it stops, so this must be called again
+            before anything else is executed in the Context.
+
+        Args:
+            max_steps (int, optional): The most steps which may be taken. Defaults to
+                None, which is no limit.
+            timeout (float, optional): The most seconds which may be taken, from now.
+                Defaults to None, which is no limit.
+        """
+        self.taken = self.granted = 0
+        self.chunk = itertools.repeat(None, 0)
+        self.max_steps = max_steps
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.clock = itertools.chain.from_iterable(self._chunks())
+
+    def _chunks(self) -> Iterator[Iterator[None]]:
+        """Gives the steps of the clock, a chunk at a time.
+
+        Raises:
+            LimitExceeded: A step would take the execution over a limit.
+
+        Yields:
+            Iterator[None]: The steps which may be taken before the next check.
+        """
+        while True:
+            if self.max_steps is not None and self.taken >= self.max_steps:
+                message = f"Exceeded the limit of {self.max_steps} steps"
+                raise LimitExceeded(message, self.taken)
+            if self.deadline is not None and time.monotonic() > self.deadline:
+                message = f"Exceeded the time limit after {self.taken} steps"
+                raise LimitExceeded(message, self.taken)
+
+            self.granted = CHECK_INTERVAL
+            if self.max_steps is not None:
+                self.granted = min(self.granted, self.max_steps - self.taken)
+            self.chunk = itertools.repeat(None, self.granted)
+            yield self.chunk
+
+            self.taken += self.granted
+            self.granted = 0
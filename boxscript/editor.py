@@ -0,0 +1,224 @@
+"""Check code incrementally, as it is edited.
+
+This module provides a Document, which keeps the rows of some code together with what
+`boxscript.boxes.valid` and `boxscript.lex.tokenize` found on each of them. When rows
+are edited, only those rows and the rows next to them are checked again, so checking
+the code after an edit takes about the same time however long the code is.
+
+Note:
+    The results are always exactly the same as checking the whole code again. Rows are
+    split on "\\n" like `tokenize` does, while `valid` uses `str.splitlines`, so a
+    Document whose code has any other line breaks (e.g. "\\r") checks all of it
+    instead, rather than disagree about which row is which.
+"""
+
+import re
+from typing import Optional
+
+from boxscript.boxes import _check_line, _continuous, valid
+from boxscript.lex import Atom, Token, Tokens, check_line, scan, tokenize
+
+__all__ = ["Document"]
+
+
+# the line breaks of `str.splitlines` besides "\n"
+_BREAKS = re.compile("[\\r\\x0b\\x0c\\x1c\\x1d\\x1e\\x85\\u2028\\u2029]")
+
+_STRUCTURE = {
+    Atom.BOX_START,
+    Atom.BOX_END,
+    Atom.EXEC_START,
+    Atom.EXEC_END,
+    Atom.IF_START,
+    Atom.IF_END,
+}
+
+
+class _Row:
+    """What the front end finds on a single row, which only depends on the row."""
+
+    __slots__ = ["tokens", "first", "depth", "invalid", "bad_line"]
+
+    def __init__(self, text: str):
+        """Scans and checks a row.
+
+        Args:
+            text (str): The row, without its line break.
+        """
+        self.tokens = list(scan(text))
+        self.first = len(self.tokens)  # the index of the first border
+        self.depth = 0  # the change in the number of boxes which are open
+
+        for i, token in enumerate(self.tokens):
+            if token.type in _STRUCTURE:
+                self.first = min(self.first, i)
+                self.depth += token.type is Atom.BOX_START
+                self.depth -= token.type is Atom.BOX_END
+
+        self.invalid = _check_line(text, 0) is not None
+        # only the tokens before the first border are checked, as a line of a box
+        self.bad_line = check_line(self.tokens[: self.first], 0) is not None
+
+
+def _shift(rows: set[int], start: int, end: int, offset: int) -> set[int]:
+    """Forgets the rows which are replaced, and moves the rows after them."""
+    return {row + offset * (row >= end) for row in rows if not start <= row < end}
+
+
+class Document:
+    """Code which is checked again as it is edited."""
+
+    __slots__ = ["rows", "info", "discontinuous", "invalid", "bad_lines", "breaks"]
+
+    def __init__(self, text: str = ""):
+        """Creates a Document, and checks all of its code.
+
+        Args:
+            text (str, optional): The code. Defaults to "".
+        """
+        self.rows = [""]
+        self.info = [_Row("")]
+        self.discontinuous = set()  # rows whose borders do not connect
+        self.invalid = set()  # rows which fail the checks of a single row
+        self.bad_lines = set()  # rows whose first line of code is not valid
+        self.breaks = set()  # rows with line breaks other than "\n"
+        self.edit(0, 1, text)
+
+    @property
+    def text(self) -> str:
+        """The code."""
+        return "\n".join(self.rows)
+
+    def _neighbors(self, i: int) -> list[str]:
+        """Gets rows which have the same neighbors around row i as `valid` sees."""
+        if i:
+            # a last row which is empty is not a row for `str.splitlines`, but it
+            # has no borders either, so it makes no difference below row i
+            return self.rows
+
+        # above the first row is the last row, since `_neighbor` wraps around
+        n = len(self.rows) - (self.rows[-1] == "")
+        if n <= 2:
+            return self.rows[: max(n, 1)]
+        return [self.rows[0], self.rows[1], self.rows[n - 1]]
+
+    def _check(self, i: int) -> None:
+        """Checks whether the borders of a row connect to its neighbors."""
+        if _continuous(self._neighbors(i), i) is None:
+            self.discontinuous.discard(i)
+        else:
+            self.discontinuous.add(i)
+
+    def edit(self, start: int, end: int, text: str) -> None:
+        """Replaces rows of the code, and checks the code again where it changed.
+
+        Note:
+            Rows are counted like `str.split("\\n")` counts them. The text replaces
+            everything from the start of row `start` to the start of row `end`, so it
+            should end with "\\n" unless it is meant to join row `end`. Row `end` may
+            be one past the last row, which is the end of the code.
+
+        Args:
+            start (int): The first row which is replaced.
+            end (int): The row after the last row which is replaced.
+            text (str): The new code.
+
+        Raises:
+            IndexError: The rows are not in the code.
+        """
+        rows = self.rows
+        if not 0 <= start <= end <= len(rows):
+            raise IndexError(f"Rows {start} to {end} are not in the code")
+
+        if end < len(rows):
+            text += rows[end]
+            end += 1
+        elif start == len(rows):
+            start -= 1
+            text = rows[start] + text
+        new = text.split("\n")
+
+        offset = len(new) - (end - start)
+        self.discontinuous = _shift(self.discontinuous, start, end, offset)
+        self.invalid = _shift(self.invalid, start, end, offset)
+        self.bad_lines = _shift(self.bad_lines, start, end, offset)
+        self.breaks = _shift(self.breaks, start, end, offset)
+
+        rows[start:end] = new
+        self.info[start:end] = map(_Row, new)
+
+        for i, row in enumerate(new, start):
+            if self.info[i].invalid:
+                self.invalid.add(i)
+            if self.info[i].bad_line:
+                self.bad_lines.add(i)
+            if _BREAKS.search(row):
+                self.breaks.add(i)
+
+        # the new rows, the rows next to them, and the first row, which is next to the
+        # last row
+        for i in {0, *range(max(start - 1, 0), min(start + len(new) + 1, len(rows)))}:
+            self._check(i)
+
+    def valid(self) -> Optional[SyntaxError]:
+        """Checks whether the code only contains valid boxes, like `valid` does.
+
+        Returns:
+            Optional[SyntaxError]: The syntax error, if any.
+        """
+        if self.breaks:
+            return valid(self.text)
+
+        if self.discontinuous:
+            i = min(self.discontinuous)
+            return _continuous(self._neighbors(i), i)
+        if self.invalid:
+            i = min(self.invalid)
+            return _check_line(self.rows[i], i)
+        return None
+
+    def check(self) -> Optional[SyntaxError]:
+        """Checks the code like `tokenize` does.
+
+        Returns:
+            Optional[SyntaxError]: The error which `tokenize` would raise, if any.
+        """
+        if self.breaks:
+            try:
+                tokenize(self.text)
+            except SyntaxError as e:
+                return e
+            return None
+
+        error = self.valid()
+        if error is not None or not self.bad_lines:
+            return error
+
+        # lines are only checked inside boxes, which depends on every row before them
+        depth = row = 0
+        for i in sorted(self.bad_lines):
+            depth += sum(info.depth for info in self.info[row:i])
+            row = i
+            if depth:
+                info = self.info[i]
+                return check_line(info.tokens[: info.first], i)
+        return None
+
+    def tokenize(self) -> Tokens:
+        """Creates a list of tokens from the code, like `tokenize` does.
+
+        Raises:
+            SyntaxError: The code is not valid BS.
+
+        Returns:
+            Tokens: The list of BS tokens.
+        """
+        error = self.check()
+        if error is not None:
+            raise error
+
+        tokens = Tokens(self.info[0].tokens)
+        for info in self.info[1:]:
+            tokens.append(Token(Atom.NEWLINE))
+            tokens += info.tokens
+        return tokens
@@ -3,50 +3,468 @@
 This module provides the necessary functions/classes to execute BoxScript.
 """
 
-from boxscript.ast import Memory, Script
-from boxscript.boxes import valid
-from boxscript.lex import tokenize
+import collections
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from queue import Queue
+from typing import IO, Callable, Iterable, Iterator, Optional, Union
+
+from boxscript.analysis import analyze
+from boxscript.ast import Number, Script
+from boxscript.context import Context, LimitExceeded
+from boxscript.lex import Token, tokenize
+from boxscript.memory import BACKENDS, Backend
+from boxscript.optimize import optimize_script
+from boxscript.profile import Profile, instrument
+from boxscript.program import CACHE, ENGINES, Program, ProgramCache, batch_program
+from boxscript.streams import Buffer, Sink, Source, to_sink, to_source
+
+
+class Result:
+    """The outcome of running a script."""
+
+    __slots__ = ["output", "memory", "error", "steps"]
+
+    def __init__(
+        self,
+        output: Optional[str],
+        memory: dict[Number, Number],
+        error: Optional[Exception] = None,
+        steps: int = 0,
+    ):
+        """Creates a Result.
+
+        Args:
+            output (Optional[str]): Everything which was output, including error
+                messages, or None if the output was not kept.
+            memory (dict[Number, Number]): Every cell which is not 0 at the end.
+            error (Optional[Exception], optional): The error which stopped the script,
+                if any. Defaults to None.
+            steps (int, optional): The number of steps which were taken. Defaults to 0.
+        """
+        self.output = output
+        self.memory = memory
+        self.error = error
+        self.steps = steps
+
+    def __repr__(self) -> str:
+        """Represents the Result.
+
+        Returns:
+            str: The representation of the Result.
+        """
+        return (
+            f"Result({self.output!r}, {self.memory!r}, {self.error!r}, {self.steps!r})"
+        )
 
 
 class Interpreter:
     """The interface for running the code."""
 
-    __slots__ = ["script", "memory"]
+    __slots__ = [
+        "script",
+        "memory",
+        "engine",
+        "optimize",
+        "sink",
+        "source",
+        "context",
+        "cache",
+    ]
+
+    def __init__(
+        self,
+        engine: str = "tree",
+        memory: Union[str, Backend] = "sparse",
+        output: Union[None, Sink, Callable[[str], None], int, IO] = None,
+        cache: ProgramCache = CACHE,
+        optimize: bool = True,
+        input: Union[None, Source, Iterable[Number], int, IO, Queue] = None,
+    ):
+        """Creates an interpreter. This class should used to execute code.
+
+        Args:
+            engine (str, optional): How to execute the code, which is one of ENGINES.
+                "tree" walks the parsed code, "python" first compiles it into a
+                Python function, and "vm" first lowers it into the instructions of a
+                `boxscript.vm.Machine`. Defaults to "tree".
+            memory (Union[str, Backend], optional): How to store the memory, which is
+                one of the `boxscript.memory.BACKENDS`, or a memory to use, e.g. a
+                `boxscript.memory.MappedMem` of a file. "sparse" keeps every cell in a
+                dict, "dense" keeps consecutive cells in an array, and "mapped" keeps
+                them in anonymous memory. Defaults to "sparse".
+            output (Union[None, Sink, Callable[[str], None], int, IO], optional):
+                Where the output is written, which is anything that
+                `boxscript.streams.to_sink` accepts, e.g. a `boxscript.streams.Buffer`
+                to collect the output of each run. Defaults to None, which writes to the
+                standard output.
+            cache (ProgramCache, optional): The Programs which are kept for scripts
+                that are run or compiled again. Defaults to `boxscript.program.CACHE`,
+                which is shared by every Interpreter.
+            optimize (bool, optional): Whether expressions are optimized with
+                `boxscript.optimize` before they are run. Defaults to True.
+            input (Union[None, Source, Iterable[Number], int, IO, Queue], optional):
+                Where `▯` reads from, which is anything that `boxscript.streams.
+                to_source` accepts, e.g. a generator, a binary file or a queue. Values
+                are only taken when they are read, and a run which does not read them
+                all leaves the rest for the next run. Defaults to None, which has no
+                input, so `▯` always gives -1.
+
+        Note:
+            Every Interpreter executes in its own `boxscript.context.Context`, so
+            different Interpreters can run at the same time, e.g. in threads.
+
+        Raises:
+            ValueError: The engine or the memory backend does not exist.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine `{engine}`")
+        if isinstance(memory, str):
+            if memory not in BACKENDS:
+                raise ValueError(f"Unknown memory backend `{memory}`")
+            memory = BACKENDS[memory]()
 
-    def __init__(self):
-        """Creates an interpreter. This class should used to execute code."""
         self.script = ""
-        self.memory = Memory
+        self.memory = memory
+        self.engine = engine
+        self.sink = to_sink(output)
+        self.source = to_source(input)
+        self.context = Context(self.memory, self.sink.write, self.source.read)
+        self.cache = cache
+        self.optimize = optimize
+
+    def compile(self, script: str) -> Program:
+        """Compiles the script into a Program, or gets it from the cache.
+
+        Args:
+            script (str): The script.
 
-    def run(self, script: str, inputs: dict[int, int] = None) -> None:
+        Raises:
+            SyntaxError: The script is not valid.
+
+        Returns:
+            Program: The Program, which runs on the engine of the Interpreter.
+        """
+        return self.cache.get(script, self.engine, self.optimize)
+
+    def run(
+        self,
+        script: str,
+        inputs: dict[int, int] = None,
+        max_steps: int = None,
+        timeout: float = None,
+    ) -> Result:
         """Runs the script.
 
         Args:
             script (str): The script to run.
             inputs (dict[int, int], optional): A mapping of inputs to use. Defaults to
                 None.
+            max_steps (int, optional): The most iterations of conditional boxes which
+                may be run. Defaults to None, which is no limit.
+            timeout (float, optional): The most seconds the script may run for,
+                including parsing it. Defaults to None, which is no limit.
+
+        Raises:
+            LimitExceeded: The script takes more steps or time than it is allowed.
+
+        Returns:
+            Result: The outcome of the run. Its output is only kept if the sink keeps
+                it, e.g. a `boxscript.streams.Buffer`.
         """
-        global Memory
-        self.memory.reset()
         self.script = script
+        try:
+            return self.execute(
+                lambda context: self.compile(script)(context),
+                inputs,
+                max_steps,
+                timeout,
+            )
+        finally:
+            self.script = ""
+
+    def profile(
+        self,
+        script: str,
+        inputs: dict[int, int] = None,
+        max_steps: int = None,
+        timeout: float = None,
+    ) -> Profile:
+        """Runs the script, and records how often and for how long each part runs.
+
+        Note:
+            The script is parsed again and instrumented, rather than taken from the
+            cache, and always runs on the "tree" engine. Runs which are not profiled
+            are not slowed down at all.
+
+        Args:
+            script (str): The script to run.
+            inputs (dict[int, int], optional): A mapping of inputs to use. Defaults to
+                None.
+            max_steps (int, optional): The most iterations of conditional boxes which
+                may be run. Defaults to None, which is no limit.
+            timeout (float, optional): The most seconds the script may run for,
+                including parsing it. Defaults to None, which is no limit.
+
+        Raises:
+            LimitExceeded: The script takes more steps or time than it is allowed.
+
+        Returns:
+            Profile: The Profile of the run, whose `result` is the outcome of the run.
+        """
+        profile = Profile()
+
+        def program(context: Context) -> None:
+            nonlocal profile
+
+            parsed = Script(tokenize(script))
+            if self.optimize:
+                optimize_script(parsed)
+                analyze(parsed)
+            profile = instrument(parsed)
+            parsed.execute(context)
+
+        self.script = script
+        try:
+            profile.result = self.execute(program, inputs, max_steps, timeout)
+        finally:
+            self.script = ""
+        return profile
+
+    def execute(
+        self,
+        program: Callable[[Context], object],
+        inputs: dict[int, int] = None,
+        max_steps: int = None,
+        timeout: float = None,
+    ) -> Result:
+        """Executes a program in the Context of the interpreter.
+
+        Note:
+            The errors which are used to stop a script are written to the output like
+            `run` does, rather than raised. The time limit is only checked every
+            `boxscript.context.CHECK_INTERVAL` steps, so a single step which takes a
+            long time (e.g. a huge power) is not cut short.
+
+        Args:
+            program (Callable[[Context], object]): The program, which is any function
+                that runs a script in a Context, such as a Program.
+            inputs (dict[int, int], optional): A mapping of inputs to use. Defaults to
+                None.
+            max_steps (int, optional): The most iterations of conditional boxes which
+                may be run. Defaults to None, which is no limit.
+            timeout (float, optional): The most seconds the program may run for.
+                Defaults to None, which is no limit.
+
+        Raises:
+            LimitExceeded: The program takes more steps or time than it is allowed. The
+                output so far is kept in the error, if the sink keeps it.
+
+        Returns:
+            Result: The outcome of the program.
+        """
+        self.memory.reset()
+        self.context.cache.clear()
+        self.context.limit(max_steps, timeout)
+        self.sink.reset()
+        output = self.context.output = self.sink.write
+        self.context.input = self.source.read
+        error = None
 
         if inputs is not None:
             for i in inputs:
                 self.memory[i] = inputs[i]
-        box_error = valid(self.script)
-        if not isinstance(box_error, SyntaxError):
-            try:
-                Script(tokenize(self.script)).execute()
-                print()
-            except (ValueError, ZeroDivisionError):
-                # printing negatives can be used as quick exit, as can division by 0
-                print()
-            except SyntaxError as e:
-                print(e)
-            except RecursionError:
-                # this does not matter, just stop the code
-                print("maximum recursion depth exceeded")
-        else:
-            print(box_error)
+        try:
+            program(self.context)
+            output("\n")
+        except (ValueError, ZeroDivisionError) as e:
+            # printing negatives can be used as quick exit, as can division by 0
+            output("\n")
+            error = e
+        except SyntaxError as e:
+            output(f"{e}\n")
+            error = e
+        except RecursionError as e:
+            # this does not matter, just stop the code
+            output("maximum recursion depth exceeded\n")
+            error = e
+        except LimitExceeded as e:
+            self.sink.flush()
+            e.output = self.sink.getvalue()
+            raise
+        finally:
+            self.sink.flush()
 
-        self.script = ""
+        memory = self.memory.snapshot()
+        return Result(self.sink.getvalue(), memory, error, self.context.steps)
+
+
+# the interpreter, program and limits of a worker process of `run_many`
+_worker = None
+
+
+def _start_worker(
+    tokens: list[Token],
+    engine: str,
+    memory: Union[str, Backend],
+    optimize: bool,
+    limits: tuple[Optional[int], Optional[float]],
+) -> None:
+    """Parses the script in a worker process, once.
+
+    Args:
+        tokens (list[Token]): The tokens of the script.
+        engine (str): The engine to use.
+        memory (Union[str, Backend]): The memory backend to use.
+        optimize (bool): Whether to optimize the script.
+        limits (tuple[Optional[int], Optional[float]]): The most steps and seconds of
+            every run.
+    """
+    global _worker
+
+    program = batch_program(tokens, engine, optimize)
+    _worker = Interpreter(engine, memory, Buffer()), program, limits
+
+
+def run_program(
+    interpreter: Interpreter,
+    program: Callable[[Context], None],
+    inputs: dict[int, int],
+    limits: tuple[Optional[int], Optional[float]],
+) -> Result:
+    """Runs a program of a batch once.
+
+    Args:
+        interpreter (Interpreter): The interpreter, which keeps the output.
+        program (Callable[[Context], None]): The program.
+        inputs (dict[int, int]): The mapping of inputs.
+        limits (tuple[Optional[int], Optional[float]]): The most steps and seconds of
+            the run.
+
+    Returns:
+        Result: The Result of the run, which has any error that stopped it.
+    """
+    try:
+        return interpreter.execute(program, inputs, *limits)
+    except Exception as e:
+        # any other error only stops this run, not the rest of the batch
+        memory = interpreter.memory.snapshot()
+        steps = interpreter.context.steps
+        return Result(interpreter.sink.getvalue(), memory, e, steps)
+
+
+def _run_chunk(chunk: list[dict[int, int]]) -> list[Result]:
+    """Runs the script of a worker process with every mapping of inputs in a chunk.
+
+    Args:
+        chunk (list[dict[int, int]]): The mappings of inputs.
+
+    Returns:
+        list[Result]: The Result of each run.
+    """
+    interpreter, program, limits = _worker
+    return [run_program(interpreter, program, inputs, limits) for inputs in chunk]
+
+
+def run_many(
+    script: str,
+    inputs: Iterable[dict[int, int]],
+    workers: int = None,
+    engine: str = "tree",
+    memory: Union[str, Backend] = "sparse",
+    chunksize: int = 16,
+    optimize: bool = True,
+    max_steps: int = None,
+    timeout: float = None,
+) -> Iterator[Result]:
+    """Runs a script once for every mapping of inputs, in a pool of processes.
+
+    Note:
+        The script is only parsed once in every process. Results are yielded in the
+        order of the inputs, and at most two chunks per process are run or waiting at
+        any time, so the inputs can be a stream of any length. The runs have no input
+        to read with `▯`, which always gives -1.
+
+    Args:
+        script (str): The script to run.
+        inputs (Iterable[dict[int, int]]): The mappings of inputs to use.
+        workers (int, optional): The number of processes. Defaults to None, which is
+            the number of processors.
+        engine (str, optional): The engine to use. Defaults to "tree".
+        memory (Union[str, Backend], optional): The memory backend to use, or a
+            memory which every process gets a copy of, e.g. a `boxscript.memory.
+            MappedMem` of a file which is not writable, so every process shares its
+            pages. Defaults to "sparse".
+        chunksize (int, optional): The number of runs that are sent to a process at
+            once. Defaults to 16.
+        optimize (bool, optional): Whether to optimize the script. Defaults to True.
+        max_steps (int, optional): The most steps of every run. Defaults to None.
+        timeout (float, optional): The most seconds of every run. Defaults to None.
+
+    Raises:
+        ValueError: The engine or the memory backend does not exist. This is raised
+            by the call, before any run.
+
+    Returns:
+        Iterator[Result]: The Result of each run. A run which exceeds a limit has a
+            `boxscript.context.LimitExceeded` error.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine `{engine}`")
+    if isinstance(memory, str) and memory not in BACKENDS:
+        raise ValueError(f"Unknown memory backend `{memory}`")
+
+    workers = workers or os.cpu_count() or 1
+    limits = max_steps, timeout
+    return _run_many(
+        script, inputs, workers, engine, memory, chunksize, optimize, limits
+    )
+
+
+def _run_many(
+    script: str,
+    inputs: Iterable[dict[int, int]],
+    workers: int,
+    engine: str,
+    memory: Union[str, Backend],
+    chunksize: int,
+    optimize: bool,
+    limits: tuple[Optional[int], Optional[float]],
+) -> Iterator[Result]:
+    """Runs a script once for every mapping of inputs, like `run_many` does.
+
+    Args:
+        script (str): The script to run.
+        inputs (Iterable[dict[int, int]]): The mappings of inputs to use.
+        workers (int): The number of processes.
+        engine (str): The engine to use.
+        memory (Union[str, Backend]): The memory backend to use.
+        chunksize (int): The number of runs that are sent to a process at once.
+        optimize (bool): Whether to optimize the script.
+        limits (tuple[Optional[int], Optional[float]]): The most steps and seconds of
+            every run.
+
+    Yields:
+        Result: The Result of each run.
+    """
+    try:
+        tokens = tokenize(script)
+    except SyntaxError as e:
+        for cells in inputs:
+            yield Result(f"{e}\n", {k: v for k, v in cells.items() if v}, e)
+        return
+
+    inputs = iter(inputs)
+    with ProcessPoolExecutor(
+        workers,
+        initializer=_start_worker,
+        initargs=(tokens, engine, memory, optimize, limits),
+    ) as executor:
+        pending = collections.deque()
+        while chunk := list(itertools.islice(inputs, chunksize)):
+            pending.append(executor.submit(_run_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
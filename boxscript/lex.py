@@ -11,13 +11,14 @@ Note:
     Syntax highlighting should be done using regex.
 """
 
-import functools
 import re
 from enum import Enum
+from typing import Iterator, Optional
 
 from boxscript.boxes import valid
+from boxscript.context import Context
 
-__all__ = ["Atom", "Node", "Token", "tokenize"]
+__all__ = ["Atom", "Node", "Token", "Tokens", "check_line", "scan", "tokenize"]
 
 
 Atom = Enum(
@@ -53,6 +54,7 @@ Atom = Enum(
         "DIV",
         "MOD",
         "POW",
+        "LOAD",
     ],
 )
 
@@ -60,9 +62,12 @@ Atom = Enum(
 class Node:
     """A node of BoxScript code. This class is used for type hints."""
 
-    def execute(self) -> int:
+    def execute(self, context: Context) -> int:
         """Executes all children.
 
+        Args:
+            context (Context): The memory and output to execute with.
+
         Raises:
             NotImplementedError: This function is not modified in subclass.
 
@@ -89,108 +94,191 @@ class Token(Node):
         self.value = value
 
     def __str__(self):
-        if self.type == Atom.NUM:
+        if self.type in (Atom.NUM, Atom.LOAD):
             return f"<{self.type}: {self.value}>"
         return f"<{self.type}>"
 
 
-def tokenize(code: str) -> list[Token]:
+_SCANNER = re.compile(
+    r"(?P<num>[▄▀]+)"
+    r"|[╔╚╠]═*[╗╝╣]|║[^\n]*║"  # comments are skipped
+    r"|(?P<symbol>[┌┏├┞┟┣┢┡└┗◇◈▔░▒▓▚▞▕▏▭▯\n▐▌▘▝▗▖▧▨▤▥])"
+)
+_DIGITS = str.maketrans("▄▀", "01")
+_SYMBOLS = {
+    "┌": (Atom.BOX_START, Atom.EXEC_START),
+    "┏": (Atom.BOX_START, Atom.IF_START),
+    "├": (Atom.EXEC_END, Atom.EXEC_START),
+    "┞": (Atom.IF_END, Atom.EXEC_START),
+    "┟": (Atom.EXEC_END, Atom.IF_START),
+    "┣": (Atom.IF_END, Atom.IF_START),
+    "┢": (Atom.EXEC_END, Atom.IF_START),
+    "┡": (Atom.IF_END, Atom.EXEC_START),
+    "└": (Atom.EXEC_END, Atom.BOX_END),
+    "┗": (Atom.IF_END, Atom.BOX_END),
+    "◇": (Atom.MEM,),
+    "◈": (Atom.ASSIGN,),
+    "▔": (Atom.NOT,),
+    "░": (Atom.AND,),
+    "▒": (Atom.XOR,),
+    "▓": (Atom.OR,),
+    "▚": (Atom.L_SHIFT,),
+    "▞": (Atom.R_SHIFT,),
+    "▕": (Atom.L_PAREN,),
+    "▏": (Atom.R_PAREN,),
+    "▭": (Atom.OUT,),
+    "▯": (Atom.IN,),
+    "\n": (Atom.NEWLINE,),
+    "▐": (Atom.ADD,),
+    "▌": (Atom.SUB,),
+    "▘": (Atom.MULT,),
+    "▝": (Atom.DIV,),
+    "▗": (Atom.MOD,),
+    "▖": (Atom.POW,),
+    "▧": (Atom.GT,),
+    "▨": (Atom.LT,),
+    "▤": (Atom.EQ,),
+    "▥": (Atom.NE,),
+}
+
+
+def scan(code: str) -> Iterator[Token]:
+    """Creates tokens from BS code without validating it.
+
+    Note:
+        The code is walked once with a single regex, so this runs in time linear to
+        the length of the code. Characters which are neither numbers, comments, nor
+        symbols (e.g. spaces and most borders) are skipped.
+
+    Args:
+        code (str): The input code.
+
+    Yields:
+        Token: Every BS token in the code, in order.
+    """
+    for m in _SCANNER.finditer(code):
+        if m.lastgroup == "num":
+            digits = m.group()
+            value = int(digits[1:].translate(_DIGITS), 2) if len(digits) > 1 else 0
+            yield Token(Atom.NUM, value if digits[0] == "▀" else -value)
+        elif m.lastgroup == "symbol":
+            for atom in _SYMBOLS[m.group()]:
+                yield Token(atom)
+
+
+class Tokens(list):
+    """A list of Tokens from code which has passed every syntax check.
+
+    `boxscript.ast.Script` trusts a Tokens list and does not check its lines again.
+    """
+
+
+_STRUCTURE = {
+    Atom.BOX_START,
+    Atom.BOX_END,
+    Atom.EXEC_START,
+    Atom.EXEC_END,
+    Atom.IF_START,
+    Atom.IF_END,
+}
+
+
+def check_line(tokens: list[Token], line_number: int) -> Optional[SyntaxError]:
+    """Checks whether the tokens of a single line are valid.
+
+    Args:
+        tokens (list[Token]): The tokens of the line, without the NEWLINE.
+        line_number (int): The line number to use in the error message.
+
+    Returns:
+        Optional[SyntaxError]: The syntax error, if any.
+    """
+    parens = 0
+    unmatched = False
+    expressions = 0
+    outs = 0
+    after_assign = True
+
+    for token in tokens:
+        if token.type is Atom.L_PAREN:
+            parens += 1
+        elif token.type is Atom.R_PAREN:
+            parens -= 1
+            unmatched = unmatched or parens < 0
+
+        if token.type is Atom.ASSIGN:
+            after_assign = True
+        else:
+            # each run of tokens between assignments is one expression
+            expressions += after_assign
+            after_assign = False
+            outs += token.type is Atom.OUT
+
+    # test parentheses
+    if unmatched or parens:
+        return SyntaxError(f"Unmatched parentheses at line {line_number}")
+
+    # test assignments
+    if expressions > 2:
+        return SyntaxError(f"Too many assignment operations on line {line_number}")
+
+    # test outputs
+    if outs > 1:
+        return SyntaxError(f"Too many output operations on line {line_number}")
+    elif outs == 1 and tokens[0].type is not Atom.OUT:
+        return SyntaxError(
+            f"Output operation must be at the beginning of line {line_number}"
+        )
+
+
+def tokenize(code: str) -> Tokens:
     """Creates a list of tokens from BS code.
 
+    Note:
+        This is the whole front end: the boxes are validated once, and every line
+        inside a box is checked as soon as its last token is scanned. The result can
+        be given to `boxscript.ast.Script` without being checked again.
+
     Args:
         code (str): The input code.
 
+    Raises:
+        SyntaxError: The code is not valid BS.
+
     Returns:
-        list[Token]: The list of BS tokens.
+        Tokens: The list of BS tokens.
     """
     box_errors = valid(code)
 
     if isinstance(box_errors, SyntaxError):
         raise box_errors
 
-    tokens = []
-
-    while code:
-        match = functools.partial(re.match, string=code)
-
-        if m := match(r"[▄▀]+"):
-            if len(m.group()) > 1:
-                value = (
-                    int(
-                        "".join(
-                            map(
-                                lambda digit: {"▄": "0", "▀": "1"}[digit], m.group()[1:]
-                            )
-                        ),
-                        2,
-                    )
-                    * (2 * (m.group()[0] == "▀") - 1)
-                )
-                tokens.append(Token(Atom.NUM, value))
-            else:
-                tokens.append(Token(Atom.NUM, 0))
-            code = code[len(m.group()) :]
-        elif m := (match(r"[╔╚╠]═*[╗╝╣]") or match(r"[║][^\n]*[║]")):
-            code = code[len(m.group()) :]
-        else:
-            if code[0] in "┌└├┞┟┏┗┣┢┡":
-                if code[0] in "┌┏":
-                    tokens.append(Token(Atom.BOX_START))
-
-                    if code[0] == "┌":
-                        tokens.append(Token(Atom.EXEC_START))
-                    else:
-                        tokens.append(Token(Atom.IF_START))
-
-                elif code[0] in "├┞┟┣┢┡":
-                    if code[0] in "├┟┢":
-                        tokens.append(Token(Atom.EXEC_END))
-                    else:
-                        tokens.append(Token(Atom.IF_END))
-
-                    if code[0] in "├┞┡":
-                        tokens.append(Token(Atom.EXEC_START))
-                    else:
-                        tokens.append(Token(Atom.IF_START))
-
-                else:
-                    if code[0] == "└":
-                        tokens.append(Token(Atom.EXEC_END))
-                    else:
-                        tokens.append(Token(Atom.IF_END))
-
-                    tokens.append(Token(Atom.BOX_END))
-
-            else:
-                singles = {
-                    "◇": Atom.MEM,
-                    "◈": Atom.ASSIGN,
-                    "▔": Atom.NOT,
-                    "░": Atom.AND,
-                    "▒": Atom.XOR,
-                    "▓": Atom.OR,
-                    "▚": Atom.L_SHIFT,
-                    "▞": Atom.R_SHIFT,
-                    "▕": Atom.L_PAREN,
-                    "▏": Atom.R_PAREN,
-                    "▭": Atom.OUT,
-                    "▯": Atom.IN,
-                    "\n": Atom.NEWLINE,
-                    "▐": Atom.ADD,
-                    "▌": Atom.SUB,
-                    "▘": Atom.MULT,
-                    "▝": Atom.DIV,
-                    "▗": Atom.MOD,
-                    "▖": Atom.POW,
-                    "▧": Atom.GT,
-                    "▨": Atom.LT,
-                    "▤": Atom.EQ,
-                    "▥": Atom.NE,
-                }
-
-                if code[0] in singles:
-                    tokens.append(Token(singles[code[0]]))
-
-            code = code[1:]
+    tokens = Tokens()
+    start = None  # index of the first token of the current line, if in a box
+    row = depth = 0
+
+    for token in scan(code):
+        if token.type is Atom.NEWLINE or token.type in _STRUCTURE:
+            if start is not None:
+                line_error = check_line(tokens[start:], row)
+                if isinstance(line_error, SyntaxError):
+                    raise line_error
+                start = None
+
+            if token.type is Atom.NEWLINE:
+                row += 1
+                if depth:
+                    start = len(tokens) + 1
+            elif token.type is Atom.BOX_START:
+                depth += 1
+            elif token.type is Atom.BOX_END:
+                depth -= 1
+
+        tokens.append(token)
+
+    if start is not None:
+        line_error = check_line(tokens[start:], row)
+        if isinstance(line_error, SyntaxError):
+            raise line_error
 
     return tokens
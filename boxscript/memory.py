@@ -0,0 +1,424 @@
+"""Store the cells of memory.
+
+This module provides the memory backends of BoxScript. A backend is a class whose
+instances can be indexed like a mapping of cells, where every cell defaults to 0, and
+which can be `reset` and copied into a dict with `snapshot`.
+
+`Mem` keeps every cell in a dict, while `DenseMem` keeps the non-negative cells in an
+array, which is much smaller when a script uses many consecutive cells. `MappedMem`
+keeps them in a memory-mapped file instead, which lives outside of the Python heap, and
+can keep its cells between runs.
+"""
+
+import collections
+import itertools
+import mmap
+import os
+from array import array
+from typing import Optional, Union
+
+__all__ = ["BACKENDS", "Backend", "DenseMem", "MappedMem", "Mem"]
+
+
+Number = Union[int, float]
+
+
+class Mem(collections.defaultdict):
+    """A class to store the values in memory."""
+
+    def __init__(self):
+        """Initialize the memory."""
+        super().__init__(int)
+
+    def reset(self) -> None:
+        """Reset the memory."""
+        self.clear()
+
+    def snapshot(self) -> dict[Number, Number]:
+        """Copies the memory.
+
+        Returns:
+            dict[Number, Number]: Every cell which is not 0, and its value.
+        """
+        return {key: value for key, value in self.items() if value}
+
+
+# a cell holding this value has its actual value in the sparse cells, which is how
+# values that do not fit into the array are stored
+_OVERFLOW = -(1 << 63)
+_LIMIT = 1 << 63
+_GROWTH = 1 << 12
+
+
+def _index(key: Number) -> Number:
+    """Turns a float which is a whole number into an int, like dict keys compare.
+
+    Args:
+        key (Number): The key.
+
+    Returns:
+        Number: The key as an int if possible, otherwise the key itself.
+    """
+    if isinstance(key, float) and key.is_integer():
+        return int(key)
+    return key
+
+
+class DenseMem:
+    """A class to store the values in memory, consecutively.
+
+    Cells from 0 up to the size of the array are kept in a growable array of 64-bit
+    integers. Every other cell (negative, huge, or fractional indices), and every value
+    which does not fit into 64 bits, is kept in a dict.
+    """
+
+    __slots__ = ["cells", "sparse", "limit"]
+
+    def __init__(self, limit: int = 1 << 26):
+        """Initialize the memory.
+
+        Args:
+            limit (int, optional): The most cells the array may hold. Defaults to 2**26.
+        """
+        self.limit = limit
+        self.reset()
+
+    def __getitem__(self, key: Number) -> Number:
+        """Get the value of the variable.
+
+        Args:
+            key (Number): The key that is used to access the value.
+
+        Returns:
+            Number: The value at the key. Defaults to 0.
+        """
+        if type(key) is not int:
+            key = _index(key)
+            if type(key) is not int:
+                return self.sparse.get(key, 0)
+        if 0 <= key < len(self.cells):
+            value = self.cells[key]
+            if value != _OVERFLOW:
+                return value
+        return self.sparse.get(key, 0)
+
+    def __setitem__(self, key: Number, value: Number) -> None:
+        """Set the value of the variable.
+
+        Args:
+            key (Number): The key that is used to set the value.
+            value (Number): The value that is set at the key.
+        """
+        cells = self.cells
+        if (
+            type(key) is int
+            and 0 <= key < len(cells)
+            and type(value) is int
+            and _OVERFLOW < value < _LIMIT
+            and cells[key] != _OVERFLOW
+        ):
+            cells[key] = value
+            return
+
+        key = _index(key)
+        if type(key) is not int:
+            self.sparse[key] = value
+            return
+
+        if key >= len(cells):
+            self.grow(key)
+        if 0 <= key < len(cells):
+            if cells[key] == _OVERFLOW:
+                del self.sparse[key]
+            if type(value) is int and _OVERFLOW < value < _LIMIT:
+                cells[key] = value
+            else:
+                cells[key] = _OVERFLOW
+                self.sparse[key] = value
+        else:
+            self.sparse[key] = value
+
+    def grow(self, key: int) -> None:
+        """Grows the array to hold a key, if the key is close enough to the end of it.
+
+        Args:
+            key (int): The key.
+        """
+        cells = self.cells
+        start = len(cells)
+        if key >= min(2 * start + _GROWTH, self.limit):
+            return
+
+        end = min(max(key + 1, 2 * start), self.limit)
+        cells.extend(itertools.repeat(0, end - start))
+
+        # cells which were sparse before the array grew are moved into it
+        for moved in [k for k in self.sparse if type(k) is int and start <= k < end]:
+            self[moved] = self.sparse.pop(moved)
+
+    def reset(self) -> None:
+        """Reset the memory."""
+        self.cells = array("q")
+        self.sparse = {}
+
+    def snapshot(self) -> dict[Number, Number]:
+        """Copies the memory.
+
+        Returns:
+            dict[Number, Number]: Every cell which is not 0, and its value.
+        """
+        cells = {
+            key: value
+            for key, value in enumerate(self.cells)
+            if value and value != _OVERFLOW
+        }
+        cells.update((key, value) for key, value in self.sparse.items() if value)
+        return cells
+
+
+# the formats of the signed integers of every width, in bytes
+_FORMATS = {1: "b", 2: "h", 4: "i", 8: "q"}
+# the number of bytes of the file which are compared with zeros at once
+_CHUNK = 1 << 16
+# the number of cells which the range of cells that are used is extended by at once
+_BLOCK = 1 << 8
+
+
+class MappedMem:
+    """A class to store the values in memory, in a memory-mapped file.
+
+    Cells from 0 up to the size are kept in the file, as signed integers of a fixed
+    width in the byte order of the machine. Like in `DenseMem`, every other cell, and
+    every value which does not fit into the width, is kept in a dict.
+
+    A file which does not exist is created as a sparse file of zeros, so it only takes
+    up space on disk where cells are written. The cells of a file are kept when the
+    memory is reset, so they last between runs and processes, while values which were
+    kept in the dict do not. Without a file, the cells are kept in anonymous memory,
+    and are all 0 again after a reset.
+
+    The range of cells which may not be 0 is tracked, so a reset or a snapshot only
+    touches the cells which were used, rather than the whole map. The cells of a file
+    are scanned for it once, when it is mapped.
+
+    Note:
+        A MappedMem which is not writable maps its file copy-on-write. Its cells can
+        still be changed, but the changes are never written to the file, and the pages
+        which are not changed are shared with every process that maps the same file,
+        such as the workers of `boxscript.interpreter.run_many`. A snapshot only
+        has the cells which another process writes to a shared file after it is
+        mapped if this memory used them too.
+    """
+
+    __slots__ = [
+        "path",
+        "size",
+        "width",
+        "writable",
+        "map",
+        "cells",
+        "sparse",
+        "low",
+        "start",
+        "end",
+    ]
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        size: int = 1 << 20,
+        width: int = 8,
+        writable: bool = True,
+    ):
+        """Maps the memory.
+
+        Args:
+            path (Optional[str], optional): The file. Defaults to None, which keeps the
+                cells in anonymous memory.
+            size (int, optional): The number of cells in the file. Defaults to 2**20.
+            width (int, optional): The bytes of each cell, which is 1, 2, 4 or 8.
+                Defaults to 8.
+            writable (bool, optional): Whether changes are written to the file.
+                Defaults to True.
+
+        Raises:
+            ValueError: The size or width is not supported, or a file which is not
+                writable is smaller than the size.
+        """
+        if width not in _FORMATS:
+            raise ValueError(f"Unsupported width `{width}`")
+        if size < 1:
+            raise ValueError("A MappedMem needs at least 1 cell")
+
+        self.path = path
+        self.size = size
+        self.width = width
+        self.writable = writable
+        # a cell holding this value has its actual value in the sparse cells
+        self.low = -(1 << (8 * width - 1))
+        self.sparse = {}
+        self.open()
+
+    def open(self) -> None:
+        """Maps the file, which is created if it does not exist.
+
+        Raises:
+            ValueError: A file which is not writable is smaller than the size.
+        """
+        length = self.size * self.width
+        if self.path is None:
+            self.map = mmap.mmap(-1, length)
+        else:
+            flags = os.O_RDWR | os.O_CREAT if self.writable else os.O_RDONLY
+            fd = os.open(self.path, flags | getattr(os, "O_BINARY", 0), 0o666)
+            try:
+                if os.fstat(fd).st_size < length:
+                    if not self.writable:
+                        raise ValueError(
+                            f"`{self.path}` has fewer than {self.size} cells"
+                        )
+                    # the file is extended with a hole, which reads as zeros
+                    os.ftruncate(fd, length)
+                access = mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_COPY
+                self.map = mmap.mmap(fd, length, access=access)
+            finally:
+                os.close(fd)
+        self.cells = memoryview(self.map).cast(_FORMATS[self.width])
+
+        # the cells from start up to end are the only ones which may not be 0
+        self.start, self.end = self.size, 0
+        if self.path is not None:
+            zeros = bytes(_CHUNK)
+            step = _CHUNK // self.width
+            for start in range(0, self.size, step):
+                data = self.map[start * self.width : (start + step) * self.width]
+                if data != zeros[: len(data)]:
+                    self._use(start)
+                    self._use(min(start + step, self.size) - 1)
+
+    def _use(self, key: int) -> None:
+        """Extends the range of cells which may not be 0 to a cell.
+
+        Note:
+            The range is extended to the whole block of the cell, so cells which are
+            set one after another only take the slow path once per block.
+
+        Args:
+            key (int): The cell, which is in the map.
+        """
+        if key < self.start:
+            self.start = key - key % _BLOCK
+        if key >= self.end:
+            self.end = min(key - key % _BLOCK + _BLOCK, self.size)
+
+    def __getitem__(self, key: Number) -> Number:
+        """Get the value of the variable.
+
+        Args:
+            key (Number): The key that is used to access the value.
+
+        Returns:
+            Number: The value at the key. Defaults to 0.
+        """
+        if type(key) is not int:
+            key = _index(key)
+            if type(key) is not int:
+                return self.sparse.get(key, 0)
+        if 0 <= key < self.size:
+            value = self.cells[key]
+            if value != self.low:
+                return value
+        return self.sparse.get(key, 0)
+
+    def __setitem__(self, key: Number, value: Number) -> None:
+        """Set the value of the variable.
+
+        Args:
+            key (Number): The key that is used to set the value.
+            value (Number): The value that is set at the key.
+        """
+        cells = self.cells
+        # cells outside the range which is used are set below, which extends it
+        if (
+            type(key) is int
+            and self.start <= key < self.end
+            and type(value) is int
+            and self.low < value < -self.low
+            and cells[key] != self.low
+        ):
+            cells[key] = value
+            return
+
+        key = _index(key)
+        if type(key) is not int or not 0 <= key < self.size:
+            self.sparse[key] = value
+            return
+
+        self._use(key)
+        self.sparse.pop(key, None)
+        if type(value) is int and self.low < value < -self.low:
+            cells[key] = value
+        else:
+            cells[key] = self.low
+            self.sparse[key] = value
+
+    def reset(self) -> None:
+        """Reset the memory, which keeps the cells of a file."""
+        if self.path is None:
+            if self.start < self.end:
+                width = self.width
+                self.map[self.start * width : self.end * width] = bytes(
+                    (self.end - self.start) * width
+                )
+            self.start, self.end = self.size, 0
+        else:
+            for key in self.sparse:
+                if type(key) is int and 0 <= key < self.size:
+                    self.cells[key] = 0
+        self.sparse = {}
+
+    def snapshot(self) -> dict[Number, Number]:
+        """Copies the memory.
+
+        Note:
+            Only the cells which were used are read, and only the parts of them which
+            are not all zeros are read cell by cell.
+
+        Returns:
+            dict[Number, Number]: Every cell which is not 0, and its value.
+        """
+        cells = {}
+        zeros = bytes(_CHUNK)
+        step = _CHUNK // self.width
+        for start in range(self.start, self.end, step):
+            stop = min(start + step, self.end)
+            data = self.map[start * self.width : stop * self.width]
+            if data != zeros[: len(data)]:
+                values = self.cells[start:stop]
+                cells.update(
+                    (key, value)
+                    for key, value in enumerate(values, start)
+                    if value and value != self.low
+                )
+        cells.update((key, value) for key, value in self.sparse.items() if value)
+        return cells
+
+    def flush(self) -> None:
+        """Writes the changed cells to the file."""
+        if self.path is not None and self.writable:
+            self.map.flush()
+
+    def close(self) -> None:
+        """Unmaps the memory, after which it cannot be used until it is opened again."""
+        self.cells.release()
+        self.map.close()
+
+    def __reduce__(self) -> tuple:
+        """Maps the same file again, e.g. in a worker process."""
+        return type(self), (self.path, self.size, self.width, self.writable)
+
+
+# any of the memory backends
+Backend = Union[Mem, DenseMem, MappedMem]
+
+BACKENDS = {"sparse": Mem, "dense": DenseMem, "mapped": MappedMem}
@@ -0,0 +1,114 @@
+"""Optimize parsed code.
+
+This module provides a peephole pass over the RPN expressions of a Script, which
+removes work that would otherwise be redone every time an expression is evaluated:
+
+- operations on constants are computed once (e.g. `▀▀▚▀▀` becomes `▀▀▄▄`)
+- multiplying or raising to the power of 1 is removed
+- reading a cell at a constant index becomes a single Atom.LOAD
+
+Note:
+    The optimized expression always gives the same value as the original, and raises
+    the same errors. Operations which raise errors, or whose result would be infinite
+    or larger than MAX_BITS, are left to be computed when the expression is evaluated.
+"""
+
+import math
+from typing import Optional
+
+from boxscript.ast import (
+    BINARY,
+    Line,
+    Number,
+    Script,
+    compile_rpn,
+)
+from boxscript.lex import Atom, Token
+
+__all__ = ["MAX_BITS", "optimize", "optimize_script"]
+
+
+MAX_BITS = 1 << 12
+
+
+def _fold(kind: Atom, operands: tuple[Number, ...]) -> Optional[Token]:
+    """Computes an operation on constants, if that is safe to do in advance.
+
+    Args:
+        kind (Atom): The operation.
+        operands (tuple[Number, ...]): The constants, from left to right.
+
+    Returns:
+        Optional[Token]: A NUM Token with the result, if any.
+    """
+    try:
+        if kind is Atom.NOT:
+            (a,) = operands
+            value = ~a
+        else:
+            a, b = operands
+            # these could take a long time to compute, and create huge numbers
+            if kind is Atom.L_SHIFT and b > MAX_BITS:
+                return None
+            if kind is Atom.POW and type(a) is int and type(b) is int:
+                if b > 0 and a.bit_length() * b > MAX_BITS:
+                    return None
+            value = BINARY[kind](a, b)
+    except (ArithmeticError, TypeError, ValueError):
+        return None
+
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, int) and value.bit_length() > MAX_BITS:
+        return None
+    return Token(Atom.NUM, value)
+
+
+def optimize(rpn: list[Token]) -> list[Token]:
+    """Optimizes an RPN expression.
+
+    Args:
+        rpn (list[Token]): The expression in RPN order.
+
+    Returns:
+        list[Token]: The optimized expression in RPN order. The Tokens of the original
+            expression are not changed.
+    """
+    result = []
+    for token in rpn:
+        kind = token.type
+        top = result[-1] if result and result[-1].type is Atom.NUM else None
+
+        if top is not None and kind is Atom.MEM:
+            result[-1] = Token(Atom.LOAD, top.value)
+            continue
+        if top is not None and kind is Atom.NOT:
+            folded = _fold(kind, (top.value,))
+            if folded is not None:
+                result[-1] = folded
+                continue
+        elif top is not None and kind in BINARY:
+            if len(result) > 1 and result[-2].type is Atom.NUM:
+                folded = _fold(kind, (result[-2].value, top.value))
+                if folded is not None:
+                    result[-2:] = [folded]
+                    continue
+            elif kind in (Atom.MULT, Atom.POW) and type(top.value) is int:
+                # x * 1 and x ** 1 are exactly x, whether x is an int or a float
+                if top.value == 1:
+                    result.pop()
+                    continue
+        result.append(token)
+    return result
+
+
+def optimize_script(script: Script) -> None:
+    """Optimizes every expression of a Script.
+
+    Args:
+        script (Script): The Script.
+    """
+    for line in Line.get_lines(script):
+        for expression in line.expressions():
+            expression.children = optimize(expression.children)
+            expression.function = compile_rpn(expression.children)
@@ -0,0 +1,228 @@
+"""Profile the execution of a script.
+
+This module provides a Profile, which records how often and for how long every Line of
+a Script runs, how many iterations every Box runs, and how often every Expression is
+evaluated, all by the row of the script they are on.
+
+Profiling is done on a separate copy of the Script, whose Nodes are wrapped in probes
+by `instrument`. Scripts which are not profiled run exactly as they did before, so
+they do not pay for any of it.
+
+Note:
+    Profiles are always recorded with the "tree" engine, since the "python" engine does
+    not keep the Nodes it runs.
+"""
+
+import json
+import time
+from typing import Callable, Optional
+
+from boxscript.ast import Box, Container, Expression, Line, Number, Script
+from boxscript.context import Context
+from boxscript.lex import Node
+
+__all__ = ["Profile", "instrument"]
+
+
+class _Probe(Node):
+    """A Node which counts the executions of another Node, and times them."""
+
+    __slots__ = ["node", "stats", "condition"]
+
+    def __init__(self, node: Node, stats: list):
+        """Creates a Probe.
+
+        Args:
+            node (Node): The Node.
+            stats (list): The number of executions and the seconds they took, which
+                are added to.
+        """
+        self.node = node
+        self.stats = stats
+        self.condition = getattr(node, "condition", False)
+
+    def execute(self, context: Context) -> int:
+        """Executes the Node.
+
+        Args:
+            context (Context): The memory and output to execute with.
+
+        Returns:
+            int: The outcome of the Node.
+        """
+        stats = self.stats
+        stats[0] += 1
+        start = time.perf_counter()
+        try:
+            return self.node.execute(context)
+        finally:
+            stats[1] += time.perf_counter() - start
+
+
+class _Counter(Node):
+    """A Node which counts the iterations of a Box, by wrapping its first block."""
+
+    __slots__ = ["node", "stats", "condition"]
+
+    def __init__(self, node: Node, stats: list):
+        """Creates a Counter.
+
+        Args:
+            node (Node): The first block of the Box.
+            stats (list): The stats of the Box, whose third item is its iterations.
+        """
+        self.node = node
+        self.stats = stats
+        self.condition = node.condition
+
+    def execute(self, context: Context) -> int:
+        """Executes the block.
+
+        Args:
+            context (Context): The memory and output to execute with.
+
+        Returns:
+            int: The value of the block.
+        """
+        self.stats[2] += 1
+        return self.node.execute(context)
+
+
+def _count(function: Callable, stats: list) -> Callable:
+    """Wraps the function of an Expression, so its evaluations are counted."""
+
+    def evaluate(*args: object) -> Number:
+        stats[0] += 1
+        return function(*args)
+
+    return evaluate
+
+
+class Profile:
+    """The hit counts and times of every part of a script, by row."""
+
+    __slots__ = ["lines", "boxes", "expressions", "result"]
+
+    def __init__(self):
+        """Creates an empty Profile."""
+        self.lines = {}  # row: [hits, seconds]
+        self.boxes = {}  # row: [entries, seconds, iterations]
+        self.expressions = {}  # (row, part): [evaluations]
+        self.result = None
+
+    def as_dict(self) -> dict[str, list[dict]]:
+        """Gets the Profile as plain data.
+
+        Returns:
+            dict[str, list[dict]]: The lines, boxes and expressions, by row.
+        """
+        return {
+            "lines": [
+                {"row": row, "hits": hits, "seconds": seconds}
+                for row, (hits, seconds) in sorted(self.lines.items())
+            ],
+            "boxes": [
+                {
+                    "row": row,
+                    "entries": entries,
+                    "iterations": iterations,
+                    "seconds": seconds,
+                }
+                for row, (entries, seconds, iterations) in sorted(self.boxes.items())
+            ],
+            "expressions": [
+                {"row": row, "part": part, "evaluations": evaluations}
+                for (row, part), (evaluations,) in sorted(self.expressions.items())
+            ],
+        }
+
+    def to_json(self, **kwargs: object) -> str:
+        """Writes the Profile as JSON.
+
+        Args:
+            **kwargs (object): Options for `json.dumps`, such as `indent`.
+
+        Returns:
+            str: The JSON.
+        """
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def table(self, limit: Optional[int] = None) -> str:
+        """Writes the Profile as a table of lines, slowest first.
+
+        Args:
+            limit (Optional[int], optional): The most lines to include. Defaults to
+                None, which includes every line.
+
+        Returns:
+            str: The table.
+        """
+        evaluations = {}
+        for (row, _), (count,) in self.expressions.items():
+            evaluations[row] = evaluations.get(row, 0) + count
+
+        total = sum(seconds for _, seconds in self.lines.values()) or 1.0
+        rows = sorted(self.lines.items(), key=lambda item: -item[1][1])[:limit]
+
+        table = [
+            f"{'row':>6} {'hits':>10} {'evals':>10} {'seconds':>10} "
+            f"{'per hit us':>11} {'%':>6}"
+        ]
+        for row, (hits, seconds) in rows:
+            table.append(
+                f"{row:>6} {hits:>10} {evaluations.get(row, 0):>10} "
+                f"{seconds:>10.6f} {seconds / max(hits, 1) * 1e6:>11.3f} "
+                f"{seconds / total * 100:>6.1f}"
+            )
+
+        table.append("")
+        table.append(f"{'box':>6} {'entries':>10} {'iterations':>10} {'seconds':>10}")
+        for row, (entries, seconds, iterations) in sorted(self.boxes.items()):
+            table.append(f"{row:>6} {entries:>10} {iterations:>10} {seconds:>10.6f}")
+        return "\n".join(table)
+
+    def __str__(self) -> str:
+        return self.table()
+
+
+def _instrument(node: Container, profile: Profile) -> None:
+    """Wraps the children of a Node, and every Node under them, in probes."""
+    for i, child in enumerate(node.children):
+        if isinstance(child, Line):
+            stats = profile.lines.setdefault(child.line_number, [0, 0.0])
+            node.children[i] = _Probe(child, stats)
+
+            expressions = child.expressions()
+            parts = ["location", "value"] if len(expressions) == 2 else ["value"]
+            for part, expression in zip(parts, expressions):
+                key = child.line_number, part
+                counts = profile.expressions.setdefault(key, [0])
+                expression.function = _count(expression.function, counts)
+        elif isinstance(child, Box):
+            _instrument(child, profile)
+            stats = profile.boxes.setdefault(child.line_number, [0, 0.0, 0])
+            node.children[i] = _Probe(child, stats)
+
+            # every iteration starts with the first block
+            if child.children:
+                child.children[0] = _Counter(child.children[0], stats)
+        elif isinstance(child, Container) and not isinstance(child, Expression):
+            _instrument(child, profile)
+
+
+def instrument(script: Script) -> Profile:
+    """Wraps every Line, Box and Expression of a Script in probes.
+
+    Note:
+        The Script is changed in place, so it should be a copy which is only used for
+        profiling.
+
+    Args:
+        script (Script): The Script.
+
+    Returns:
+        Profile: The Profile which the probes record into.
+    """
+    profile = Profile()
+    _instrument(script, profile)
+    return profile
@@ -0,0 +1,214 @@
+"""Keep parsed code.
+
+This module provides Programs, which are scripts that have been parsed (and compiled,
+depending on the engine) once so they can be run any number of times, and a cache of
+Programs which are looked up by their source code.
+"""
+
+import collections
+import hashlib
+import threading
+from typing import Callable, Optional, Union
+
+from boxscript.analysis import analyze
+from boxscript.ast import Script
+from boxscript.context import Context
+from boxscript.lex import Token, tokenize
+from boxscript.optimize import optimize_script
+from boxscript.transpile import compile_script
+from boxscript.vm import compile_vm
+
+__all__ = ["CACHE", "ENGINES", "Program", "ProgramCache", "batch_program"]
+
+
+ENGINES = ("tree", "python", "vm")
+
+
+class Program:
+    """A parsed script, which can be run any number of times.
+
+    Note:
+        A Program cannot be changed once it is created, and it keeps no state while it
+        runs, so it may be run by different interpreters at the same time.
+    """
+
+    __slots__ = ["engine", "function", "report"]
+
+    def __init__(
+        self,
+        tokens: Union[list[Token], Script],
+        engine: str = "tree",
+        optimize: bool = True,
+    ):
+        """Parses a script into a Program.
+
+        Args:
+            tokens (Union[list[Token], Script]): The tokens of the script, or the
+                Script itself, e.g. from `boxscript.compiled.load_source`. A Script is
+                used by the Program, and must not be used by anything else.
+            engine (str, optional): How to execute the script, which is one of ENGINES.
+                Defaults to "tree".
+            optimize (bool, optional): Whether the expressions of the script are
+                optimized with `boxscript.optimize`, and its loops with
+                `boxscript.analysis`. Defaults to True.
+
+        Raises:
+            ValueError: The engine does not exist.
+            SyntaxError: A line is not valid.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine `{engine}`")
+
+        script = tokens if isinstance(tokens, Script) else Script(tokens)
+        report = None
+        if optimize:
+            optimize_script(script)
+            report = analyze(script)
+
+        if engine == "python":
+            function = compile_script(script)
+        elif engine == "vm":
+            function = compile_vm(script)
+        else:
+            function = script.execute
+
+        object.__setattr__(self, "engine", engine)
+        object.__setattr__(self, "function", function)
+        object.__setattr__(self, "report", report)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        """Prevents the Program from being changed.
+
+        Args:
+            name (str): The name of the attribute.
+            value (object): The value of the attribute.
+
+        Raises:
+            AttributeError: Always.
+        """
+        raise AttributeError(f"Cannot set `{name}` of a Program")
+
+    def __call__(self, context: Context) -> None:
+        """Runs the Program.
+
+        Args:
+            context (Context): The memory and output to execute with.
+        """
+        self.function(context)
+
+
+class ProgramCache:
+    """A cache of the Programs which were used least recently."""
+
+    __slots__ = ["size", "hits", "misses", "programs", "lock"]
+
+    def __init__(self, size: int = 256):
+        """Creates an empty ProgramCache.
+
+        Args:
+            size (int, optional): The most Programs which are kept. Defaults to 256.
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.programs = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Gets the number of Programs which are kept.
+
+        Returns:
+            int: The number of Programs.
+        """
+        return len(self.programs)
+
+    def get(self, source: str, engine: str = "tree", optimize: bool = True) -> Program:
+        """Gets the Program of a script, which is parsed if it is not kept.
+
+        Args:
+            source (str): The script.
+            engine (str, optional): The engine of the Program. Defaults to "tree".
+            optimize (bool, optional): Whether the Program is optimized. Defaults to
+                True.
+
+        Raises:
+            ValueError: The engine does not exist.
+            SyntaxError: The script is not valid.
+
+        Returns:
+            Program: The Program.
+        """
+        digest = hashlib.sha256(source.encode()).digest()
+        program = self.find(digest, engine, optimize)
+        if program is not None:
+            return program
+
+        # parsing is done without the lock, so other scripts are not held up
+        program = Program(tokenize(source), engine, optimize)
+
+        with self.lock:
+            self.programs[digest, engine, optimize] = program
+            while len(self.programs) > self.size:
+                self.programs.popitem(last=False)
+        return program
+
+    def find(
+        self, digest: bytes, engine: str = "tree", optimize: bool = True
+    ) -> Optional[Program]:
+        """Gets a kept Program by the hash of its script, without parsing anything.
+
+        Args:
+            digest (bytes): The SHA-256 hash of the script.
+            engine (str, optional): The engine of the Program. Defaults to "tree".
+            optimize (bool, optional): Whether the Program is optimized. Defaults to
+                True.
+
+        Returns:
+            Optional[Program]: The Program, or None if it is not kept.
+        """
+        key = digest, engine, optimize
+
+        with self.lock:
+            program = self.programs.get(key)
+            if program is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.programs.move_to_end(key)
+            return program
+
+    def clear(self) -> None:
+        """Removes every Program, and resets the counters."""
+        with self.lock:
+            self.programs.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def batch_program(
+    tokens: list[Token], engine: str, optimize: bool
+) -> Callable[[Context], None]:
+    """Parses a script for a batch of runs.
+
+    Args:
+        tokens (list[Token]): The tokens of the script.
+        engine (str): The engine to use.
+        optimize (bool): Whether to optimize the script.
+
+    Returns:
+        Callable[[Context], None]: The Program, or a function which raises the error
+            that stopped the script from being parsed.
+    """
+    try:
+        return Program(tokens, engine, optimize)
+    except Exception as e:
+        # every run stops with the same error, rather than the whole batch
+        error = e
+
+        def program(context: Context) -> None:
+            raise error
+
+        return program
+
+
+CACHE = ProgramCache()
@@ -0,0 +1,463 @@
+"""Serve scripts to other processes.
+
+This module provides a Server, which keeps the Programs of the scripts it is sent in a
+bounded `boxscript.program.ProgramCache` and runs them on a pool of worker threads, so
+a request pays neither for starting Python nor for parsing a script it has seen before.
+
+Requests and responses are JSON objects, one on each line, over a Unix socket or a TCP
+socket on localhost. A request has:
+
+- "source", the script, or "hash", the SHA-256 hash (in hex) of a script which was
+  sent before
+- "inputs", the cells to set before the run, e.g. ``{"0": 3}``
+- "input", the values which `▯` reads
+- "max_steps" and "timeout", which can only lower the limits of the Server
+- "id", which is sent back
+
+Everything but the script is optional. A response has the "id" and "hash" of the
+request, and the "output", "memory", "steps" and "error" of the run, where the error is
+None or the name and message of the error which stopped the script. A response to a
+hash which is not kept (any more) has "missing" set, and the request should be sent
+again with its source. A request ``{"stats": true}`` is answered with the percentiles
+of the latency of recent requests, and the hits and misses of the cache.
+
+Note:
+    Scripts run in threads, so a Server answers many short requests at once but does
+    not run long scripts in parallel. Several Servers can be started for that.
+"""
+
+import hashlib
+import json
+import math
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union
+
+from boxscript.ast import Number
+from boxscript.interpreter import Interpreter, run_program
+from boxscript.memory import BACKENDS
+from boxscript.program import ENGINES, ProgramCache
+from boxscript.streams import Buffer, to_source
+
+__all__ = ["PERCENTILES", "Client", "Latencies", "Server"]
+
+
+PERCENTILES = (50, 90, 99)
+
+Address = Union[str, tuple[str, int]]
+
+
+def _number(text: str) -> Number:
+    """Reads the index of a cell, which is a key of a JSON object."""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _error(error: Optional[BaseException]) -> Optional[str]:
+    """Describes an error for a response."""
+    if error is None:
+        return None
+    return f"{type(error).__name__}: {error}"
+
+
+class Latencies:
+    """The latencies of the most recent requests."""
+
+    __slots__ = ["samples", "count", "lock"]
+
+    def __init__(self, size: int = 10000):
+        """Creates an empty record of latencies.
+
+        Args:
+            size (int, optional): The most latencies which are kept. Defaults to 10000.
+        """
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Records the latency of a request.
+
+        Args:
+            seconds (float): The latency.
+        """
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+
+    def percentiles(self) -> dict[str, float]:
+        """Gets the PERCENTILES of the kept latencies, and the largest of them.
+
+        Returns:
+            dict[str, float]: The latencies in milliseconds, e.g. "p50" and "max".
+                They are all 0 if no request was made.
+        """
+        with self.lock:
+            samples = sorted(self.samples)
+        if not samples:
+            samples = [0.0]
+
+        latencies = {}
+        for percentile in PERCENTILES:
+            rank = max(math.ceil(percentile / 100 * len(samples)), 1)
+            latencies[f"p{percentile}"] = samples[rank - 1] * 1000
+        latencies["max"] = samples[-1] * 1000
+        return latencies
+
+    def __str__(self) -> str:
+        latencies = ", ".join(
+            f"{name} {value:.3f} ms" for name, value in self.percentiles().items()
+        )
+        return f"{self.count} requests, {latencies}"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Answers the requests of one connection, in order."""
+
+    def setup(self) -> None:
+        """Sends every response at once, rather than waiting for more to send."""
+        super().setup()
+        if self.connection.family != socket.AF_UNIX:
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
+
+    def handle(self) -> None:
+        """Answers each line which is received."""
+        for line in self.rfile:
+            if line.strip():
+                self.wfile.write(self.server.boxscript.handle(line))
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Server:
+    """Runs the scripts which are sent to it, keeping their Programs."""
+
+    __slots__ = [
+        "engine",
+        "memory",
+        "optimize",
+        "limits",
+        "cache",
+        "workers",
+        "pool",
+        "local",
+        "latencies",
+        "listener",
+    ]
+
+    def __init__(
+        self,
+        engine: str = "tree",
+        memory: str = "sparse",
+        workers: int = 4,
+        cache_size: int = 256,
+        optimize: bool = True,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        """Creates a Server, which does not listen yet.
+
+        Args:
+            engine (str, optional): The engine every script runs on. Defaults to
+                "tree".
+            memory (str, optional): The memory backend of every worker. Defaults to
+                "sparse".
+            workers (int, optional): The number of worker threads. Defaults to 4.
+            cache_size (int, optional): The most Programs which are kept. Defaults to
+                256.
+            optimize (bool, optional): Whether scripts are optimized. Defaults to True.
+            max_steps (Optional[int], optional): The most steps of every run. Defaults
+                to None, which is no limit.
+            timeout (Optional[float], optional): The most seconds of every run.
+                Defaults to None, which is no limit.
+
+        Raises:
+            ValueError: The engine or the memory backend does not exist.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine `{engine}`")
+        if memory not in BACKENDS:
+            raise ValueError(f"Unknown memory backend `{memory}`")
+
+        self.engine = engine
+        self.memory = memory
+        self.optimize = optimize
+        self.limits = max_steps, timeout
+        self.cache = ProgramCache(cache_size)
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="boxscript")
+        self.local = threading.local()
+        self.latencies = Latencies()
+        self.listener = None
+
+    def handle(self, line: bytes) -> bytes:
+        """Answers a request.
+
+        Args:
+            line (bytes): The request, as a line of JSON.
+
+        Returns:
+            bytes: The response, as a line of JSON.
+        """
+        start = time.perf_counter()
+        request = {}
+        try:
+            request = json.loads(line)
+            if request.get("stats"):
+                return (json.dumps(self.stats()) + "\n").encode()
+            response = self.pool.submit(self.run, request).result()
+        except Exception as e:
+            # a bad request only fails itself, not the connection
+            response = {"error": _error(e)}
+            if isinstance(request, dict):
+                response["id"] = request.get("id")
+
+        data = (json.dumps(response) + "\n").encode()
+        self.latencies.record(time.perf_counter() - start)
+        return data
+
+    def run(self, request: dict) -> dict:
+        """Runs the script of a request, in a worker thread.
+
+        Args:
+            request (dict): The request.
+
+        Raises:
+            ValueError: The request has neither a source nor a valid hash.
+
+        Returns:
+            dict: The response.
+        """
+        inputs = {_number(k): v for k, v in request.get("inputs", {}).items()}
+        response = {"id": request.get("id")}
+
+        source = request.get("source")
+        if source is not None:
+            digest = hashlib.sha256(source.encode()).digest()
+            response["hash"] = digest.hex()
+            try:
+                program = self.cache.get(source, self.engine, self.optimize)
+            except SyntaxError as e:
+                memory = {k: v for k, v in inputs.items() if v}
+                return {**response, **self._result(f"{e}\n", memory, 0, e)}
+        elif "hash" in request:
+            response["hash"] = request["hash"]
+            program = self.cache.find(
+                bytes.fromhex(request["hash"]), self.engine, self.optimize
+            )
+            if program is None:
+                error = LookupError(f"No program has the hash {request['hash']}")
+                return {**response, "missing": True, "error": _error(error)}
+        else:
+            raise ValueError("A request needs a source or a hash")
+
+        interpreter = self._interpreter()
+        interpreter.source = to_source(request.get("input"))
+        result = run_program(interpreter, program, inputs, self._limits(request))
+        return {
+            **response,
+            **self._result(result.output, result.memory, result.steps, result.error),
+        }
+
+    def stats(self) -> dict:
+        """Gets the latencies of recent requests, and how the cache is used.
+
+        Returns:
+            dict: The number of requests, their "latency" percentiles in milliseconds,
+                and the "cache".
+        """
+        cache = self.cache
+        return {
+            "requests": self.latencies.count,
+            "latency": self.latencies.percentiles(),
+            "cache": {"size": len(cache), "hits": cache.hits, "misses": cache.misses},
+            "workers": self.workers,
+        }
+
+    def listen(self, address: Address) -> Address:
+        """Starts listening for connections.
+
+        Note:
+            A Unix socket which is left over from a Server that is not running any
+            more is replaced.
+
+        Args:
+            address (Address): The path of a Unix socket, or the host and port of a
+                TCP socket, e.g. ("127.0.0.1", 0) for any free port.
+
+        Returns:
+            Address: The address which is listened on.
+        """
+        if isinstance(address, str):
+            _remove_stale(address)
+            self.listener = _UnixServer(address, _Handler)
+        else:
+            self.listener = _TCPServer(address, _Handler)
+        self.listener.boxscript = self
+        return self.listener.server_address
+
+    def serve_forever(self) -> None:
+        """Answers requests until `shutdown` is called from another thread."""
+        self.listener.serve_forever()
+
+    def shutdown(self) -> None:
+        """Stops `serve_forever`."""
+        self.listener.shutdown()
+
+    def close(self) -> None:
+        """Stops listening, and waits for the running scripts to finish."""
+        if self.listener is not None:
+            self.listener.server_close()
+            if self.listener.address_family == socket.AF_UNIX:
+                _remove_stale(self.listener.server_address)
+        self.pool.shutdown()
+
+    def _interpreter(self) -> Interpreter:
+        """Gets the Interpreter of the current worker thread."""
+        interpreter = getattr(self.local, "interpreter", None)
+        if interpreter is None:
+            interpreter = Interpreter(self.engine, self.memory, Buffer())
+            self.local.interpreter = interpreter
+        return interpreter
+
+    def _limits(self, request: dict) -> tuple[Optional[int], Optional[float]]:
+        """Gets the limits of a request, which are at most those of the Server."""
+        limits = []
+        for limit, name in zip(self.limits, ("max_steps", "timeout")):
+            value = request.get(name)
+            if value is None or (limit is not None and limit < value):
+                value = limit
+            limits.append(value)
+        return limits[0], limits[1]
+
+    @staticmethod
+    def _result(
+        output: str, memory: dict, steps: int, error: Optional[BaseException]
+    ) -> dict:
+        """Gets the part of a response which is the outcome of a run."""
+        return {
+            "output": output,
+            "memory": {str(k): v for k, v in memory.items()},
+            "steps": steps,
+            "error": _error(error),
+        }
+
+
+def _remove_stale(path: str) -> None:
+    """Removes a Unix socket, unless a Server is listening on it.
+
+    Raises:
+        OSError: A Server is listening on the socket.
+    """
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX) as probe:
+        try:
+            probe.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(path)
+            return
+    raise OSError(f"A server is already listening on {path}")
+
+
+class Client:
+    """A connection to a Server."""
+
+    __slots__ = ["socket", "file", "hashes"]
+
+    def __init__(self, address: Address, timeout: Optional[float] = None):
+        """Connects to a Server.
+
+        Args:
+            address (Address): The path of the Unix socket of the Server, or the host
+                and port of its TCP socket.
+            timeout (Optional[float], optional): The most seconds to wait for each
+                response. Defaults to None, which waits forever.
+        """
+        if isinstance(address, str):
+            self.socket = socket.socket(socket.AF_UNIX)
+        else:
+            self.socket = socket.socket(socket.AF_INET)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
+        self.socket.settimeout(timeout)
+        self.socket.connect(address)
+        self.file = self.socket.makefile("rb")
+        self.hashes = {}  # the hash of each script which was sent
+
+    def request(self, request: dict) -> dict:
+        """Sends a request, and waits for its response.
+
+        Args:
+            request (dict): The request.
+
+        Raises:
+            ConnectionError: The Server closed the connection.
+
+        Returns:
+            dict: The response.
+        """
+        self.socket.sendall((json.dumps(request) + "\n").encode())
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection")
+        return json.loads(line)
+
+    def run(
+        self, source: str, inputs: Optional[dict[Number, Number]] = None, **options
+    ) -> dict:
+        """Runs a script, which is only sent if the Server does not keep it.
+
+        Args:
+            source (str): The script.
+            inputs (Optional[dict[Number, Number]], optional): The cells to set.
+                Defaults to None.
+            **options: The other items of the request, e.g. "input" or "max_steps".
+
+        Returns:
+            dict: The response.
+        """
+        request = {**options, "inputs": {str(k): v for k, v in (inputs or {}).items()}}
+
+        digest = self.hashes.get(source)
+        if digest is not None:
+            response = self.request({**request, "hash": digest})
+            if not response.get("missing"):
+                return response
+
+        response = self.request({**request, "source": source})
+        if "hash" in response:
+            self.hashes[source] = response["hash"]
+        return response
+
+    def stats(self) -> dict:
+        """Gets the statistics of the Server.
+
+        Returns:
+            dict: The statistics, as `Server.stats` gives them.
+        """
+        return self.request({"stats": True})
+
+    def close(self) -> None:
+        """Closes the connection."""
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
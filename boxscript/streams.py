@@ -0,0 +1,351 @@
+"""Send output to where it is needed, and take input from where it comes from.
+
+This module provides the output sinks of BoxScript. A sink is written to one piece of
+text at a time, and is reset before and flushed after every run of a script.
+
+`Buffer` keeps the output in memory, `FileSink` writes it to a file or a file descriptor
+in chunks, `CallbackSink` passes every piece to a function, and `StdoutSink` writes it
+to the standard output.
+
+It also provides the input sources which `▯` reads from, one value at a time. Values
+are only taken from a source when they are read, so inputs of any size are streamed.
+`IterableSource` takes them from an iterable, `FileSource` reads the bytes of a file
+or a file descriptor in chunks, and `QueueSource` waits for them on a queue. Once a
+source runs out, every read gives EOF.
+"""
+
+import codecs
+import functools
+import io
+import os
+import sys
+from queue import Empty, Queue
+from typing import IO, Callable, Iterable, Optional, Union
+
+from boxscript.ast import Number
+
+__all__ = [
+    "EOF",
+    "Buffer",
+    "CallbackSink",
+    "FileSink",
+    "FileSource",
+    "IterableSource",
+    "QueueSource",
+    "Sink",
+    "Source",
+    "StdoutSink",
+    "to_sink",
+    "to_source",
+]
+
+
+# the value which is read once the input runs out
+EOF = -1
+
+
+class Sink:
+    """Where the output of a script is written to."""
+
+    __slots__ = []
+
+    def write(self, text: str) -> None:
+        """Writes output.
+
+        Args:
+            text (str): The output.
+
+        Raises:
+            NotImplementedError: This function is not modified in subclass.
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Writes any output which has been held back."""
+
+    def reset(self) -> None:
+        """Forgets the output of the previous run."""
+
+    def getvalue(self) -> Optional[str]:
+        """Gets the output of the current run.
+
+        Returns:
+            Optional[str]: The output, or None if it is not kept.
+        """
+        return None
+
+
+class Buffer(Sink):
+    """A Sink which keeps the output in memory."""
+
+    __slots__ = ["chunks"]
+
+    def __init__(self):
+        """Creates an empty Buffer."""
+        self.chunks = []
+
+    def write(self, text: str) -> None:
+        """Writes output.
+
+        Args:
+            text (str): The output.
+        """
+        self.chunks.append(text)
+
+    def reset(self) -> None:
+        """Forgets the output of the previous run."""
+        self.chunks.clear()
+
+    def getvalue(self) -> str:
+        """Gets the output of the current run.
+
+        Returns:
+            str: The output.
+        """
+        return "".join(self.chunks)
+
+
+class CallbackSink(Sink):
+    """A Sink which passes the output to a function as soon as it is written."""
+
+    __slots__ = ["write"]
+
+    def __init__(self, callback: Callable[[str], None]):
+        """Creates a CallbackSink.
+
+        Args:
+            callback (Callable[[str], None]): The function, which becomes the `write`
+                method of the Sink.
+        """
+        self.write = callback
+
+
+class StdoutSink(Sink):
+    """A Sink which writes the output to the standard output, like `print` does."""
+
+    __slots__ = ["write"]
+
+    def __init__(self):
+        """Creates a StdoutSink."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Writes to whatever the standard output is now, e.g. once it is redirected."""
+        self.write = sys.stdout.write
+
+
+class FileSink(Sink):
+    """A Sink which writes the output to a file in chunks."""
+
+    __slots__ = ["file", "size", "binary", "chunks", "length"]
+
+    def __init__(self, file: Union[int, IO], size: int = 1 << 13):
+        """Creates a FileSink.
+
+        Args:
+            file (Union[int, IO]): A file descriptor, or a text or binary file which is
+                open for writing. Binary files and file descriptors are written UTF-8.
+                A file is binary if it is a raw or buffered file, or if it is not a
+                text file or a `codecs` writer and its mode has "b". Any other file
+                is written strings.
+            size (int, optional): The number of characters which are held back before
+                they are written. Defaults to 8192.
+        """
+        self.file = file
+        self.size = size
+        if isinstance(file, (io.RawIOBase, io.BufferedIOBase)):
+            self.binary = True
+        elif isinstance(
+            file, (io.TextIOBase, codecs.StreamWriter, codecs.StreamReaderWriter)
+        ):
+            # the mode of a codecs writer is that of the binary file it encodes to
+            self.binary = False
+        else:
+            mode = getattr(file, "mode", None)
+            self.binary = isinstance(mode, str) and "b" in mode
+        self.chunks = []
+        self.length = 0
+
+    def write(self, text: str) -> None:
+        """Writes output.
+
+        Args:
+            text (str): The output.
+        """
+        self.chunks.append(text)
+        self.length += len(text)
+        if self.length >= self.size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes any output which has been held back."""
+        text = "".join(self.chunks)
+        self.chunks.clear()
+        self.length = 0
+
+        if isinstance(self.file, int):
+            data = memoryview(text.encode())
+            while data:
+                data = data[os.write(self.file, data) :]
+        else:
+            self.file.write(text.encode() if self.binary else text)
+            # an object which only has `write` is written to all the same
+            if hasattr(self.file, "flush"):
+                self.file.flush()
+
+
+def to_sink(output: Union[None, Sink, Callable[[str], None], int, IO]) -> Sink:
+    """Turns anything which output can be written to into a Sink.
+
+    Args:
+        output (Union[None, Sink, Callable[[str], None], int, IO]): A Sink, a function
+            which is called with the output, or a file (descriptor). None writes to the
+            standard output without holding anything back, like `print` does.
+
+    Returns:
+        Sink: The Sink.
+    """
+    if output is None:
+        return StdoutSink()
+    if isinstance(output, Sink):
+        return output
+    if isinstance(output, int) or hasattr(output, "write"):
+        return FileSink(output)
+    return CallbackSink(output)
+
+
+class Source:
+    """Where the input of a script is read from."""
+
+    __slots__ = []
+
+    def read(self) -> Number:
+        """Reads the next value.
+
+        Returns:
+            Number: The value, or EOF if there are no more values.
+
+        Raises:
+            NotImplementedError: This function is not modified in subclass.
+        """
+        raise NotImplementedError
+
+
+class IterableSource(Source):
+    """A Source which takes the values from an iterable, as they are read."""
+
+    __slots__ = ["read"]
+
+    def __init__(self, values: Iterable[Number] = ()):
+        """Creates an IterableSource.
+
+        Args:
+            values (Iterable[Number], optional): The values, e.g. a generator. Defaults
+                to no values.
+        """
+        self.read = functools.partial(next, iter(values), EOF)
+
+
+class FileSource(Source):
+    """A Source which reads a file in chunks, and gives one byte at a time."""
+
+    __slots__ = ["file", "size", "values"]
+
+    def __init__(self, file: Union[int, IO], size: int = 1 << 13):
+        """Creates a FileSource.
+
+        Args:
+            file (Union[int, IO]): A file descriptor, or a binary or text file which is
+                open for reading. Each byte of a binary file (or file descriptor) is a
+                value from 0 to 255, and each character of a text file is its code.
+            size (int, optional): The number of bytes (or characters) which are read
+                at once. Defaults to 8192.
+        """
+        self.file = file
+        self.size = size
+        self.values = iter(())
+
+    def read(self) -> Number:
+        """Reads the next value.
+
+        Returns:
+            Number: The value, or EOF if the end of the file is reached.
+        """
+        value = next(self.values, None)
+        if value is not None:
+            return value
+
+        if isinstance(self.file, int):
+            data = os.read(self.file, self.size)
+        else:
+            data = self.file.read(self.size)
+        if not data:
+            return EOF
+
+        self.values = map(ord, data) if isinstance(data, str) else iter(data)
+        return next(self.values)
+
+
+class QueueSource(Source):
+    """A Source which waits for the values to be put on a queue."""
+
+    __slots__ = ["queue", "sentinel", "timeout", "done"]
+
+    def __init__(
+        self, queue: Queue, sentinel: object = None, timeout: Optional[float] = None
+    ):
+        """Creates a QueueSource.
+
+        Args:
+            queue (Queue): The queue, e.g. a `queue.Queue` or a
+                `multiprocessing.Queue`.
+            sentinel (object, optional): The item which is put on the queue after the
+                last value. Defaults to None.
+            timeout (float, optional): The most seconds to wait for each value, after
+                which the input is over. Defaults to None, which waits forever.
+        """
+        self.queue = queue
+        self.sentinel = sentinel
+        self.timeout = timeout
+        self.done = False
+
+    def read(self) -> Number:
+        """Reads the next value, once it is put on the queue.
+
+        Returns:
+            Number: The value, or EOF once the sentinel is taken or a wait times out.
+        """
+        if self.done:
+            return EOF
+
+        try:
+            value = self.queue.get(timeout=self.timeout)
+        except Empty:
+            value = self.sentinel
+
+        if value is self.sentinel:
+            self.done = True
+            return EOF
+        return value
+
+
+def to_source(input: Union[None, Source, Iterable[Number], int, IO, Queue]) -> Source:
+    """Turns anything which input can be read from into a Source.
+
+    Args:
+        input (Union[None, Source, Iterable[Number], int, IO, Queue]): A Source, a
+            file (descriptor), a queue, or an iterable of values. None has no input at
+            all.
+
+    Returns:
+        Source: The Source.
+    """
+    if input is None:
+        return IterableSource()
+    if isinstance(input, Source):
+        return input
+    if isinstance(input, int) or hasattr(input, "read"):
+        return FileSource(input)
+    if hasattr(input, "get_nowait"):
+        return QueueSource(input)
+    return IterableSource(input)
@@ -0,0 +1,297 @@
+"""Transpile a parsed script into Python.
+
+This module provides the necessary functions to translate a `boxscript.ast.Script` into
+Python source code, and to compile that source into a single Python function.
+
+Boxes become `for` loops over the clock of the Context, failing conditionals become
+`break`, and every Line becomes one or more statements, so running the function does
+not walk the tree at all. The Invariants of a `boxscript.analysis.Loop` are kept in
+local variables.
+
+Note:
+    Anything which cannot be translated (e.g. boxes nested too deeply for Python, or
+    expressions which would pop from an empty stack) is kept as a Node, and is executed
+    by the function through the Node's own `execute` method.
+"""
+
+from typing import Callable
+
+from boxscript.analysis import Loop
+from boxscript.ast import (
+    MAX_OPERATIONS,
+    Box,
+    Container,
+    Expression,
+    Line,
+    Node,
+    Number,
+    Script,
+)
+from boxscript.context import Context
+from boxscript.lex import Atom
+
+__all__ = ["compile_script", "transpile"]
+
+
+MAX_NESTING = 16
+
+OPERATORS = {
+    Atom.L_SHIFT: "({} << {})",
+    Atom.R_SHIFT: "({} >> {})",
+    Atom.ADD: "({} + {})",
+    Atom.SUB: "({} - {})",
+    Atom.MULT: "({} * {})",
+    Atom.DIV: "({} / {})",
+    Atom.POW: "({} ** {})",
+    Atom.MOD: "({} % {})",
+    Atom.AND: "({} & {})",
+    Atom.OR: "({} | {})",
+    Atom.XOR: "({} ^ {})",
+    Atom.LT: "(1 if {} < {} else 0)",
+    Atom.GT: "(1 if {} > {} else 0)",
+    Atom.EQ: "(1 if {} == {} else 0)",
+    Atom.NE: "(1 if {} != {} else 0)",
+}
+
+
+def _constant(value: Number) -> str:
+    """Writes a constant so it can be an operand of any operator.
+
+    Args:
+        value (Number): The constant.
+
+    Returns:
+        str: The constant, which is in parentheses if it is negative.
+    """
+    text = repr(value)
+    return f"({text})" if text.startswith("-") else text
+
+
+class _Transpiler:
+    """Builds the source code of a script, one Node at a time."""
+
+    def __init__(self):
+        """Creates a Transpiler with no source code."""
+        self.source = [
+            "def main(context):",
+            "    memory, output, clock = context.memory, context.output, context.clock",
+            "    read = context.input",
+            "    r = 0",
+        ]
+        self.nodes = []
+        self.invariants = {}  # the local variable of each Invariant
+        self.inlined = set()  # the Invariants which are translated
+
+    def emit(self, indent: int, statement: str) -> None:
+        """Adds a statement to the source code.
+
+        Args:
+            indent (int): The level of indentation of the statement.
+            statement (str): The statement.
+        """
+        self.source.append("    " * indent + statement)
+
+    def fallback(self, node: Node) -> str:
+        """Keeps a Node which is executed rather than translated.
+
+        Args:
+            node (Node): The Node.
+
+        Returns:
+            str: An expression which executes the Node.
+        """
+        return f"{self.node(node)}.execute(context)"
+
+    def node(self, node: Node) -> str:
+        """Keeps a Node which is used by the source code.
+
+        Args:
+            node (Node): The Node.
+
+        Returns:
+            str: An expression whose value is the Node.
+        """
+        self.nodes.append(node)
+        return f"nodes[{len(self.nodes) - 1}]"
+
+    def expression(self, expression: Expression) -> tuple[str, bool]:
+        """Translates an Expression.
+
+        Args:
+            expression (Expression): The Expression.
+
+        Returns:
+            tuple[str, bool]: A Python expression with the same value, evaluated in
+                the same order, and whether it is a constant.
+        """
+        rpn = expression.children
+        if sum(child.type is not Atom.NUM for child in rpn) > MAX_OPERATIONS:
+            return self.fallback(expression), False
+
+        stack = [("0", True)]
+        for child in rpn:
+            if child.type is Atom.NUM:
+                stack.append((_constant(child.value), True))
+            elif child.type is Atom.MEM:
+                stack.append((f"memory[{stack.pop()[0]}]", False))
+            elif child.type is Atom.LOAD:
+                stack.append((f"memory[{_constant(child.value)}]", False))
+            elif child.type is Atom.IN:
+                stack.append(("read()", False))
+            elif child.type is Atom.NOT:
+                stack.append((f"(~{stack.pop()[0]})", False))
+            elif child.type in OPERATORS:
+                if len(stack) < 2:
+                    return self.fallback(expression), False
+                right, _ = stack.pop()
+                left, _ = stack.pop()
+                stack.append((OPERATORS[child.type].format(left, right), False))
+
+        result, constant = stack.pop()
+
+        # values left on the stack are never used, but may still raise errors
+        unused = [source for source, constant in stack if not constant]
+        if unused:
+            result, constant = f"({', '.join(unused)}, {result})[-1]", False
+
+        name = self.invariants.get(expression)
+        if name is not None:
+            self.inlined.add(expression)
+            result = f"({name} if {name} is not None else ({name} := {result}))"
+        return result, constant
+
+    def line(self, line: Line, indent: int) -> None:
+        """Translates a Line, which sets `r` to its value.
+
+        Args:
+            line (Line): The Line.
+            indent (int): The level of indentation of the Line.
+        """
+        node = line.children[0]
+
+        if isinstance(node, Expression):
+            self.emit(indent, f"r = {self.expression(node)[0]}")
+        elif isinstance(node, Container) and all(
+            isinstance(child, Expression) for child in node.children
+        ):
+            # an assignment, in which the location must be evaluated first
+            (loc, constant), (value, _) = map(self.expression, node.children)
+            if not constant:
+                self.emit(indent, f"k = {loc}")
+                loc = "k"
+            self.emit(indent, f"r = {value}")
+            self.emit(indent, f"memory[{loc}] = round(r)")
+        else:
+            self.emit(indent, f"r = {self.fallback(node)}")
+
+        if line.output:
+            self.emit(indent, "output(chr(round(r)))")
+
+    def block(self, block: Container, indent: int, nesting: int) -> None:
+        """Translates a Block, which sets `r` to the value of its last child.
+
+        Args:
+            block (Container): The Block.
+            indent (int): The level of indentation of the Block.
+            nesting (int): The number of boxes the Block is in.
+        """
+        start = len(self.source)
+
+        for child in block.children:
+            if isinstance(child, Line):
+                self.line(child, indent)
+            elif isinstance(child, Box):
+                self.box(child, indent, nesting + 1)
+            else:
+                self.emit(indent, f"r = {self.fallback(child)}")
+
+        if block.condition and len(self.source) == start:
+            self.emit(indent, "r = 0")
+
+    def box(self, box: Box, indent: int, nesting: int) -> None:
+        """Translates a Box, which sets `r` to 0 if it stops on its first pass.
+
+        Args:
+            box (Box): The Box.
+            indent (int): The level of indentation of the Box.
+            nesting (int): The number of boxes the Box is in, including itself.
+        """
+        if nesting > MAX_NESTING:
+            self.emit(indent, f"r = {self.fallback(box)}")
+            return
+
+        if not box.conditional:
+            for child in box.children:
+                self.block(child, indent, nesting)
+            self.emit(indent, "r = 1")
+            return
+
+        invariants = box.invariants if isinstance(box, Loop) else []
+        start = len(self.source)
+        for invariant in invariants:
+            self.invariants[invariant] = f"h{len(self.invariants)}"
+            self.emit(indent, f"{self.invariants[invariant]} = None")
+
+        # whether the Box has finished a pass, which boxes in it do not change
+        finished = f"b{nesting}"
+        self.emit(indent, f"{finished} = 0")
+        self.emit(indent, "for _ in clock:")
+        for child in box.children:
+            self.block(child, indent + 1, nesting)
+            if child.condition:
+                self.emit(indent + 1, "if not r:")
+                self.emit(indent + 2, "break")
+        self.emit(indent + 1, f"{finished} = 1")
+        self.emit(indent, f"r = {finished}")
+
+        if not self.inlined.issuperset(invariants):
+            # the others are executed as Nodes, which keep their values in the Context
+            self.source.insert(
+                start, "    " * indent + f"{self.node(box)}.reset(context)"
+            )
+
+    def script(self, script: Script) -> None:
+        """Translates a Script.
+
+        Args:
+            script (Script): The Script.
+        """
+        for child in script.children:
+            if isinstance(child, Box):
+                self.box(child, 1, 1)
+            else:
+                self.emit(1, self.fallback(child))
+
+
+def transpile(script: Script) -> str:
+    """Translates a Script into Python source code.
+
+    Args:
+        script (Script): The Script.
+
+    Returns:
+        str: The source code of a function `main(context)`, which runs the Script in
+            a `boxscript.context.Context`. Nodes which are not translated are looked
+            up in a global `nodes`.
+    """
+    transpiler = _Transpiler()
+    transpiler.script(script)
+    return "\n".join(transpiler.source)
+
+
+def compile_script(script: Script) -> Callable[[Context], None]:
+    """Compiles a Script into a single Python function.
+
+    Args:
+        script (Script): The Script.
+
+    Returns:
+        Callable[[Context], None]: A function which runs the Script in a Context.
+    """
+    transpiler = _Transpiler()
+    transpiler.script(script)
+
+    namespace = {"nodes": transpiler.nodes}
+    code = compile("\n".join(transpiler.source), "<boxscript>", "exec")
+    exec(code, namespace)  # noqa: S102
+    return namespace["main"]
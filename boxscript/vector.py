@@ -0,0 +1,508 @@
+"""Run a script for a whole batch of inputs at once, with NumPy.
+
+This module provides an engine which runs a script once for many mappings of inputs,
+which are its lanes. Every cell of memory is a NumPy array with an int64 for each lane,
+every operator is a single operation on those arrays, and a conditional box runs until
+the conditional of every lane has failed, with a mask of the lanes which are still in
+it. Each lane keeps its own output and its own count of steps.
+
+Note:
+    NumPy is only imported once a batch is run, and is not needed by anything else.
+    The Results are always the same as those of `boxscript.interpreter.run_many`:
+    scripts which cannot be run on every lane at once (e.g. because they read cells at
+    indices which are computed, or use `▖` or `▯`) are run on the scalar engine
+    instead, and so is every lane which would raise an error, or leave the range where
+    int64 and float arithmetic give the same values as Python's.
+"""
+
+import itertools
+import time
+from types import ModuleType
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Union
+
+from boxscript.ast import Assign, Box, Container, Line, Number, Script
+from boxscript.interpreter import Interpreter, Result, run_program
+from boxscript.lex import Atom, Token, tokenize
+from boxscript.optimize import optimize_script
+from boxscript.program import batch_program
+from boxscript.streams import Buffer
+
+if TYPE_CHECKING:
+    import numpy
+
+__all__ = ["LANES", "run_lanes", "vectorizable"]
+
+
+LANES = 1 << 10
+
+# ints stay below this in every lane, so no operation on them can overflow an int64
+_LIMIT = 1 << 62
+# ints up to this are converted to floats exactly
+_EXACT = 1 << 53
+# the first use of a cell by a lane which has not used it
+_NEVER = 1 << 62
+# the most outputs which are kept as arrays, before they are turned into text
+_EVENTS = 1 << 8
+
+# operations which are not run on every lane at once
+_SCALAR = {Atom.MEM, Atom.IN, Atom.POW}
+# operations which raise TypeError for floats, or treat their signs differently
+_INTEGRAL = {Atom.MOD, Atom.AND, Atom.OR, Atom.XOR, Atom.L_SHIFT, Atom.R_SHIFT}
+_COMPARISONS = {Atom.LT, Atom.GT, Atom.EQ, Atom.NE}
+
+
+def _numpy() -> ModuleType:
+    """Imports NumPy.
+
+    Raises:
+        ImportError: NumPy is not installed.
+
+    Returns:
+        ModuleType: The numpy module.
+    """
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Running lanes requires NumPy, which is not installed") from e
+    return numpy
+
+
+def vectorizable(script: Script) -> bool:
+    """Checks whether an optimized Script can be run on every lane at once.
+
+    Args:
+        script (Script): The Script, after `boxscript.optimize.optimize_script`.
+
+    Returns:
+        bool: Whether every cell it uses has a constant index, it only uses
+            operations which NumPy computes like Python does, and none of its
+            expressions pop from an empty stack.
+    """
+    for line in Line.get_lines(script):
+        expressions = line.expressions()
+        if len(expressions) == 2:
+            location = expressions[0].children
+            if location and (
+                len(location) > 1
+                or location[0].type is not Atom.NUM
+                or type(location[0].value) is not int
+            ):
+                return False
+
+        for expression in expressions:
+            depth = 1  # the stack of `evaluate_rpn` starts with a 0
+            for token in expression.children:
+                if token.type in _SCALAR:
+                    return False
+                if token.type is Atom.NUM or token.type is Atom.LOAD:
+                    depth += 1
+                elif token.type is not Atom.NOT:
+                    depth -= 1
+                    if not depth:
+                        # this pops from an empty stack
+                        return False
+                if token.type is Atom.LOAD and type(token.value) is not int:
+                    return False
+                if token.type is Atom.NUM and type(token.value) not in (int, float):
+                    # e.g. a complex number, which the optimizer folds from a POW
+                    return False
+                if type(token.value) is int and not -_LIMIT < token.value < _LIMIT:
+                    return False
+    return True
+
+
+class _Lanes:
+    """The memory, output and steps of a batch of lanes, which run a Script together."""
+
+    __slots__ = [
+        "np",
+        "size",
+        "cells",
+        "first",
+        "everywhere",
+        "clock",
+        "bad",
+        "steps",
+        "outputs",
+        "events",
+        "limits",
+    ]
+
+    def __init__(
+        self,
+        np: ModuleType,
+        inputs: list[dict[int, int]],
+        limits: tuple[Optional[int], Optional[float]],
+    ):
+        """Creates the lanes.
+
+        Args:
+            np (ModuleType): The numpy module.
+            inputs (list[dict[int, int]]): The mapping of inputs of each lane.
+            limits (tuple[Optional[int], Optional[float]]): The most steps of every
+                lane, and the time at which the batch stops.
+        """
+        self.np = np
+        self.size = len(inputs)
+        self.cells = {}
+        self.first = {}  # when each lane first used each cell, which orders its memory
+        self.everywhere = set()  # cells which every lane has used
+        self.clock = max(map(len, inputs), default=0)
+        self.bad = np.zeros(self.size, bool)  # lanes which are run on their own
+        self.steps = np.zeros(self.size, np.int64)
+        self.outputs = [[] for _ in inputs]
+        self.events = []  # (mask, codes) of every output which is not text yet
+        self.limits = limits
+
+        for lane, cells in enumerate(inputs):
+            for i, (key, value) in enumerate(cells.items()):
+                if type(key) is int and type(value) is int and -_LIMIT < value < _LIMIT:
+                    self.cell(key)[lane] = value
+                    self.first[key][lane] = i
+                else:
+                    self.bad[lane] = True
+
+    def cell(self, key: int) -> "numpy.ndarray":
+        """Gets a cell of every lane, which is created if it is new."""
+        column = self.cells.get(key)
+        if column is None:
+            column = self.cells[key] = self.np.zeros(self.size, self.np.int64)
+            self.first[key] = self.np.full(self.size, _NEVER, self.np.int64)
+        return column
+
+    def use(self, key: int, mask: "numpy.ndarray") -> "numpy.ndarray":
+        """Gets a cell of every lane, and remembers which lanes of the mask used it."""
+        column = self.cell(key)
+        if key not in self.everywhere:
+            first = self.first[key]
+            unused = first == _NEVER
+            first[unused & mask] = self.clock
+            self.clock += 1
+            if not (unused & ~mask & ~self.bad).any():
+                self.everywhere.add(key)
+        return column
+
+    def constant(self, value: Number) -> "numpy.ndarray":
+        """Gets a constant for every lane."""
+        np = self.np
+        return np.full(
+            self.size, value, np.float64 if type(value) is float else np.int64
+        )
+
+    def fail(
+        self, condition: "Union[bool, numpy.ndarray]", mask: "numpy.ndarray"
+    ) -> None:
+        """Marks the lanes of the mask where the condition holds as bad."""
+        self.bad |= condition & mask
+
+    def integer(self, value: "numpy.ndarray", mask: "numpy.ndarray") -> "numpy.ndarray":
+        """Checks that the ints of the mask stay within _LIMIT."""
+        self.fail((value >= _LIMIT) | (value <= -_LIMIT), mask)
+        return value
+
+    def round(self, value: "numpy.ndarray", mask: "numpy.ndarray") -> "numpy.ndarray":
+        """Rounds every lane like `round` does."""
+        if value.dtype.kind != "f":
+            return value
+        np = self.np
+        value = np.rint(value)
+        ok = np.abs(value) < _LIMIT
+        self.fail(~ok, mask)
+        return np.where(ok, value, 0).astype(np.int64)
+
+    def binary(
+        self,
+        kind: Atom,
+        left: "numpy.ndarray",
+        right: "numpy.ndarray",
+        mask: "numpy.ndarray",
+    ) -> "numpy.ndarray":
+        """Applies a binary operation to every lane."""
+        np = self.np
+        if left.dtype.kind == "f" or right.dtype.kind == "f":
+            if kind in _INTEGRAL:
+                self.fail(True, mask)
+                return self.constant(0)
+            for operand in (left, right):
+                if operand.dtype.kind != "f":
+                    self.fail(np.abs(operand) > _EXACT, mask)
+            if kind is Atom.DIV:
+                self.fail(right == 0, mask)
+            value = _FLOAT[kind](left, right)
+            if kind in _COMPARISONS:
+                return value.astype(np.int64)
+            self.fail(~np.isfinite(value), mask)
+            return value
+
+        if kind in _COMPARISONS:
+            return _FLOAT[kind](left, right).astype(np.int64)
+        if kind is Atom.DIV:
+            exact = (np.abs(left) <= _EXACT) & (np.abs(right) <= _EXACT)
+            self.fail((right == 0) | ~exact, mask)
+            return np.true_divide(left, right)
+        if kind is Atom.MOD:
+            zero = right == 0
+            self.fail(zero, mask)
+            return np.mod(left, np.where(zero, 1, right))
+        if kind is Atom.R_SHIFT:
+            self.fail(right < 0, mask)
+            return np.right_shift(left, np.clip(right, 0, 63))
+        if kind is Atom.L_SHIFT:
+            self.fail((right < 0) | (right > 62), mask)
+            shift = np.clip(right, 0, 62)
+            value = np.left_shift(left, shift)
+            self.fail(np.right_shift(value, shift) != left, mask)
+            return self.integer(value, mask)
+        if kind is Atom.MULT:
+            # the product of the floats is close enough to tell when it overflows
+            estimate = np.abs(left.astype(np.float64) * right)
+            self.fail(estimate >= _LIMIT / 2, mask)
+        return self.integer(_FLOAT[kind](left, right), mask)
+
+    def evaluate(self, rpn: list[Token], mask: "numpy.ndarray") -> "numpy.ndarray":
+        """Evaluates an RPN expression on every lane, like `evaluate_rpn` does."""
+        stack = [self.constant(0)]
+        for token in rpn:
+            kind = token.type
+            if kind is Atom.NUM:
+                stack.append(self.constant(token.value))
+            elif kind is Atom.LOAD:
+                stack.append(self.use(token.value, mask))
+            elif kind is Atom.NOT:
+                value = stack.pop()
+                if value.dtype.kind == "f":
+                    self.fail(True, mask)
+                    value = self.constant(0)
+                stack.append(self.integer(~value, mask))
+            else:
+                right = stack.pop()
+                stack.append(self.binary(kind, stack.pop(), right, mask))
+        return stack.pop()
+
+    def line(self, line: Line, mask: "numpy.ndarray") -> "Union[int, numpy.ndarray]":
+        """Executes a Line in the lanes of the mask."""
+        mask = mask & ~self.bad
+        if not mask.any():
+            return 0
+
+        node = line.children[0]
+        if isinstance(node, Assign):
+            location, value = node.children
+            key = location.children[0].value if location.children else 0
+            r = self.evaluate(value.children, mask)
+            rounded = self.round(r, mask)
+            mask = mask & ~self.bad
+            self.cells[key] = self.np.where(mask, rounded, self.use(key, mask))
+        else:
+            r = self.evaluate(node.children, mask)
+
+        if line.output:
+            codes = self.round(r, mask)
+            self.fail((codes < 0) | (codes > 0x10FFFF), mask)
+            self.events.append((mask & ~self.bad, codes))
+            if len(self.events) >= _EVENTS:
+                self.flush()
+        return r
+
+    def box(self, box: Box, mask: "numpy.ndarray") -> "Union[int, numpy.ndarray]":
+        """Executes a Box in the lanes of the mask, like `Box.execute` does."""
+        if not box.conditional:
+            for child in box.children:
+                self.execute(child, mask)
+            return 1
+
+        max_steps, deadline = self.limits
+        active = mask & ~self.bad
+        # 1 in the lanes which have finished a pass, which is the value of the Box
+        finished = self.np.zeros(self.size, self.np.int64)
+        while True:
+            if max_steps is not None:
+                self.fail(self.steps >= max_steps, active)
+                active &= ~self.bad
+            if not active.any():
+                return finished
+            if deadline is not None and time.monotonic() > deadline:
+                # every lane is still running, so all of them are run on their own
+                self.bad[:] = True
+                return finished
+
+            self.steps += active
+            for child in box.children:
+                value = self.execute(child, active)
+                active &= ~self.bad
+                if child.condition:
+                    active &= value != 0
+            finished[active] = 1
+
+    def execute(
+        self, container: Container, mask: "numpy.ndarray"
+    ) -> "Union[int, numpy.ndarray]":
+        """Executes the children of a Script or Block, and gives the last value."""
+        r = 0
+        for child in container.children:
+            if isinstance(child, Box):
+                r = self.box(child, mask)
+            else:
+                r = self.line(child, mask)
+        return r
+
+    def flush(self) -> None:
+        """Turns the outputs which are kept as arrays into the text of every lane."""
+        if not self.events:
+            return
+        np = self.np
+        masks = np.stack([mask for mask, _ in self.events], axis=1)
+        codes = np.stack([codes for _, codes in self.events], axis=1)
+        self.events.clear()
+
+        for lane in np.flatnonzero(masks.any(axis=1)).tolist():
+            text = "".join(map(chr, codes[lane][masks[lane]].tolist()))
+            self.outputs[lane].append(text)
+
+    def results(self, inputs: list[dict[int, int]]) -> list[Optional[Result]]:
+        """Gets the Result of every lane, or None for the lanes which are bad."""
+        self.flush()
+        np = self.np
+        keys = list(self.cells)
+        rows = firsts = [[]] * self.size
+        if keys:
+            rows = np.stack(list(self.cells.values()), axis=1).tolist()
+            firsts = np.stack([self.first[key] for key in keys], axis=1)
+
+        results = []
+        for lane, (row, first) in enumerate(zip(rows, firsts)):
+            if self.bad[lane]:
+                results.append(None)
+                continue
+
+            # the cells are in the order the lane first used them, like in a `Mem`
+            order = np.argsort(first, kind="stable").tolist() if keys else []
+            memory = {keys[i]: row[i] for i in order if row[i]}
+            output = "".join(self.outputs[lane]) + "\n"
+            results.append(Result(output, memory, None, int(self.steps[lane])))
+        return results
+
+
+_FLOAT = {
+    Atom.ADD: lambda a, b: a + b,
+    Atom.SUB: lambda a, b: a - b,
+    Atom.MULT: lambda a, b: a * b,
+    Atom.DIV: lambda a, b: a / b,
+    Atom.AND: lambda a, b: a & b,
+    Atom.OR: lambda a, b: a | b,
+    Atom.XOR: lambda a, b: a ^ b,
+    Atom.LT: lambda a, b: a < b,
+    Atom.GT: lambda a, b: a > b,
+    Atom.EQ: lambda a, b: a == b,
+    Atom.NE: lambda a, b: a != b,
+}
+
+
+def _prepare(tokens: list[Token]) -> Optional[Script]:
+    """Parses and optimizes a script, if it can be run on every lane at once."""
+    try:
+        script = Script(tokens)
+        optimize_script(script)
+    except Exception:
+        # the scalar engine reports the error of every run
+        return None
+    return script if vectorizable(script) else None
+
+
+def _vector(
+    np: ModuleType,
+    script: Script,
+    inputs: list[dict[int, int]],
+    max_steps: Optional[int],
+    timeout: Optional[float],
+) -> list[Optional[Result]]:
+    """Runs a batch of lanes, and gives None for those which must run on their own."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    lanes = _Lanes(np, inputs, (max_steps, deadline))
+    with np.errstate(all="ignore"):
+        try:
+            lanes.execute(script, ~lanes.bad)
+        except RecursionError:
+            return [None] * len(inputs)
+    return lanes.results(inputs)
+
+
+def run_lanes(
+    script: str,
+    inputs: Iterable[dict[int, int]],
+    lanes: int = LANES,
+    engine: str = "python",
+    memory: str = "sparse",
+    optimize: bool = True,
+    max_steps: int = None,
+    timeout: float = None,
+) -> Iterator[Result]:
+    """Runs a script once for every mapping of inputs, a batch of lanes at a time.
+
+    Note:
+        The Results are the same as those of `boxscript.interpreter.run_many`, and are
+        yielded in the order of the inputs. Runs which the lanes cannot do exactly are
+        done one at a time on the scalar engine, in this process. The time limit
+        applies to each run, so a batch which takes too long runs again, one lane at a
+        time.
+
+    Args:
+        script (str): The script to run.
+        inputs (Iterable[dict[int, int]]): The mappings of inputs to use.
+        lanes (int, optional): The most runs in a batch. Defaults to LANES.
+        engine (str, optional): The scalar engine. Defaults to "python".
+        memory (str, optional): The memory backend of the scalar engine. Defaults to
+            "sparse".
+        optimize (bool, optional): Whether the scalar engine optimizes the script.
+            Defaults to True.
+        max_steps (int, optional): The most steps of every run. Defaults to None.
+        timeout (float, optional): The most seconds of every run. Defaults to None.
+
+    Raises:
+        ImportError: NumPy is not installed.
+        ValueError: The engine or the memory backend does not exist. These are
+            raised by the call, before any run.
+
+    Returns:
+        Iterator[Result]: The Result of each run.
+    """
+    np = _numpy()
+    interpreter = Interpreter(engine, memory, Buffer())
+    return _run_lanes(
+        np, interpreter, script, inputs, lanes, optimize, max_steps, timeout
+    )
+
+
+def _run_lanes(
+    np: ModuleType,
+    interpreter: Interpreter,
+    script: str,
+    inputs: Iterable[dict[int, int]],
+    lanes: int,
+    optimize: bool,
+    max_steps: Optional[int],
+    timeout: Optional[float],
+) -> Iterator[Result]:
+    """Runs a script once for every mapping of inputs, like `run_lanes` does."""
+    try:
+        tokens = tokenize(script)
+    except SyntaxError as e:
+        for cells in inputs:
+            yield Result(f"{e}\n", {k: v for k, v in cells.items() if v}, e)
+        return
+
+    parsed = _prepare(tokens)
+    program = batch_program(tokens, interpreter.engine, optimize)
+    limits = max_steps, timeout
+
+    inputs = iter(inputs)
+    while batch := list(itertools.islice(inputs, lanes)):
+        results = [None] * len(batch)
+        if parsed is not None:
+            results = _vector(np, parsed, batch, max_steps, timeout)
+        for cells, result in zip(batch, results):
+            yield (
+                run_program(interpreter, program, cells, limits)
+                if result is None
+                else result
+            )
@@ -0,0 +1,576 @@
+"""Run parsed code on a virtual machine.
+
+This module provides the necessary functions to lower a `boxscript.ast.Script` into a
+flat array of instructions, and to run that array in a single loop.
+
+Every instruction is an opcode and an argument. RPN operations work on one stack of
+values, every Line leaves its value in a register `r`, a conditional block which fails
+jumps out of its Box, and the end of a conditional Box jumps back to its start, which
+takes a step of the clock of the Context and marks on the stack that the Box has
+finished a pass. So running a script never recurses, however
+deeply its boxes are nested. The Invariants of a `boxscript.analysis.Loop` are kept in
+slots, which are cleared whenever the Loop is entered.
+
+Common sequences of instructions are fused into one instruction as they are emitted,
+e.g. reading a cell and applying operators with constant operands to it, or setting
+`r` and jumping if it is 0, since dispatching an instruction costs about as much as
+executing a whole Node. The operations of a fused instruction are pairs of a constant
+and a binary operator, which are applied in order.
+
+Note:
+    Anything which cannot be lowered (e.g. expressions which would pop from an empty
+    stack) is kept as a Node, and is executed by the CALL instruction through the
+    Node's own `execute` method.
+"""
+
+import operator
+from typing import Union
+
+from boxscript.analysis import Invariant, Loop
+from boxscript.ast import BINARY, Box, Container, Expression, Line, Node, Script
+from boxscript.context import Context
+from boxscript.lex import Atom
+
+__all__ = ["OPCODES", "Machine", "compile_vm", "disassemble"]
+
+
+# the opcodes, in the order the dispatch loop checks them, which is roughly how often
+# they are run
+OPCODES = (
+    "UPDATE",  # set r to operations on a cell, and assign it to a cell
+    "BRANCH",  # jump unless operations on a cell give a true value
+    "LOAD_NUM",  # push the value of operations on a cell
+    "NUM_BINARY",  # apply operations to the top of the stack
+    "STORE_AT",  # pop r, and assign it to the cell at the argument
+    "LOOP",  # take a step of the clock, set the top of the stack to 1, and jump
+    "PRINT",  # pop r, and output its character
+    "TEST",  # pop r, and jump to the argument if r is 0
+    "LOAD",  # push the cell at the argument
+    "LOAD_BINARY",  # apply the operator to the top of the stack and a cell
+    "NUM",  # push the argument
+    "VALUE",  # pop r
+    "BINARY",  # pop the right operand, and apply the operator to the left one
+    "LOAD_LOAD",  # push the operator applied to two cells
+    "STORE",  # pop r and then the cell, and assign r to the cell
+    "OUTPUT",  # output the character of r
+    "SET",  # set r to the argument
+    "JUMP_UNLESS",  # jump to the argument if r is 0
+    "STEP",  # take a step of the clock
+    "MEM",  # replace the top of the stack with the cell at it
+    "NOT",  # invert the top of the stack
+    "IN",  # push the next input
+    "DROP",  # remove the argument number of values below the top of the stack
+    "CACHED",  # push the value of a slot and jump, if the slot is set
+    "REMEMBER",  # keep the top of the stack in a slot
+    "CLEAR",  # clear the slots of a Loop, and forget its Invariants if it has to
+    "CALL",  # push the value of executing the argument, a Node
+)
+(
+    UPDATE,
+    BRANCH,
+    LOAD_NUM,
+    NUM_BINARY,
+    STORE_AT,
+    LOOP,
+    PRINT,
+    TEST,
+    LOAD,
+    LOAD_BINARY,
+    NUM,
+    VALUE,
+    BINARY_OP,
+    LOAD_LOAD,
+    STORE,
+    OUTPUT,
+    SET,
+    JUMP_UNLESS,
+    STEP,
+    MEM,
+    NOT,
+    IN,
+    DROP,
+    CACHED,
+    REMEMBER,
+    CLEAR,
+    CALL,
+) = range(len(OPCODES))
+
+# a comparison whose value is only tested does not have to be 0 or 1
+_TESTS = {
+    BINARY[Atom.LT]: operator.lt,
+    BINARY[Atom.GT]: operator.gt,
+    BINARY[Atom.EQ]: operator.eq,
+    BINARY[Atom.NE]: operator.ne,
+}
+_NAMES = {function: kind.name for kind, function in BINARY.items()}
+_NAMES.update({test: _NAMES[function] for function, test in _TESTS.items()})
+
+
+class _Lowering:
+    """Builds the instructions of a script, one Node at a time."""
+
+    def __init__(self):
+        """Creates a Lowering with no instructions."""
+        self.code = []
+        self.slots = {}  # the slot of each Invariant
+        self.label = 0  # the last address which is jumped to
+
+    def emit(self, opcode: int, argument: object = None) -> int:
+        """Adds an instruction.
+
+        Args:
+            opcode (int): The opcode of the instruction.
+            argument (object, optional): Its argument. Defaults to None.
+
+        Returns:
+            int: The address of the instruction.
+        """
+        self.code.append((opcode, argument))
+        return len(self.code) - 1
+
+    def last(self, count: int) -> list[int]:
+        """Gets the opcodes of the last instructions.
+
+        Args:
+            count (int): The number of instructions.
+
+        Returns:
+            list[int]: The opcodes, which are None before the first instruction.
+        """
+        opcodes = [opcode for opcode, _ in self.code[len(self.code) - count :]]
+        return [None] * (count - len(opcodes)) + opcodes
+
+    def fuse(self, count: int, opcode: int, argument: object = None) -> bool:
+        """Replaces the last instructions, and the one which would follow them.
+
+        Note:
+            Nothing is replaced if any instruction but the first is jumped to, since
+            the jump would then go to the wrong instruction.
+
+        Args:
+            count (int): The number of instructions which are replaced.
+            opcode (int): The opcode of the instruction.
+            argument (object, optional): Its argument. Defaults to None.
+
+        Returns:
+            bool: Whether the instructions were replaced.
+        """
+        if len(self.code) - count + 1 <= self.label:
+            return False
+        del self.code[len(self.code) - count :]
+        self.emit(opcode, argument)
+        return True
+
+    def patch(self, address: int) -> None:
+        """Makes a jump go to the next instruction.
+
+        Args:
+            address (int): The address of the jump.
+        """
+        self.label = len(self.code)
+        opcode, argument = self.code[address]
+        if isinstance(argument, tuple):
+            # the address is the last item of the argument
+            self.code[address] = (opcode, (*argument[:-1], self.label))
+        else:
+            self.code[address] = (opcode, self.label)
+
+    def operator(self, kind: Atom) -> None:
+        """Adds a binary operator, fused with its operands if it can be.
+
+        Args:
+            kind (Atom): The operator.
+        """
+        function = BINARY[kind]
+        left, right = self.last(2)
+        if right == NUM:
+            operation = ((self.code[-1][1], function),)
+            argument = self.code[-2][1] if left is not None else None
+            if left == LOAD and self.fuse(2, LOAD_NUM, (argument, operation)):
+                return
+            if left == LOAD_NUM and self.fuse(
+                2, LOAD_NUM, (argument[0], argument[1] + operation)
+            ):
+                return
+            if left == NUM_BINARY and self.fuse(2, NUM_BINARY, argument + operation):
+                return
+            if self.fuse(1, NUM_BINARY, operation):
+                return
+        elif right == LOAD:
+            cell = self.code[-1][1]
+            if left == LOAD and self.fuse(
+                2, LOAD_LOAD, (self.code[-2][1], cell, function)
+            ):
+                return
+            if self.fuse(1, LOAD_BINARY, (cell, function)):
+                return
+        self.emit(BINARY_OP, function)
+
+    def expression(self, expression: Expression) -> None:
+        """Lowers an Expression, which pushes its value.
+
+        Args:
+            expression (Expression): The Expression.
+        """
+        rpn = expression.children
+
+        # the stack starts with a 0, which is only pushed if an operator uses it
+        depth, zero = 1, not rpn
+        for child in rpn:
+            if child.type in BINARY:
+                if depth < 2:
+                    self.emit(CALL, expression)
+                    return
+                zero = zero or depth == 2
+                depth -= 1
+            elif child.type is Atom.MEM or child.type is Atom.NOT:
+                zero = zero or depth == 1
+            else:
+                depth += 1
+
+        cached = None
+        if isinstance(expression, Invariant):
+            slot = self.slots.setdefault(expression, len(self.slots))
+            cached = self.emit(CACHED, (slot, None))
+
+        if zero:
+            self.emit(NUM, 0)
+        for child in rpn:
+            if child.type is Atom.NUM:
+                self.emit(NUM, child.value)
+            elif child.type is Atom.LOAD:
+                self.emit(LOAD, child.value)
+            elif child.type is Atom.MEM:
+                self.emit(MEM)
+            elif child.type is Atom.NOT:
+                self.emit(NOT)
+            elif child.type is Atom.IN:
+                self.emit(IN)
+            else:
+                self.operator(child.type)
+
+        # values left on the stack are never used, but were still evaluated
+        unused = depth - 1 - (not zero)
+        if unused:
+            self.emit(DROP, unused)
+
+        if cached is not None:
+            self.emit(REMEMBER, self.code[cached][1][0])
+            self.patch(cached)
+
+    def line(self, line: Line) -> None:
+        """Lowers a Line, which sets `r` to its value.
+
+        Args:
+            line (Line): The Line.
+        """
+        node = line.children[0]
+
+        if isinstance(node, Expression):
+            self.expression(node)
+            self.emit(VALUE)
+        elif isinstance(node, Container) and all(
+            isinstance(child, Expression) for child in node.children
+        ):
+            # an assignment, in which the location must be evaluated first
+            loc, value = node.children
+            rpn = loc.children
+            if not isinstance(loc, Invariant) and (
+                not rpn or (len(rpn) == 1 and rpn[0].type is Atom.NUM)
+            ):
+                self.expression(value)
+                cell = rpn[0].value if rpn else 0
+                if not (
+                    self.last(1) == [LOAD_NUM]
+                    and self.fuse(1, UPDATE, (*self.code[-1][1], cell))
+                ):
+                    self.emit(STORE_AT, cell)
+            else:
+                self.expression(loc)
+                self.expression(value)
+                self.emit(STORE)
+        else:
+            self.emit(CALL, node)
+            self.emit(VALUE)
+
+        if line.output and not (self.last(1) == [VALUE] and self.fuse(1, PRINT)):
+            self.emit(OUTPUT)
+
+    def block(self, block: Container) -> None:
+        """Lowers a Block, which sets `r` to the value of its last child.
+
+        Args:
+            block (Container): The Block.
+        """
+        for child in block.children:
+            if isinstance(child, Line):
+                self.line(child)
+            elif isinstance(child, Box):
+                self.box(child)
+            else:
+                self.emit(CALL, child)
+                self.emit(VALUE)
+
+        if block.condition and not block.children:
+            self.emit(SET, 0)
+
+    def box(self, box: Box) -> None:
+        """Lowers a Box, which sets `r` to 0 if it stops on its first pass.
+
+        Args:
+            box (Box): The Box.
+        """
+        if not box.conditional:
+            for child in box.children:
+                self.block(child)
+            self.emit(SET, 1)
+            return
+
+        clear = None
+        if isinstance(box, Loop):
+            clear = self.emit(CLEAR)
+
+        # whether a pass is finished is kept on the stack, which every Line leaves as
+        # it found it, and the first step is taken here, and every other one by the
+        # jump back
+        self.emit(NUM, 0)
+        self.emit(STEP)
+        start = self.label = len(self.code)
+        exits = []
+        for child in box.children:
+            self.block(child)
+            if child.condition:
+                exits.append(self.branch())
+        self.emit(LOOP, start)
+        for address in exits:
+            self.patch(address)
+        self.emit(VALUE)
+
+        if clear is not None:
+            slots = tuple(
+                self.slots[invariant]
+                for invariant in box.invariants
+                if invariant in self.slots
+            )
+            # the others are executed as Nodes, which keep their values in the Context
+            loop = box if len(slots) < len(box.invariants) else None
+            self.code[clear] = (CLEAR, (slots, loop))
+
+    def branch(self) -> int:
+        """Adds a jump out of a Box if `r` is 0, fused with the Line before it.
+
+        Note:
+            The value of a Line which is only tested is never used again, so it does
+            not have to be kept in `r`.
+
+        Returns:
+            int: The address of the jump.
+        """
+        if self.last(2) == [LOAD_NUM, VALUE]:
+            cell, operations = self.code[-2][1]
+            constant, function = operations[-1]
+            operations = (*operations[:-1], (constant, _TESTS.get(function, function)))
+            if self.fuse(2, BRANCH, (cell, operations, None)):
+                return len(self.code) - 1
+        if self.last(1) == [VALUE] and self.fuse(1, TEST):
+            return len(self.code) - 1
+        return self.emit(JUMP_UNLESS)
+
+    def script(self, script: Script) -> None:
+        """Lowers a Script.
+
+        Args:
+            script (Script): The Script.
+        """
+        for child in script.children:
+            if isinstance(child, Box):
+                self.box(child)
+            else:
+                self.emit(CALL, child)
+                self.emit(VALUE)
+
+
+class Machine:
+    """The instructions of a script, which can be run any number of times.
+
+    Note:
+        A Machine keeps no state while it runs, so it may run in different Contexts
+        at the same time.
+    """
+
+    __slots__ = ["code", "slots"]
+
+    def __init__(self, script: Script):
+        """Lowers a Script into instructions.
+
+        Args:
+            script (Script): The Script.
+        """
+        lowering = _Lowering()
+        lowering.script(script)
+        self.code = lowering.code
+        self.slots = len(lowering.slots)
+
+    def __len__(self) -> int:
+        """Gets the number of instructions.
+
+        Returns:
+            int: The number of instructions.
+        """
+        return len(self.code)
+
+    def __str__(self) -> str:
+        return "\n".join(
+            f"{address:>5} {OPCODES[opcode]:<12} {_argument(argument)}".rstrip()
+            for address, (opcode, argument) in enumerate(self.code)
+        )
+
+    def __call__(self, context: Context) -> None:  # noqa: C901
+        """Runs the instructions.
+
+        Args:
+            context (Context): The memory and output to execute with.
+
+        Raises:
+            LimitExceeded: The execution takes more steps or time than it is allowed.
+        """
+        code = self.code
+        memory, output, clock = context.memory, context.output, context.clock
+        read = context.input
+        slots = [None] * self.slots
+
+        stack = []
+        push, pop = stack.append, stack.pop
+        r = 0
+        pc = 0
+        end = len(code)
+
+        # the opcodes are compared as constants, which is faster than looking them up
+        while pc < end:
+            opcode, argument = code[pc]
+            pc += 1
+            if opcode == 0:  # UPDATE
+                cell, operations, loc = argument
+                r = memory[cell]
+                for constant, function in operations:
+                    r = function(r, constant)
+                memory[loc] = round(r)
+            elif opcode == 1:  # BRANCH
+                cell, operations, target = argument
+                value = memory[cell]
+                for constant, function in operations:
+                    value = function(value, constant)
+                if not value:
+                    pc = target
+            elif opcode == 2:  # LOAD_NUM
+                cell, operations = argument
+                value = memory[cell]
+                for constant, function in operations:
+                    value = function(value, constant)
+                push(value)
+            elif opcode == 3:  # NUM_BINARY
+                value = stack[-1]
+                for constant, function in argument:
+                    value = function(value, constant)
+                stack[-1] = value
+            elif opcode == 4:  # STORE_AT
+                r = pop()
+                memory[argument] = round(r)
+            elif opcode == 5:  # LOOP
+                next(clock)
+                stack[-1] = 1
+                pc = argument
+            elif opcode == 6:  # PRINT
+                r = pop()
+                output(chr(round(r)))
+            elif opcode == 7:  # TEST
+                r = pop()
+                if not r:
+                    pc = argument
+            elif opcode == 8:  # LOAD
+                push(memory[argument])
+            elif opcode == 9:  # LOAD_BINARY
+                stack[-1] = argument[1](stack[-1], memory[argument[0]])
+            elif opcode == 10:  # NUM
+                push(argument)
+            elif opcode == 11:  # VALUE
+                r = pop()
+            elif opcode == 12:  # BINARY
+                right = pop()
+                stack[-1] = argument(stack[-1], right)
+            elif opcode == 13:  # LOAD_LOAD
+                left, right, function = argument
+                push(function(memory[left], memory[right]))
+            elif opcode == 14:  # STORE
+                r = pop()
+                loc = pop()
+                memory[loc] = round(r)
+            elif opcode == 15:  # OUTPUT
+                output(chr(round(r)))
+            elif opcode == 16:  # SET
+                r = argument
+            elif opcode == 17:  # JUMP_UNLESS
+                if not r:
+                    pc = argument
+            elif opcode == 18:  # STEP
+                next(clock)
+            elif opcode == 19:  # MEM
+                stack[-1] = memory[stack[-1]]
+            elif opcode == 20:  # NOT
+                stack[-1] = ~stack[-1]
+            elif opcode == 21:  # IN
+                push(read())
+            elif opcode == 22:  # DROP
+                del stack[-1 - argument : -1]
+            elif opcode == 23:  # CACHED
+                value = slots[argument[0]]
+                if value is not None:
+                    push(value)
+                    pc = argument[1]
+            elif opcode == 24:  # REMEMBER
+                slots[argument] = stack[-1]
+            elif opcode == 25:  # CLEAR
+                for slot in argument[0]:
+                    slots[slot] = None
+                if argument[1] is not None:
+                    argument[1].reset(context)
+            elif opcode == 26:  # CALL
+                push(argument.execute(context))
+
+
+def _argument(argument: object) -> str:
+    """Writes the argument of an instruction for a listing."""
+    if argument is None:
+        return ""
+    if isinstance(argument, tuple):
+        return " ".join(filter(None, map(_argument, argument)))
+    if isinstance(argument, Node):
+        return type(argument).__name__
+    if callable(argument):
+        return _NAMES.get(argument, repr(argument))
+    return repr(argument)
+
+
+def compile_vm(script: Script) -> Machine:
+    """Lowers a Script into a Machine.
+
+    Args:
+        script (Script): The Script.
+
+    Returns:
+        Machine: A callable which runs the Script in a Context.
+    """
+    return Machine(script)
+
+
+def disassemble(script: Union[Script, Machine]) -> str:
+    """Lists the instructions of a Script.
+
+    Args:
+        script (Union[Script, Machine]): The Script, or a Machine it was lowered into.
+
+    Returns:
+        str: One instruction on each line, with its address.
+    """
+    machine = script if isinstance(script, Machine) else Machine(script)
+    return str(machine)
@@ -0,0 +1,87 @@
+import unittest
+from textwrap import dedent
+
+from boxscript.interpreter import ENGINES, Interpreter
+from boxscript.lex import tokenize
+from boxscript.program import Program
+from boxscript.streams import Buffer
+
+# outputs (cell 1 * cell 2 + 48) ten times, and compares two cells without using it
+INVARIANT = dedent("""
+    ┏━━━━━━━━━━━━━━━━━┓
+    ┃◇▀▄▨▀▀▄▀▄        ┃
+    ┡━━━━━━━━━━━━━━━━━┩
+    │▭◇▀▀▘◇▀▀▄▐▀▀▀▄▄▄▄│
+    │◇▀▀▨◇▀▀▄         │
+    ├─────────────────┤
+    │▀▄◈◇▀▄▐▀▀        │
+    └─────────────────┘
+    """)
+
+# outputs cell 0 * cell 1 three times for each cell 0 from 0 to 2
+NESTED = dedent("""
+    ┏━━━━━━━━━━━━━━━━━━━━┓
+    ┃◇▀▄▨▀▀▀             ┃
+    ┡━━━━━━━━━━━━━━━━━━━━┩
+    │┏━━━━━━━━━━━━━━━━━┓ │
+    │┃◇▀▀▀▨▀▀▀         ┃ │
+    │┡━━━━━━━━━━━━━━━━━┩ │
+    ││▭◇▀▄▘◇▀▀▐▀▀▀▄▄▄▄ │ │
+    ││▀▀▀◈◇▀▀▀▐▀▀      │ │
+    │└─────────────────┘ │
+    │▀▀▀◈▀▄              │
+    │▀▄◈◇▀▄▐▀▀           │
+    └────────────────────┘
+    """)
+
+# outputs "A", then divides by cell 2
+ERROR = dedent("""
+    ┏━━━━━━━━━━━━━━┓
+    ┃◇▀▄▨▀▀▄▀▄     ┃
+    ┡━━━━━━━━━━━━━━┩
+    │▭◇▀▄▐▀▀▄▄▄▄▄▀ │
+    │◇▀▀▝◇▀▀▄      │
+    │▀▄◈◇▀▄▐▀▀     │
+    └──────────────┘
+    """)
+
+
+class TestAnalysis(unittest.TestCase):
+    """Tests boxscript.analysis for hoisting and removing lines properly."""
+
+    def assertSameResult(self, code: str, inputs: dict[int, int]) -> None:
+        """Runs code with and without optimization on every engine"""
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                original, optimized = (
+                    Interpreter(engine, output=Buffer(), optimize=flag).run(
+                        code, inputs
+                    )
+                    for flag in (False, True)
+                )
+                self.assertEqual(original.output, optimized.output)
+                self.assertEqual(original.memory, optimized.memory)
+                self.assertEqual(repr(original.error), repr(optimized.error))
+
+    def test_report(self) -> None:
+        """The report lists the rows which are hoisted and removed"""
+        report = Program(tokenize(INVARIANT)).report
+        self.assertEqual(report.hoisted, [4])
+        self.assertEqual(report.removed, [5])
+        self.assertEqual(str(report), "line 4: hoisted\nline 5: removed")
+        self.assertIsNone(Program(tokenize(INVARIANT), optimize=False).report)
+
+    def test_invariant(self) -> None:
+        """Hoisted values are the same on every iteration"""
+        self.assertSameResult(INVARIANT, {1: 3, 2: 5})
+
+    def test_nested(self) -> None:
+        """Hoisted values are computed again whenever the loop is entered"""
+        self.assertEqual(Program(tokenize(NESTED)).report.hoisted, [7])
+        self.assertSameResult(NESTED, {1: 1})
+
+    def test_error(self) -> None:
+        """Hoisted values raise their errors where they were first reached"""
+        self.assertSameResult(ERROR, {1: 1, 2: 0})
+        result = Interpreter(output=Buffer()).run(ERROR, {1: 1, 2: 0})
+        self.assertEqual(result.output, "A\n")
@@ -0,0 +1,287 @@
+import random
+import unittest
+
+from boxscript.ast import (
+    BINARY,
+    PRECEDENCE,
+    Box,
+    Mem,
+    Script,
+    compile_rpn,
+    evaluate_rpn,
+    shunting_yard,
+)
+from boxscript.interpreter import Interpreter
+from boxscript.lex import Atom, Token, tokenize
+from boxscript.streams import Buffer
+
+# outputs "0", with its box on the very first row
+FIRST_ROW = "┌─────────┐\n│▭▀▀▀▄▄▄▄ │\n└─────────┘\n"
+
+
+def outcome(function: callable) -> tuple:
+    """Test helper method to capture the value or the error of a call."""
+    try:
+        value = function()
+    except Exception as e:
+        return (type(e),)
+    return (type(value), value)
+
+
+def reference_shunting_yard(tokens: list[Token]) -> list[Token]:
+    """The original, quadratic implementation of shunting_yard."""
+    output = []
+    stack = []
+    for token in tokens:
+        if token.type is Atom.NUM:
+            output.append(token)
+        elif token.type is Atom.POW:
+            stack.append(token)
+        elif token.type in [Atom.MEM, Atom.NOT]:
+            while (
+                any(
+                    op in map(lambda e: e.type, stack)
+                    for op in [Atom.MEM, Atom.NOT, Atom.POW, Atom.L_PAREN]
+                )
+                and stack[-1].type != Atom.L_PAREN
+            ):
+                output.append(stack.pop())
+            stack.append(token)
+        elif token.type in [Atom.MULT, Atom.DIV, Atom.MOD]:
+            while (
+                any(
+                    op in map(lambda e: e.type, stack)
+                    for op in [
+                        Atom.MULT,
+                        Atom.DIV,
+                        Atom.MOD,
+                        Atom.MEM,
+                        Atom.NOT,
+                        Atom.POW,
+                    ]
+                )
+                and stack[-1].type != Atom.L_PAREN
+            ):
+                output.append(stack.pop())
+            stack.append(token)
+        elif token.type in [Atom.ADD, Atom.SUB]:
+            while (
+                any(
+                    op in map(lambda e: e.type, stack)
+                    for op in [
+                        Atom.ADD,
+                        Atom.SUB,
+                        Atom.MULT,
+                        Atom.DIV,
+                        Atom.MOD,
+                        Atom.MEM,
+                        Atom.NOT,
+                        Atom.POW,
+                    ]
+                )
+                and stack[-1].type != Atom.L_PAREN
+            ):
+                output.append(stack.pop())
+            stack.append(token)
+        elif token.type in [Atom.L_SHIFT, Atom.R_SHIFT]:
+            while (
+                any(
+                    op in map(lambda e: e.type, stack)
+                    for op in [
+                        Atom.L_SHIFT,
+                        Atom.R_SHIFT,
+                        Atom.ADD,
+                        Atom.SUB,
+                        Atom.MULT,
+                        Atom.DIV,
+                        Atom.MOD,
+                        Atom.MEM,
+                        Atom.NOT,
+                        Atom.POW,
+                    ]
+                )
+                and stack[-1].type != Atom.L_PAREN
+            ):
+                output.append(stack.pop())
+            stack.append(token)
+        elif token.type is Atom.AND:
+            while (
+                any(
+                    op in map(lambda e: e.type, stack)
+                    for op in [
+                        Atom.AND,
+                        Atom.L_SHIFT,
+                        Atom.ADD,
+                        Atom.SUB,
+                        Atom.R_SHIFT,
+                        Atom.MULT,
+                        Atom.DIV,
+                        Atom.MOD,
+                        Atom.MEM,
+                        Atom.NOT,
+                        Atom.POW,
+                    ]
+                )
+                and stack[-1].type != Atom.L_PAREN
+            ):
+                output.append(stack.pop())
+            stack.append(token)
+        elif token.type is Atom.XOR:
+            while (
+                any(
+                    op in map(lambda e: e.type, stack)
+                    for op in [
+                        Atom.XOR,
+                        Atom.AND,
+                        Atom.L_SHIFT,
+                        Atom.R_SHIFT,
+                        Atom.ADD,
+                        Atom.SUB,
+                        Atom.MULT,
+                        Atom.DIV,
+                        Atom.MOD,
+                        Atom.MEM,
+                        Atom.NOT,
+                        Atom.POW,
+                    ]
+                )
+                and stack[-1].type != Atom.L_PAREN
+            ):
+                output.append(stack.pop())
+            stack.append(token)
+        elif token.type is Atom.OR:
+            while (
+                any(
+                    op in map(lambda e: e.type, stack)
+                    for op in [
+                        Atom.OR,
+                        Atom.XOR,
+                        Atom.AND,
+                        Atom.L_SHIFT,
+                        Atom.R_SHIFT,
+                        Atom.ADD,
+                        Atom.SUB,
+                        Atom.MULT,
+                        Atom.DIV,
+                        Atom.MOD,
+                        Atom.MEM,
+                        Atom.NOT,
+                        Atom.POW,
+                    ]
+                )
+                and stack[-1].type != Atom.L_PAREN
+            ):
+                output.append(stack.pop())
+            stack.append(token)
+        elif token.type in [Atom.NE, Atom.EQ, Atom.LT, Atom.GT]:
+            while (
+                any(
+                    op in map(lambda e: e.type, stack)
+                    for op in [
+                        Atom.NE,
+                        Atom.EQ,
+                        Atom.LT,
+                        Atom.GT,
+                        Atom.OR,
+                        Atom.XOR,
+                        Atom.AND,
+                        Atom.L_SHIFT,
+                        Atom.R_SHIFT,
+                        Atom.ADD,
+                        Atom.SUB,
+                        Atom.MULT,
+                        Atom.DIV,
+                        Atom.MOD,
+                        Atom.MEM,
+                        Atom.NOT,
+                        Atom.POW,
+                    ]
+                )
+                and stack[-1].type != Atom.L_PAREN
+            ):
+                output.append(stack.pop())
+            stack.append(token)
+        elif token.type is Atom.L_PAREN:
+            stack.append(token)
+        elif token.type is Atom.R_PAREN:
+            while stack[-1].type is not Atom.L_PAREN:
+                output.append(stack.pop())
+            stack.pop()
+
+    while stack:
+        output.append(stack.pop())
+
+    return output
+
+
+def random_tokens(rng: random.Random, length: int) -> list:
+    """Test helper method to generate a random infix expression."""
+    kinds = [Atom.NUM] * 4 + [*PRECEDENCE, Atom.L_PAREN, Atom.R_PAREN]
+    tokens = []
+    parens = 0
+
+    for _ in range(length):
+        kind = rng.choice(kinds)
+        if kind is Atom.R_PAREN and not parens:
+            kind = Atom.L_PAREN
+        parens += (kind is Atom.L_PAREN) - (kind is Atom.R_PAREN)
+        tokens.append(Token(kind, rng.randint(-4, 4)))
+
+    return tokens + [Token(Atom.R_PAREN)] * parens
+
+
+class TestShuntingYard(unittest.TestCase):
+    """Tests boxscript.ast for converting expressions to RPN properly."""
+
+    def test_same_as_reference(self) -> None:
+        """The RPN is the same as the original implementation's"""
+        rng = random.Random(0)
+
+        for _ in range(5000):
+            tokens = random_tokens(rng, rng.randint(0, 24))
+
+            with self.subTest(tokens=" ".join(map(str, tokens))):
+                self.assertEqual(
+                    [id(token) for token in shunting_yard(tokens)],
+                    [id(token) for token in reference_shunting_yard(tokens)],
+                )
+
+
+class TestCompileRPN(unittest.TestCase):
+    """Tests boxscript.ast for compiling expressions properly."""
+
+    def test_same_as_evaluate(self) -> None:
+        """Compiled expressions give the same values and errors as evaluate_rpn"""
+        rng = random.Random(0)
+        kinds = [*BINARY, Atom.MEM, Atom.NOT]
+
+        for _ in range(5000):
+            rpn = [Token(rng.choice(kinds)) for _ in range(rng.randint(0, 8))]
+            for token in rpn:
+                if rng.random() < 0.5:
+                    token.type, token.value = Atom.NUM, rng.randint(-4, 4)
+            memory = Mem()
+            for i in range(-4, 5):
+                memory[i] = rng.randint(-4, 4)
+
+            with self.subTest(rpn=" ".join(map(str, rpn))):
+                self.assertEqual(
+                    outcome(lambda: compile_rpn(rpn)(memory)),
+                    outcome(lambda: evaluate_rpn(rpn, memory)),
+                )
+
+    def test_stack_underflow(self) -> None:
+        """Popping from an empty stack still raises an IndexError"""
+        rpn = [Token(Atom.NUM, 1), Token(Atom.ADD), Token(Atom.ADD)]
+        self.assertRaises(IndexError, compile_rpn(rpn), Mem())
+
+
+class TestScript(unittest.TestCase):
+    """Tests boxscript.ast for parsing scripts into boxes properly."""
+
+    def test_first_row(self) -> None:
+        """A box may start on the first row, with no newline before it"""
+        for code in (FIRST_ROW, "\n" + FIRST_ROW):
+            script = Script(tokenize(code))
+            self.assertEqual([type(child) for child in script.children], [Box])
+            self.assertEqual(Interpreter(output=Buffer()).run(code).output, "0\n")
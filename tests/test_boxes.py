@@ -0,0 +1,56 @@
+import pathlib
+import unittest
+from textwrap import dedent
+
+from boxscript.boxes import valid
+
+DOCS = pathlib.Path(__file__).parent.parent / "docs"
+
+
+class TestValid(unittest.TestCase):
+    """Tests boxscript.boxes for validating boxes properly."""
+
+    def test_docs_are_valid(self) -> None:
+        """Every example program is valid"""
+        for path in DOCS.glob("*.bs"):
+            with self.subTest(path.name):
+                self.assertIsNone(valid(path.read_text()))
+
+    def test_discontinuous_box(self) -> None:
+        """A broken edge is reported on its line"""
+        s = """
+            ┌────┐
+            │    │
+            └─ ──┘
+            """
+        error = valid(dedent(s).strip())
+        self.assertEqual(str(error), "Discontinuous box at line 2")
+
+    def test_discontinuity_reported_first(self) -> None:
+        """Discontinuity on a later line wins over earlier line errors"""
+        s = """
+            ┌────┐
+            │x   │
+            └─ ──┘
+            """
+        error = valid(dedent(s).strip())
+        self.assertEqual(str(error), "Discontinuous box at line 2")
+
+    def test_invalid_character(self) -> None:
+        """Characters outside of comments must be BoxScript characters"""
+        s = """
+            ┌────┐
+            │x   │
+            └────┘
+            """
+        error = valid(dedent(s).strip())
+        self.assertEqual(str(error), "Invalid character `x` at line 1")
+
+    def test_comment_ignored(self) -> None:
+        """Anything can go inside a comment"""
+        s = """
+            ╔══════╗
+            ║ x┌─y ║
+            ╚══════╝
+            """
+        self.assertIsNone(valid(dedent(s).strip()))
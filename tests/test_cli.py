@@ -0,0 +1,76 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.bench_loops import counting_loop
+from boxscript.cli import main
+from boxscript.compiled import CACHE_DIRECTORY
+
+
+def run(*argv: str) -> tuple[int, str, str]:
+    """Test helper method to run a command, and get its exit status and output."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        status = main(list(argv))
+    return status, stdout.getvalue(), stderr.getvalue()
+
+
+class TestRun(unittest.TestCase):
+    """Tests boxscript.cli for running a script once."""
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def script(self, name: str, code: str = None) -> str:
+        path = os.path.join(self.directory, name)
+        if code is None:
+            shutil.copy(os.path.join("docs", name), path)
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(code)
+        return path
+
+    def test_run(self) -> None:
+        """Scripts run with the cells which are set"""
+        path = self.script("digits.bs")
+        self.assertEqual(run("run", path), (0, "0123456789\n", ""))
+        self.assertEqual(run("run", path, "--cell", "0=5"), (0, "56789\n", ""))
+        self.assertEqual(run("run", path, "--engine", "vm")[1], "0123456789\n")
+
+    def test_cache(self) -> None:
+        """The parsed script is only kept next to it when it is asked for"""
+        path = self.script("digits.bs")
+        cache = os.path.join(self.directory, CACHE_DIRECTORY)
+        run("run", path)
+        self.assertFalse(os.path.exists(cache))
+
+        for _ in range(2):
+            self.assertEqual(run("run", path, "--cache"), (0, "0123456789\n", ""))
+        self.assertEqual(os.listdir(cache), ["digits.bsc"])
+
+    def test_errors(self) -> None:
+        """Missing and invalid scripts and scripts which take too long fail"""
+        status, _, error = run("run", self.script("bad.bs", "garbage"))
+        self.assertEqual((status, error), (1, "Invalid character `g` at line 0\n"))
+
+        missing = os.path.join(self.directory, "missing.bs")
+        for argv in (["run", missing], ["run", missing, "--cache"]):
+            status, _, error = run(*argv)
+            self.assertEqual(status, 1)
+            self.assertIn("No such file or directory", error)
+
+        loop = self.script("loop.bs", counting_loop(1000))
+        self.assertEqual(run("run", loop, "--max-steps", "10")[0], 1)
+
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            with self.assertRaises(SystemExit):
+                main(["run", loop, "--cell", "five"])
+            with self.assertRaises(SystemExit):
+                main(["run", "-", "--stdin"])
+        self.assertIn("cannot both be read from stdin", stderr.getvalue())
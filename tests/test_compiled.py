@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+from textwrap import dedent
+
+from benchmarks.workloads import DOCS
+from boxscript.ast import Script
+from boxscript.compiled import (
+    cache_path,
+    compile_to_file,
+    dumps,
+    load_compiled,
+    load_source,
+    loads,
+)
+from boxscript.interpreter import Interpreter
+from boxscript.lex import tokenize
+from boxscript.program import Program
+from boxscript.streams import Buffer
+
+# outputs a letter from a literal which does not fit into 32 bits
+LARGE = dedent("""
+    ┌───────────────────────────────────────────────────┐
+    │▀▀◈▀▀▀▄▄▄▄▀▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄▄│
+    │▭◇▀▀▞▀▀▄▀▄▄▄                                       │
+    └───────────────────────────────────────────────────┘
+    """)
+
+
+def run(script: Script) -> str:
+    """Test helper method to run a parsed script."""
+    return Interpreter(output=Buffer()).execute(Program(script)).output
+
+
+class TestCompiled(unittest.TestCase):
+    """Tests boxscript.compiled for loading the same Scripts it saves."""
+
+    def setUp(self) -> None:
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.source = os.path.join(directory, "digits.bs")
+        shutil.copy(DOCS / "digits.bs", self.source)
+
+    def test_round_trip(self) -> None:
+        """A loaded Script runs exactly like the Script it was saved from"""
+        programs = [path.read_text("utf-8") for path in DOCS.glob("*.bs")]
+        for source in [*programs, LARGE]:
+            data = dumps(Script(tokenize(source)), source)
+            self.assertEqual(run(loads(data, source)), run(Script(tokenize(source))))
+        self.assertEqual(run(loads(dumps(Script(tokenize(LARGE)), LARGE))), "a\n")
+
+    def test_invalid(self) -> None:
+        """Files of other sources, versions or formats are not loaded"""
+        data = dumps(Script(tokenize(LARGE)), LARGE)
+        for bad in [b"", b"BSC", data[:-1], b"XSC" + data[3:], data[:4] + b"\x00\x00"]:
+            with self.assertRaises(ValueError):
+                loads(bad)
+        with self.assertRaises(ValueError):
+            loads(data, LARGE + "\n")
+
+    def test_compile_to_file(self) -> None:
+        """A source file can be compiled to any path"""
+        path = compile_to_file(self.source, self.source + "c")
+        self.assertEqual(run(load_compiled(path)), "0123456789\n")
+        self.assertEqual(compile_to_file(self.source), cache_path(self.source))
+
+    def test_cache(self) -> None:
+        """The cache is written once, and written again when the source changes"""
+        path = cache_path(self.source)
+        self.assertEqual(os.path.basename(os.path.dirname(path)), "__bscache__")
+        self.assertEqual(run(load_source(self.source)), "0123456789\n")
+        self.assertTrue(os.path.exists(path))
+
+        # a cached Script is used rather than the source
+        with open(self.source, encoding="utf-8") as file:
+            source = file.read()
+        with open(path, "wb") as file:
+            file.write(dumps(Script(tokenize(LARGE)), source))
+        self.assertEqual(run(load_source(self.source)), "a\n")
+
+        with open(self.source, "a", encoding="utf-8") as file:
+            file.write("\n")
+        self.assertEqual(run(load_source(self.source)), "0123456789\n")
+        self.assertEqual(run(load_compiled(path)), "0123456789\n")
@@ -0,0 +1,93 @@
+import pathlib
+import random
+import unittest
+
+from boxscript.boxes import valid
+from boxscript.editor import Document
+from boxscript.lex import tokenize
+
+DOCS = pathlib.Path(__file__).parent.parent / "docs"
+CHARACTERS = " │┃║─━═┌┐└┘┏┓┗┛╔╗╚╝├┤┞┦┟┧┣┫┡┩┢┪╠╣▄▀◇◈▔░▒▓▚▞▕▏▭▯▖▗▘▝▌▐▧▨▤▥\n"
+
+
+class TestDocument(unittest.TestCase):
+    """Tests boxscript.editor for checking edited code like a full check does."""
+
+    def assertSameAsFull(self, document: Document) -> None:
+        """Checks the Document, and the whole code, and compares them"""
+        text = document.text
+        self.assertEqual(repr(document.valid()), repr(valid(text)), text)
+
+        try:
+            expected = [(token.type, token.value) for token in tokenize(text)]
+        except SyntaxError as e:
+            expected = repr(e)
+        try:
+            actual = [(token.type, token.value) for token in document.tokenize()]
+        except SyntaxError as e:
+            actual = repr(e)
+        self.assertEqual(actual, expected, text)
+
+    def test_edit(self) -> None:
+        """Text replaces rows from the start of one row to the start of another"""
+        document = Document("a\nb\nc")
+        document.edit(1, 2, "x\ny\n")
+        self.assertEqual(document.text, "a\nx\ny\nc")
+        document.edit(1, 3, "")
+        self.assertEqual(document.text, "a\nc")
+        document.edit(2, 2, "\n")
+        self.assertEqual(document.text, "a\nc\n")
+        document.edit(0, 1, "b")
+        self.assertEqual(document.text, "bc\n")
+
+        with self.assertRaises(IndexError):
+            document.edit(1, 4, "")
+
+    def test_wrap(self) -> None:
+        """The row above the first row is the last row, as in a full check"""
+        document = Document("│  │\n└──┘\n┌──┐")
+        self.assertEqual(str(document.valid()), "Discontinuous box at line 2")
+
+        # the first row is not changed, but it no longer connects to the last row
+        document.edit(2, 3, "    ")
+        self.assertEqual(str(document.valid()), "Discontinuous box at line 0")
+        document.edit(2, 3, "┌──┐")
+        self.assertSameAsFull(document)
+
+        # an empty row at the end is not a row for `valid`
+        document.edit(3, 3, "\n")
+        self.assertEqual(str(document.valid()), "Discontinuous box at line 2")
+        self.assertSameAsFull(document)
+
+    def test_random_edits(self) -> None:
+        """Any edits give the same results as checking all of the code"""
+        rng = random.Random(20)
+        programs = [path.read_text() for path in sorted(DOCS.glob("*.bs"))]
+
+        for _ in range(30):
+            document = Document(rng.choice(programs))
+            self.assertSameAsFull(document)
+
+            for _ in range(15):
+                rows = document.rows
+                start = rng.randrange(len(rows) + 1)
+                end = rng.randrange(start, min(start + 3, len(rows)) + 1)
+                if rng.random() < 0.5 and rows:
+                    text = "\n".join(rng.sample(rows, min(len(rows), 2))) + "\n"
+                else:
+                    text = "".join(rng.choices(CHARACTERS, k=rng.randrange(6)))
+                document.edit(start, end, text)
+                self.assertSameAsFull(document)
+
+    def test_line_breaks(self) -> None:
+        """Other line breaks fall back to checking all of the code"""
+        document = Document((DOCS / "helloworld.bs").read_text())
+        document.edit(4, 4, "\r")
+        self.assertSameAsFull(document)
+        document.edit(4, 5, document.rows[4][1:] + "\n")
+        self.assertSameAsFull(document)
+        self.assertIsNone(document.check())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,22 +1,24 @@
-import io
+import sys
 import unittest
-from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
 from textwrap import dedent
 
-from boxscript.interpreter import Interpreter
+from boxscript.context import LimitExceeded
+from boxscript.interpreter import ENGINES, Interpreter, run_many
+from boxscript.streams import Buffer
 
 
-def run_code(code: str) -> str:
+def run_code(code: str, engine: str = "tree", memory: str = "sparse") -> str:
     """Test helper method to run provided boxscript."""
-    stdout = io.StringIO()
-    with redirect_stdout(stdout):
-        Interpreter().run(code)
-    return stdout.getvalue()
+    return Interpreter(engine, memory, Buffer()).run(code).output
 
 
 class TestExecution(unittest.TestCase):
     """Tests boxscript.ast for parsing numbers properly."""
 
+    engine = "tree"
+    memory = "sparse"
+
     def test_48_is_zero(self) -> None:
         """48 is 0 in ascii"""
         s = """
@@ -29,7 +31,7 @@ class TestExecution(unittest.TestCase):
             └───────────────┘
             """
         s = dedent(s).strip()
-        self.assertEqual(run_code(s), "0\n")
+        self.assertEqual(run_code(s, self.engine, self.memory), "0\n")
 
     def test_01234567_bitwise(self) -> None:
         """Output: 01234567"""
@@ -64,7 +66,7 @@ class TestExecution(unittest.TestCase):
             └────────────────┘
             """
         s = dedent(s).strip()
-        self.assertEqual(run_code(s), "0123456789\n")
+        self.assertEqual(run_code(s, self.engine, self.memory), "0123456789\n")
 
     def test_01234567(self) -> None:
         """Output: 0123456789"""
@@ -78,10 +80,44 @@ class TestExecution(unittest.TestCase):
             └────────────┘
             """
         s = dedent(s)
-        self.assertEqual(run_code(s), "0123456789\n")
+        self.assertEqual(run_code(s, self.engine, self.memory), "0123456789\n")
+
+    def test_long_loop(self) -> None:
+        """Loops are not limited by the recursion limit"""
+        s = """
+            ┏━━━━━━━━━━━━━━━━━━━━━━━━━┓
+            ┃◇▀▄▨▀▀▄▀▀▀▄▀▀▀▄▄▄        ┃
+            ┡━━━━━━━━━━━━━━━━━━━━━━━━━┩
+            │▀▄◈◇▀▄▐▀▀                │
+            └─────────────────────────┘
+            ┌─────────────────────────┐
+            │▭◇▀▄▌▀▀▄▀▀▀▄▄▄▀▄▄▄       │
+            └─────────────────────────┘
+            """
+        s = dedent(s)
+        self.assertEqual(run_code(s, self.engine, self.memory), "0\n")
+
+    def test_loop_in_condition(self) -> None:
+        """A box which has finished a pass does not fail the conditional it ends"""
+        s = """
+            ┌────────────────────┐
+            │▀▀◈◇▀▀              │
+            ┢━━━━━━━━━━━━━━━━━━━━┪
+            ┃▀▀◈◇▀▀              ┃
+            ┃┏━━━━━━━━━━━━━━┓    ┃
+            ┃┃◇▀▄▨▀▀▀       ┃    ┃
+            ┃┡━━━━━━━━━━━━━━┩    ┃
+            ┃│▀▄◈◇▀▄▐▀▀     │    ┃
+            ┃└──────────────┘    ┃
+            ┡━━━━━━━━━━━━━━━━━━━━┩
+            │▭◇▀▄▐▀▀▀▄▄▄▄        │
+            └────────────────────┘
+            """
+        s = dedent(s)
+        self.assertEqual(run_code(s, self.engine, self.memory), "3\n")
 
     def test_invalid_code(self) -> None:
-        """Provide invalid code"""
+        """Provide invalid code, which loops forever unless it is limited"""
         s = """
             ╔═══════════════════════╗
             ║This code does nothing ║
@@ -115,4 +151,174 @@ class TestExecution(unittest.TestCase):
             └────────────────┘
             """
         s = dedent(s).strip()
-        self.assertRaises(Exception, run_code(s))
+        interpreter = Interpreter(self.engine, self.memory, Buffer())
+        with self.assertRaises(LimitExceeded) as error:
+            interpreter.run(s, max_steps=1000)
+        self.assertEqual(error.exception.steps, 1000)
+
+
+class TestPythonExecution(TestExecution):
+    """Tests boxscript.transpile for running code the same way."""
+
+    engine = "python"
+
+
+class TestVmExecution(TestExecution):
+    """Tests boxscript.vm for running code the same way."""
+
+    engine = "vm"
+
+
+class TestDenseExecution(TestExecution):
+    """Tests boxscript.memory.DenseMem for running code the same way."""
+
+    memory = "dense"
+
+
+class TestMappedExecution(TestExecution):
+    """Tests boxscript.memory.MappedMem for running code the same way."""
+
+    memory = "mapped"
+
+
+class TestThreads(unittest.TestCase):
+    """Tests boxscript.interpreter for running interpreters at the same time."""
+
+    def setUp(self) -> None:
+        """Switches between threads as often as possible"""
+        self.interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self) -> None:
+        """Restores the switch interval"""
+        sys.setswitchinterval(self.interval)
+
+    def test_independent_interpreters(self) -> None:
+        """Interpreters in different threads do not share memory or output"""
+        s = """
+            ┏━━━━━━━━━━━━━━━━━━┓
+            ┃◇▀▄▧▀▄            ┃
+            ┡━━━━━━━━━━━━━━━━━━┩
+            │▭◇▀▀▐▀▀▀▄▄▄▄      │
+            │▀▄◈◇▀▄▌▀▀         │
+            └──────────────────┘
+            """
+        s = dedent(s)
+
+        def run(i: int) -> tuple[str, str]:
+            output = []
+            interpreter = Interpreter(ENGINES[i % len(ENGINES)], output=output.append)
+            interpreter.run(s, {0: 100 + i, 1: i % 10})
+            return "".join(output), str(i % 10) * (100 + i) + "\n"
+
+        with ThreadPoolExecutor(8) as executor:
+            for output, expected in executor.map(run, range(200)):
+                self.assertEqual(output, expected)
+
+
+class TestLimits(unittest.TestCase):
+    """Tests boxscript.interpreter for limiting the steps and time of a run."""
+
+    # outputs 0123456789, in 11 steps
+    digits = dedent("""
+        ┏━━━━━━━━━━━━┓
+        ┃◇▀▄▨▀▀▄▀▄   ┃
+        ┡━━━━━━━━━━━━┩
+        │▭◇▀▄▐▀▀▀▄▄▄▄│
+        ├────────────┤
+        │▀▄◈◇▀▄▐▀▀   │
+        └────────────┘
+        """)
+
+    # counts forever
+    forever = dedent("""
+        ┏━━━━━━━━━━━━┓
+        ┃▀▀          ┃
+        ┡━━━━━━━━━━━━┩
+        │▀▄◈◇▀▄▐▀▀   │
+        └────────────┘
+        """)
+
+    def test_steps(self) -> None:
+        """The steps of a run are counted"""
+        for engine in ENGINES:
+            result = Interpreter(engine, output=Buffer()).run(self.digits)
+            self.assertEqual(result.steps, 11)
+            result = Interpreter(engine, output=Buffer()).run(self.digits, max_steps=11)
+            self.assertEqual(result.output, "0123456789\n")
+
+    def test_max_steps(self) -> None:
+        """A run which takes too many steps stops with its output so far"""
+        for engine in ENGINES:
+            interpreter = Interpreter(engine, output=Buffer())
+            with self.assertRaises(LimitExceeded) as error:
+                interpreter.run(self.digits, max_steps=4)
+            self.assertEqual(error.exception.steps, 4)
+            self.assertEqual(error.exception.output, "0123")
+
+            # the interpreter can still be used afterwards
+            self.assertEqual(interpreter.run(self.digits).output, "0123456789\n")
+
+    def test_timeout(self) -> None:
+        """A run which takes too long stops"""
+        for engine in ENGINES:
+            with self.assertRaises(LimitExceeded) as error:
+                Interpreter(engine, output=Buffer()).run(self.forever, timeout=0.05)
+            self.assertGreater(error.exception.steps, 0)
+
+    def test_run_many(self) -> None:
+        """A run which exceeds a limit does not stop the batch"""
+        results = list(run_many(self.digits, [{0: 5}, {}], workers=1, max_steps=6))
+        self.assertEqual(results[0].output, "56789\n")
+        self.assertIsInstance(results[1].error, LimitExceeded)
+        self.assertEqual(results[1].output, "012345")
+        self.assertEqual(results[1].steps, 6)
+
+
+class TestRunMany(unittest.TestCase):
+    """Tests boxscript.interpreter.run_many for running a batch of inputs."""
+
+    def test_same_as_run(self) -> None:
+        """Every run has the same output as running it alone, in order"""
+        s = """
+            ┌──────────────────┐
+            │▀▀▄◈◇▀▀▘◇▀▀       │
+            │▭▀▀▀▄▄▄▄▐◇▀▀▝◇▀▄  │
+            └──────────────────┘
+            """
+        s = dedent(s)
+        inputs = [{0: i % 3, 1: 3 * i} for i in range(100)]
+
+        for engine in ENGINES:
+            results = list(run_many(s, inputs, workers=2, engine=engine, chunksize=7))
+            self.assertEqual(len(results), len(inputs))
+
+            for cells, result in zip(inputs, results):
+                output = []
+                Interpreter(engine, output=output.append).run(s, cells)
+                self.assertEqual(result.output, "".join(output))
+                if cells[0]:
+                    self.assertIsNone(result.error)
+                    self.assertEqual(result.memory, {**cells, 2: cells[1] ** 2})
+                else:
+                    self.assertIsInstance(result.error, ZeroDivisionError)
+
+    def test_syntax_error(self) -> None:
+        """An invalid script stops every run with the same error"""
+        s = """
+            ┌───────┐
+            │▭▭▀▀   │
+            └───────┘
+            """
+        results = list(run_many(dedent(s), [{}, {0: 1}], workers=2))
+        self.assertEqual([result.memory for result in results], [{}, {0: 1}])
+        for result in results:
+            self.assertIsInstance(result.error, SyntaxError)
+            self.assertEqual(result.output, f"{result.error}\n")
+
+    def test_arguments(self) -> None:
+        """Unknown engines and memory backends are rejected by the call itself"""
+        with self.assertRaises(ValueError):
+            run_many("", [{}], engine="nope")
+        with self.assertRaises(ValueError):
+            run_many("", [{}], memory="nope")
@@ -0,0 +1,65 @@
+import unittest
+from textwrap import dedent
+
+from boxscript.lex import Atom, scan, tokenize
+
+
+def kinds(code: str) -> list:
+    """Test helper method to list (type, value) pairs of the tokens in code."""
+    return [(token.type, token.value) for token in scan(code)]
+
+
+class TestScan(unittest.TestCase):
+    """Tests boxscript.lex for scanning tokens properly."""
+
+    def test_numbers(self) -> None:
+        """The first digit is the sign, the rest is binary"""
+        self.assertEqual(
+            kinds("▀▀▄▀▄ ▄▀▄▄▀▄ ▀ ▄"),
+            [(Atom.NUM, 10), (Atom.NUM, -18), (Atom.NUM, 0), (Atom.NUM, 0)],
+        )
+
+    def test_comments_skipped(self) -> None:
+        """Comments and their borders produce no tokens"""
+        self.assertEqual(kinds("╔══╗\n║◇▀║\n╚══╝"), [(Atom.NEWLINE, 0)] * 2)
+
+    def test_box_borders(self) -> None:
+        """Corners and junctions open and close boxes and blocks"""
+        self.assertEqual(
+            [kind for kind, _ in kinds("┏┓\n┡┩\n└┘")],
+            [
+                Atom.BOX_START,
+                Atom.IF_START,
+                Atom.NEWLINE,
+                Atom.IF_END,
+                Atom.EXEC_START,
+                Atom.NEWLINE,
+                Atom.EXEC_END,
+                Atom.BOX_END,
+            ],
+        )
+
+
+class TestTokenize(unittest.TestCase):
+    """Tests boxscript.lex for checking lines while tokenizing."""
+
+    def test_line_error(self) -> None:
+        """Line errors are reported with the row they are on"""
+        s = """
+            ┌──────┐
+            │▀▀    │
+            │◇▀▀◈▕▀│
+            └──────┘
+            """
+        with self.assertRaisesRegex(SyntaxError, "parentheses at line 2"):
+            tokenize(dedent(s).strip())
+
+    def test_box_error(self) -> None:
+        """Box errors are reported before line errors"""
+        s = """
+            ┌──────┐
+            │▭▀▀▭  │
+            └───── ┘
+            """
+        with self.assertRaisesRegex(SyntaxError, "Discontinuous box at line 2"):
+            tokenize(dedent(s).strip())
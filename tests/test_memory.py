@@ -0,0 +1,140 @@
+import os
+import pickle
+import random
+import tempfile
+import unittest
+
+from boxscript.interpreter import Interpreter
+from boxscript.memory import DenseMem, MappedMem, Mem
+from boxscript.streams import Buffer
+
+# adds 1 to cell 3
+INCREMENT = """
+┌───────────┐
+│▀▀▀◈◇▀▀▀▐▀▀│
+└───────────┘
+"""
+
+
+class TestDenseMem(unittest.TestCase):
+    """Tests boxscript.memory.DenseMem against the dict memory."""
+
+    def test_same_as_mem(self) -> None:
+        """Every cell holds the same value as it would in a dict"""
+        rng = random.Random(0)
+        keys = [-3, -1, 0, 0.5, 1, 1.0, 2.0, 7, 100, 4095, 5000, 1 << 20, 1 << 40]
+        values = [0, 1, -1, 2.5, 1 << 62, 1 << 63, -(1 << 63), 1 << 100]
+
+        dense, mem = DenseMem(limit=1 << 16), Mem()
+        for _ in range(20000):
+            key = rng.choice(keys) + rng.choice([0, rng.randrange(5000)])
+            if rng.random() < 0.5:
+                dense[key] = mem[key] = rng.choice(values)
+            self.assertEqual(dense[key], mem[key], key)
+        for key in mem:
+            self.assertEqual(dense[key], mem[key], key)
+
+    def test_sparse_indices(self) -> None:
+        """Far away cells do not grow the array"""
+        dense = DenseMem()
+        dense[1 << 40] = 1
+        dense[-1] = 2
+        self.assertEqual(len(dense.cells), 0)
+        self.assertEqual((dense[1 << 40], dense[-1], dense[5]), (1, 2, 0))
+
+    def test_reset(self) -> None:
+        """Resetting clears every cell"""
+        dense = DenseMem()
+        dense[3] = 1 << 70
+        dense.reset()
+        self.assertEqual(dense[3], 0)
+
+    def test_snapshot(self) -> None:
+        """Both memories copy the same cells"""
+        dense, mem = DenseMem(), Mem()
+        for key, value in [(0, 0), (2, 5), (-1, 3), (0.5, 1), (7, 1 << 70), (4, 0)]:
+            dense[key] = mem[key] = value
+        mem[9]
+        self.assertEqual(dense.snapshot(), mem.snapshot())
+        self.assertEqual(mem.snapshot(), {2: 5, -1: 3, 0.5: 1, 7: 1 << 70})
+
+
+class TestMappedMem(unittest.TestCase):
+    """Tests boxscript.memory.MappedMem against the dict memory, and its file."""
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cells")
+
+    def test_same_as_mem(self) -> None:
+        """Every cell holds the same value as it would in a dict"""
+        rng = random.Random(0)
+        keys = [-3, -1, 0, 0.5, 1, 1.0, 2.0, 7, 100, 4095, 5000, 1 << 20]
+        values = [0, 1, -1, 2.5, 1 << 15, -(1 << 15), 1 << 62, 1 << 63, 1 << 100]
+
+        for width in (2, 8):
+            mapped, mem = MappedMem(size=6000, width=width), Mem()
+            for _ in range(20000):
+                key = rng.choice(keys) + rng.choice([0, rng.randrange(5000)])
+                if rng.random() < 0.5:
+                    mapped[key] = mem[key] = rng.choice(values)
+                self.assertEqual(mapped[key], mem[key], key)
+            self.assertEqual(mapped.snapshot(), mem.snapshot())
+
+    def test_persistence(self) -> None:
+        """The cells of a file are kept between runs, but overflowing values are not"""
+        mapped = MappedMem(self.path, size=1 << 16, width=4)
+        self.assertEqual(os.path.getsize(self.path), 1 << 18)
+        mapped[3], mapped[-1], mapped[5], mapped[1 << 16] = 7, 8, 1 << 40, 9
+        mapped.reset()
+        self.assertEqual(mapped.snapshot(), {3: 7})
+        mapped.close()
+
+        mapped = MappedMem(self.path, size=1 << 16, width=4)
+        self.assertEqual((mapped[3], mapped[5]), (7, 0))
+        interpreter = Interpreter(memory=mapped, output=Buffer())
+        self.assertEqual(interpreter.run(INCREMENT).memory, {3: 8})
+        self.assertEqual(interpreter.run(INCREMENT).memory, {3: 9})
+        mapped.close()
+
+    def test_anonymous(self) -> None:
+        """Memory without a file is cleared by a reset"""
+        mapped = MappedMem()
+        mapped[3] = 1
+        mapped.reset()
+        self.assertEqual((mapped[3], mapped.snapshot()), (0, {}))
+
+    def test_used(self) -> None:
+        """Only the cells which were used are cleared and read"""
+        mapped = MappedMem(size=1 << 16, width=8)
+        for _ in range(2):
+            mapped[9], mapped[1 << 15], mapped[20] = 1, 2, 1 << 70
+            # the range covers the whole blocks of 256 cells which were used
+            self.assertEqual((mapped.start, mapped.end), (0, (1 << 15) + 256))
+            self.assertEqual(mapped.snapshot(), {9: 1, 1 << 15: 2, 20: 1 << 70})
+            mapped.reset()
+            self.assertEqual(mapped.snapshot(), {})
+            self.assertEqual((mapped[9], mapped[20], mapped[1 << 15]), (0, 0, 0))
+
+        writer = MappedMem(self.path, size=1 << 16)
+        writer[5], writer[(1 << 16) - 1] = 3, 4
+        writer.close()
+        reader = MappedMem(self.path, size=1 << 16)
+        self.assertEqual(reader.snapshot(), {5: 3, (1 << 16) - 1: 4})
+        reader.close()
+
+    def test_shared(self) -> None:
+        """Memory which is not writable never changes its file"""
+        writer = MappedMem(self.path, size=16)
+        writer[0] = 5
+        writer.flush()
+
+        reader = pickle.loads(pickle.dumps(MappedMem(self.path, 16, writable=False)))
+        reader[0] += 1
+        self.assertEqual((reader[0], writer[0]), (6, 5))
+        reader.close()
+        writer.close()
+
+        with self.assertRaises(ValueError):
+            MappedMem(self.path, size=32, writable=False)
@@ -0,0 +1,79 @@
+import pathlib
+import random
+import unittest
+
+from boxscript.ast import BINARY, Mem, compile_rpn, evaluate_rpn, shunting_yard
+from boxscript.interpreter import ENGINES, Interpreter
+from boxscript.lex import Atom, Token, scan
+from boxscript.optimize import optimize
+from boxscript.streams import Buffer
+from tests.test_ast import outcome
+
+DOCS = pathlib.Path(__file__).parent.parent / "docs"
+
+
+def rpn(code: str) -> list[Token]:
+    """Test helper method to parse an expression."""
+    return shunting_yard(list(scan(code)))
+
+
+class TestOptimize(unittest.TestCase):
+    """Tests boxscript.optimize for optimizing expressions properly."""
+
+    def test_fold(self) -> None:
+        """Constant subexpressions become a single number"""
+        self.assertEqual(list(map(str, optimize(rpn("▀▀▄▚▀▀")))), ["<Atom.NUM: 4>"])
+        self.assertEqual(
+            list(map(str, optimize(rpn("◇▀▄▐▀▀▄▘▀▀▀")))),
+            ["<Atom.LOAD: 0>", "<Atom.NUM: 6>", "<Atom.ADD>"],
+        )
+
+    def test_identity(self) -> None:
+        """Multiplying and raising to the power of 1 is removed"""
+        for code in ["◇▀▀▘▀▀", "◇▀▀▖▀▀", "◇▀▀▘▀▀▖▀▀"]:
+            self.assertEqual(list(map(str, optimize(rpn(code)))), ["<Atom.LOAD: 1>"])
+
+    def test_errors_not_folded(self) -> None:
+        """Operations which raise errors are left as they are"""
+        for code in ["▀▀▝▀▄", "▀▀▚▄▀", "▀▀▀▖▀▀▄▄▄▄▄▄▄▄▄▄▄▄▄▄"]:
+            self.assertEqual(len(optimize(rpn(code))), 3)
+
+    def test_same_as_evaluate(self) -> None:
+        """Optimized expressions give the same values and errors as the originals"""
+        rng = random.Random(0)
+        kinds = [*BINARY, Atom.MEM, Atom.NOT]
+
+        for _ in range(5000):
+            tokens = [Token(rng.choice(kinds)) for _ in range(rng.randint(0, 8))]
+            for token in tokens:
+                if rng.random() < 0.5:
+                    token.type, token.value = Atom.NUM, rng.randint(-4, 4)
+            memory = Mem()
+            for i in range(-4, 5):
+                memory[i] = rng.choice([-4, -1, 0, 1, 2, 3, 0.5, -2.5])
+
+            with self.subTest(rpn=" ".join(map(str, tokens))):
+                optimized = optimize(tokens)
+                self.assertEqual(
+                    outcome(lambda: compile_rpn(optimized)(memory)),
+                    outcome(lambda: evaluate_rpn(tokens, memory)),
+                )
+                self.assertEqual(
+                    outcome(lambda: evaluate_rpn(optimized, memory)),
+                    outcome(lambda: evaluate_rpn(tokens, memory)),
+                )
+
+    def test_docs(self) -> None:
+        """The programs in docs run the same way with and without optimization"""
+        for path in DOCS.glob("*.bs"):
+            code = path.read_text()
+
+            for engine in ENGINES:
+                with self.subTest(path=path.name, engine=engine):
+                    results = [
+                        Interpreter(engine, output=Buffer(), optimize=flag).run(code)
+                        for flag in (False, True)
+                    ]
+                    self.assertIsNone(results[0].error)
+                    self.assertEqual(results[0].output, results[1].output)
+                    self.assertEqual(results[0].memory, results[1].memory)
@@ -0,0 +1,65 @@
+import json
+import unittest
+from textwrap import dedent
+
+from boxscript.interpreter import Interpreter
+from boxscript.streams import Buffer
+from tests.test_analysis import NESTED
+
+# outputs 0123456789, in 11 steps
+DIGITS = dedent("""
+    ┏━━━━━━━━━━━━┓
+    ┃◇▀▄▨▀▀▄▀▄   ┃
+    ┡━━━━━━━━━━━━┩
+    │▭◇▀▄▐▀▀▀▄▄▄▄│
+    ├────────────┤
+    │▀▄◈◇▀▄▐▀▀   │
+    └────────────┘
+    """)
+
+
+class TestProfile(unittest.TestCase):
+    """Tests boxscript.profile for counting the parts of a run properly."""
+
+    def test_counts(self) -> None:
+        """Lines, boxes and expressions are counted by row"""
+        for optimize in (False, True):
+            interpreter = Interpreter(output=Buffer(), optimize=optimize)
+            profile = interpreter.profile(DIGITS)
+            self.assertEqual(profile.result.output, "0123456789\n")
+            self.assertEqual(profile.result.steps, 11)
+
+            hits = {row: stats[0] for row, stats in profile.lines.items()}
+            self.assertEqual(hits, {2: 11, 4: 10, 6: 10})
+            self.assertEqual(profile.boxes[1][0], 1)
+            self.assertEqual(profile.boxes[1][2], 11)
+            self.assertEqual(profile.expressions[6, "location"], [10])
+            self.assertEqual(profile.expressions[6, "value"], [10])
+
+    def test_nested(self) -> None:
+        """Invariants are only counted when they are evaluated"""
+        profile = Interpreter(output=Buffer()).profile(NESTED, {1: 2})
+        run = Interpreter(output=Buffer()).run(NESTED, {1: 2})
+        self.assertEqual(profile.result.output, run.output)
+
+        self.assertEqual(profile.boxes[1][2], 4)
+        self.assertEqual(profile.boxes[4][0], 3)
+        self.assertEqual(profile.boxes[4][2], 12)
+        self.assertEqual(profile.lines[7][0], 9)
+        self.assertEqual(profile.expressions[7, "value"], [3])
+
+    def test_report(self) -> None:
+        """The report is a table of lines, and JSON"""
+        profile = Interpreter(output=Buffer()).profile(DIGITS)
+        table = profile.table().splitlines()
+        self.assertEqual(table[0].split()[0], "row")
+        self.assertEqual(len(table), 1 + 3 + 1 + 1 + 1)
+
+        report = json.loads(profile.to_json())
+        self.assertEqual([line["row"] for line in report["lines"]], [2, 4, 6])
+        self.assertEqual(report["boxes"][0]["iterations"], 11)
+        self.assertEqual(len(report["expressions"]), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from textwrap import dedent
+
+from boxscript.interpreter import ENGINES, Interpreter
+from boxscript.program import ProgramCache
+from boxscript.streams import Buffer
+
+# outputs the digits from the input up to 7
+SCRIPT = dedent("""
+    ┏━━━━━━━━━━━━━━━━━━┓
+    ┃◇▀▄▨▀▀▄▄▄         ┃
+    ┡━━━━━━━━━━━━━━━━━━┩
+    │▭◇▀▄▐▀▀▀▄▄▄▄      │
+    │▀▄◈◇▀▄▐▀▀         │
+    └──────────────────┘
+    """)
+
+
+class TestProgram(unittest.TestCase):
+    """Tests boxscript.program for keeping parsed scripts."""
+
+    def test_run_many_times(self) -> None:
+        """A Program runs the same way every time"""
+        for engine in ENGINES:
+            interpreter = Interpreter(engine, output=Buffer(), cache=ProgramCache())
+            program = interpreter.compile(SCRIPT)
+            for start in (0, 5, 3, 9):
+                result = interpreter.execute(program, {0: start})
+                self.assertEqual(result.output, "01234567"[start:] + "\n")
+
+    def test_immutable(self) -> None:
+        """A Program cannot be changed"""
+        program = Interpreter().compile(SCRIPT)
+        with self.assertRaises(AttributeError):
+            program.function = None
+
+    def test_cache(self) -> None:
+        """Programs are kept until they are the least recently used"""
+        cache = ProgramCache(size=2)
+        interpreter = Interpreter(output=Buffer(), cache=cache)
+        scripts = [SCRIPT, SCRIPT + "\n", SCRIPT + "\n\n"]
+
+        first = interpreter.compile(scripts[0])
+        self.assertIs(interpreter.compile(scripts[0]), first)
+        interpreter.compile(scripts[1])
+        interpreter.compile(scripts[2])
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 3, 2))
+
+        self.assertIsNot(interpreter.compile(scripts[0]), first)
+        self.assertEqual(interpreter.run(scripts[2]).output, "01234567\n")
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+        # programs are kept for each engine
+        Interpreter("python", cache=cache).compile(scripts[2])
+        self.assertEqual(cache.misses, 5)
+
+        cache.clear()
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (0, 0, 0))
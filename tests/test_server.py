@@ -0,0 +1,129 @@
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_loops import counting_loop
+from benchmarks.workloads import docs
+from boxscript.interpreter import Interpreter
+from boxscript.server import Client, Latencies, Server
+from boxscript.streams import Buffer
+
+
+class TestServer(unittest.TestCase):
+    """Tests boxscript.server for answering requests like an Interpreter runs them."""
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "boxscript.sock")
+        self.server = self.start(self.path)
+
+    def start(self, address: object, **kwargs: object) -> Server:
+        server = Server(workers=2, cache_size=4, **kwargs)
+        self.address = server.listen(address)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        def stop() -> None:
+            server.shutdown()
+            thread.join()
+            server.close()
+
+        self.addCleanup(stop)
+        return server
+
+    def test_run(self) -> None:
+        """Scripts give the output and memory they give in an Interpreter"""
+        interpreter = Interpreter(output=Buffer())
+        with Client(self.path) as client:
+            for code in docs().values():
+                for inputs in ({}, {0: 3, 1: 4}):
+                    expected = interpreter.run(code, inputs)
+                    response = client.run(code, inputs)
+                    self.assertEqual(response["output"], expected.output)
+                    self.assertEqual(
+                        response["memory"],
+                        {str(k): v for k, v in expected.memory.items()},
+                    )
+                    self.assertIsNone(response["error"])
+
+    def test_hash(self) -> None:
+        """Scripts which were sent before are run by their hash"""
+        code = docs()["helloworld"]
+        with Client(self.path) as client:
+            first = client.run(code)
+            self.assertEqual(client.run(code), first)
+            self.assertEqual(self.server.cache.hits, 1)
+
+            missing = client.request({"hash": "00" * 32, "id": 7})
+            self.assertTrue(missing["missing"])
+            self.assertEqual(missing["id"], 7)
+
+            # a script which is not kept any more is sent again
+            self.server.cache.clear()
+            self.assertEqual(client.run(code)["output"], first["output"])
+
+    def test_errors(self) -> None:
+        """Errors are part of the response, and do not close the connection"""
+        with Client(self.path) as client:
+            invalid = client.run("garbage")
+            self.assertTrue(invalid["error"].startswith("SyntaxError"))
+            self.assertEqual(invalid["output"], "Invalid character `g` at line 0\n")
+
+            limited = client.run(counting_loop(1000), max_steps=10)
+            self.assertTrue(limited["error"].startswith("LimitExceeded"))
+            self.assertEqual(limited["steps"], 10)
+
+            self.assertIn("error", client.request({"inputs": {}}))
+            self.assertIsNone(client.run(docs()["digits"])["error"])
+
+    def test_limits(self) -> None:
+        """Requests cannot raise the limits of the Server"""
+        server = self.start(("127.0.0.1", 0), max_steps=10)
+        with Client(self.address) as client:
+            response = client.run(counting_loop(1000), max_steps=100)
+            self.assertEqual(response["steps"], 10)
+            self.assertEqual(client.run(counting_loop(1000), max_steps=2)["steps"], 2)
+        self.assertEqual(server.stats()["requests"], 2)
+
+    def test_concurrent(self) -> None:
+        """Requests on many connections at once are all answered"""
+        code = docs()["digits"]
+        expected = Interpreter(output=Buffer()).run(code, {0: 2}).output
+
+        def request(i: int) -> list[str]:
+            with Client(self.path) as client:
+                return [client.run(code, {0: 2}, id=i)["output"] for _ in range(10)]
+
+        with ThreadPoolExecutor(8) as pool:
+            for outputs in pool.map(request, range(8)):
+                self.assertEqual(outputs, [expected] * 10)
+
+        with Client(self.path) as client:
+            stats = client.stats()
+        self.assertEqual(stats["requests"], 80)
+        self.assertEqual(stats["cache"]["size"], 1)
+        self.assertEqual(list(stats["latency"]), ["p50", "p90", "p99", "max"])
+
+    def test_stale(self) -> None:
+        """A socket is only replaced if nothing is listening on it"""
+        with self.assertRaises(OSError):
+            Server().listen(self.path)
+
+
+class TestLatencies(unittest.TestCase):
+    """Tests boxscript.server.Latencies for its percentiles."""
+
+    def test_percentiles(self) -> None:
+        """Percentiles are the nearest ranks of the latencies, in milliseconds"""
+        latencies = Latencies(size=100)
+        self.assertEqual(latencies.percentiles()["p50"], 0)
+        for i in range(1, 201):
+            latencies.record(i / 1000)
+
+        self.assertEqual(latencies.count, 200)
+        self.assertEqual(
+            latencies.percentiles(), {"p50": 150, "p90": 190, "p99": 199, "max": 200}
+        )
@@ -0,0 +1,188 @@
+import codecs
+import io
+import os
+import queue
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from textwrap import dedent
+
+from boxscript.interpreter import ENGINES, Interpreter
+from boxscript.streams import (
+    EOF,
+    Buffer,
+    CallbackSink,
+    FileSink,
+    FileSource,
+    QueueSource,
+    StdoutSink,
+    to_sink,
+)
+
+# outputs "01234567"
+SCRIPT = dedent("""
+    ┏━━━━━━━━━━━━━━━━━━┓
+    ┃◇▀▄▨▀▀▄▄▄         ┃
+    ┡━━━━━━━━━━━━━━━━━━┩
+    │▭◇▀▄▐▀▀▀▄▄▄▄      │
+    │▀▄◈◇▀▄▐▀▀         │
+    └──────────────────┘
+    """)
+
+# outputs twice every input, until it reads -1
+DOUBLE = dedent("""
+    ┏━━━━━━━━━━━━━━━┓
+    ┃▀▄◈▯▘▀▀▄       ┃
+    ┃◇▀▄▥▄▀▀▄       ┃
+    ┡━━━━━━━━━━━━━━━┩
+    │▭◇▀▄           │
+    └───────────────┘
+    """)
+
+# outputs the first input minus the second
+SUBTRACT = dedent("""
+    ┌────────────┐
+    │▭▯▌▯        │
+    └────────────┘
+    """)
+
+
+class TestSinks(unittest.TestCase):
+    """Tests boxscript.streams for writing the output of a script."""
+
+    def test_stdout(self) -> None:
+        """The output is printed by default"""
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            result = Interpreter().run(SCRIPT)
+        self.assertEqual(stdout.getvalue(), "01234567\n")
+        self.assertIsNone(result.output)
+
+    def test_redirect(self) -> None:
+        """The output goes to whatever the standard output is when a run starts"""
+        interpreter = Interpreter()
+        self.assertIsInstance(interpreter.sink, StdoutSink)
+        for inputs in ({}, {0: 6}):
+            stdout = io.StringIO()
+            with redirect_stdout(stdout):
+                interpreter.run(SCRIPT, inputs)
+            self.assertEqual(stdout.getvalue(), "01234567\n"[inputs.get(0, 0) :])
+
+    def test_buffer(self) -> None:
+        """A Buffer keeps the output of the latest run"""
+        interpreter = Interpreter(output=Buffer())
+        self.assertEqual(interpreter.run(SCRIPT).output, "01234567\n")
+        self.assertEqual(interpreter.run(SCRIPT, {0: 6}).output, "67\n")
+
+    def test_callback(self) -> None:
+        """A function is called with every character"""
+        output = []
+        Interpreter(output=output.append).run(SCRIPT)
+        self.assertEqual(output, list("01234567\n"))
+        self.assertIsInstance(to_sink(output.append), CallbackSink)
+
+    def test_files(self) -> None:
+        """Files are written in chunks"""
+        text = io.StringIO()
+        sink = FileSink(text, size=3)
+        Interpreter(output=sink).run(SCRIPT)
+        self.assertEqual(text.getvalue(), "01234567\n")
+
+        with tempfile.TemporaryFile() as binary:
+            Interpreter(output=binary).run(SCRIPT)
+            binary.seek(0)
+            self.assertEqual(binary.read(), b"01234567\n")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "output.txt")
+            with codecs.open(path, "w", "utf-8") as writer:
+                Interpreter(output=writer).run(SCRIPT)
+            with open(path, encoding="utf-8") as file:
+                self.assertEqual(file.read(), "01234567\n")
+
+        class Writer:
+            def __init__(self) -> None:
+                self.text = ""
+
+            def write(self, text: str) -> None:
+                self.text += text
+
+        writer = Writer()
+        Interpreter(output=writer).run(SCRIPT)
+        self.assertEqual(writer.text, "01234567\n")
+
+        read, write = os.pipe()
+        try:
+            sink = FileSink(write, size=4)
+            sink.write("0123")
+            self.assertEqual(os.read(read, 16), b"0123")
+            sink.write("é")
+            sink.flush()
+            self.assertEqual(os.read(read, 16), "é".encode())
+        finally:
+            os.close(read)
+            os.close(write)
+
+
+class TestSources(unittest.TestCase):
+    """Tests boxscript.streams for reading the input of a script."""
+
+    def test_iterable(self) -> None:
+        """Inputs are only taken from an iterable when they are read"""
+        for engine in ENGINES:
+            taken = []
+
+            def values() -> None:
+                for value in (100, 2, 49, 0):
+                    taken.append(value)
+                    yield value
+
+            interpreter = Interpreter(engine, output=Buffer(), input=values())
+            self.assertEqual(interpreter.run(SUBTRACT).output, "b\n")
+            self.assertEqual(taken, [100, 2])
+            self.assertEqual(interpreter.run(SUBTRACT).output, "1\n")
+
+            # the input has run out
+            self.assertEqual(interpreter.run(DOUBLE).memory, {0: 2 * EOF})
+
+    def test_loop(self) -> None:
+        """Every iteration of a loop reads the next input"""
+        for engine in ENGINES:
+            for optimize in (False, True):
+                interpreter = Interpreter(
+                    engine, output=Buffer(), optimize=optimize, input=[24, 25, 26]
+                )
+                self.assertEqual(interpreter.run(DOUBLE).output, "024\n")
+
+    def test_files(self) -> None:
+        """Files are read in chunks, a byte at a time"""
+        source = FileSource(io.BytesIO(b"0246"), size=3)
+        self.assertEqual([source.read() for _ in range(5)], [48, 50, 52, 54, EOF])
+
+        text = FileSource(io.StringIO("é"))
+        self.assertEqual([text.read(), text.read()], [ord("é"), EOF])
+
+        read, write = os.pipe()
+        try:
+            os.write(write, bytes([24, 25]))
+            os.close(write)
+            interpreter = Interpreter(output=Buffer(), input=read)
+            self.assertEqual(interpreter.run(DOUBLE).output, "02\n")
+        finally:
+            os.close(read)
+
+    def test_queue(self) -> None:
+        """Inputs are waited for on a queue, until the sentinel"""
+        values = queue.Queue()
+        producer = threading.Thread(
+            target=lambda: [values.put(value) for value in (24, 26, None)]
+        )
+        producer.start()
+        self.assertEqual(
+            Interpreter(output=Buffer(), input=values).run(DOUBLE).output, "04\n"
+        )
+        producer.join()
+
+        source = QueueSource(queue.Queue(), timeout=0.01)
+        self.assertEqual(source.read(), EOF)
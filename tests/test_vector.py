@@ -0,0 +1,154 @@
+import unittest
+from textwrap import dedent
+
+from benchmarks.workloads import docs, generate
+from boxscript.ast import Script
+from boxscript.context import LimitExceeded
+from boxscript.interpreter import Interpreter, run_many
+from boxscript.lex import tokenize
+from boxscript.optimize import optimize_script
+from boxscript.streams import Buffer
+from boxscript.vector import run_lanes, vectorizable
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# outputs the digits from cell 0 up to cell 1, which are both inputs
+COUNT = dedent("""
+    ┏━━━━━━━━━━━━┓
+    ┃◇▀▄▨◇▀▀     ┃
+    ┡━━━━━━━━━━━━┩
+    │▭◇▀▄▐▀▀▀▄▄▄▄│
+    │▀▄◈◇▀▄▐▀▀   │
+    └────────────┘
+    """)
+
+# counts cell 0 up to cell 2, and outputs it, but only if it was below cell 2, since
+# the inner box gives 0 only if its conditional fails on the first pass
+NESTED = dedent("""
+    ┏━━━━━━━━━━━━━━━━┓
+    ┃┏━━━━━━━━━━━━━┓ ┃
+    ┃┃◇▀▄▨◇▀▀▄     ┃ ┃
+    ┃┡━━━━━━━━━━━━━┩ ┃
+    ┃│▀▄◈◇▀▄▐▀▀    │ ┃
+    ┃└─────────────┘ ┃
+    ┡━━━━━━━━━━━━━━━━┩
+    │▭◇▀▄▐▀▀▀▄▄▄▄    │
+    └────────────────┘
+    """)
+
+# divides cell 1 by cell 0, and outputs cell 2 plus the quotient
+DIVIDE = dedent("""
+    ┌──────────────────┐
+    │▀▀▀◈◇▀▀▝◇▀▄       │
+    │▭◇▀▀▄▐◇▀▀▀        │
+    └──────────────────┘
+    """)
+
+# a box whose condition has (-2) ** (1/2), which is folded to a complex number
+COMPLEX = dedent("""
+    ┏━━━━━━━━━━━━━━━━━━━━━━━━━━┓
+    ┃▀▀▄◈▕▄▀▀▄▝▀▀▏▖▕▀▀▝▀▀▄▏▤◇▀▀┃
+    ┡━━━━━━━━━━━━━━━━━━━━━━━━━━┩
+    │▭▀▀▀▄▄▄▄▐◇▀▀▄             │
+    └──────────────────────────┘
+    """)
+
+# reads the cell at the index in cell 0
+INDIRECT = dedent("""
+    ┌───────────┐
+    │▀▀◈◇◇▀▄▐▀▀ │
+    └───────────┘
+    """)
+
+
+def compare(script: str, inputs: list[dict], **kwargs: object) -> list[tuple]:
+    """Test helper method to run a script with both engines, in the same way."""
+    pairs = zip(
+        run_lanes(script, inputs, lanes=16, **kwargs),
+        run_many(script, inputs, workers=1, engine="python", **kwargs),
+    )
+    return [
+        tuple(
+            (r.output, r.memory, list(r.memory), type(r.error), str(r.error), r.steps)
+            for r in pair
+        )
+        for pair in pairs
+    ]
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestLanes(unittest.TestCase):
+    """Tests boxscript.vector for giving the same Results as the scalar engine."""
+
+    def assertSame(self, script: str, inputs: list[dict], **kwargs: object) -> None:
+        for lanes, scalar in compare(script, inputs, **kwargs):
+            self.assertEqual(lanes, scalar)
+
+    def test_programs(self) -> None:
+        """The example and generated programs run the same on every lane"""
+        inputs = [{}, {0: 3}, {1: 4, 0: 2}, {5: -7}]
+        programs = [*docs().values(), generate(3, 2, 3, 5), generate(2, 1, 8, 9)]
+        for script in programs:
+            self.assertTrue(vectorizable(_optimized(script)))
+            self.assertSame(script, inputs, max_steps=1000)
+
+    def test_divergent(self) -> None:
+        """Lanes leave a loop at different times, and keep their own outputs"""
+        inputs = [{0: i % 4, 1: i % 7} for i in range(50)]
+        results = list(run_lanes(COUNT, inputs, lanes=16))
+        for cells, result in zip(inputs, results):
+            digits = "".join(map(str, range(cells[0], cells[1])))
+            self.assertEqual(result.output, digits + "\n")
+            self.assertEqual(result.steps, max(cells[1] - cells[0], 0) + 1)
+        self.assertSame(COUNT, inputs)
+
+    def test_nested(self) -> None:
+        """A box which finishes a pass gives 1 in its lanes, and 0 in the others"""
+        inputs = [{0: i % 4, 2: i % 3} for i in range(20)]
+        for cells, result in zip(inputs, run_lanes(NESTED, inputs, lanes=8)):
+            digit = str(cells[2]) if cells[0] < cells[2] else ""
+            self.assertEqual(result.output, digit + "\n")
+        self.assertSame(NESTED, inputs)
+
+    def test_errors(self) -> None:
+        """Lanes which raise errors or exceed limits run on the scalar engine"""
+        inputs = [{0: 2, 1: 9, 2: 48}, {1: 9, 2: 48}, {0: 1, 1: 1, 2: -5}, {0: 0.5}]
+        self.assertSame(DIVIDE, inputs)
+        self.assertSame(DIVIDE, [{0: 1, 1: 1 << 70}, {0: 3, 1: (1 << 60) + 1}])
+
+        results = list(run_lanes(COUNT, [{1: 3}, {1: 9}], max_steps=5))
+        self.assertEqual(results[0].output, "012\n")
+        self.assertIsInstance(results[1].error, LimitExceeded)
+        self.assertSame(COUNT, [{1: 3}, {1: 9}, {0: 8, 1: 9}], max_steps=5)
+
+        with self.assertRaises(ValueError):
+            run_lanes(COUNT, [{}], engine="nope")
+        with self.assertRaises(ValueError):
+            run_lanes(COUNT, [{}], memory="nope")
+
+    def test_fallback(self) -> None:
+        """Scripts which read cells at computed indices run on the scalar engine"""
+        self.assertFalse(vectorizable(_optimized(INDIRECT)))
+        self.assertSame(INDIRECT, [{0: 1, 1: 5}, {0: 3, 3: 4}])
+
+    def test_complex(self) -> None:
+        """Scripts which are folded to complex constants run on the scalar engine"""
+        self.assertFalse(vectorizable(_optimized(COMPLEX)))
+        interpreter = Interpreter("python", output=Buffer())
+        inputs = [{}, {0: 1}]
+        for cells, result in zip(inputs, run_lanes(COMPLEX, inputs)):
+            expected = interpreter.run(COMPLEX, cells)
+            self.assertEqual(
+                (result.output, result.memory), (expected.output, expected.memory)
+            )
+        self.assertSame(COMPLEX, inputs)
+
+
+def _optimized(script: str) -> Script:
+    """Test helper method to parse and optimize a script."""
+    parsed = Script(tokenize(script))
+    optimize_script(parsed)
+    return parsed
@@ -0,0 +1,91 @@
+import unittest
+from textwrap import dedent
+
+from benchmarks.bench_loops import counting_loop
+from benchmarks.workloads import docs, generate
+from boxscript.ast import Script
+from boxscript.interpreter import Interpreter
+from boxscript.lex import tokenize
+from boxscript.optimize import optimize_script
+from boxscript.program import Program
+from boxscript.streams import Buffer
+from boxscript.vm import disassemble
+
+# outputs cell 0 + cell 1 + 48, then pops from an empty stack
+UNDERFLOW = dedent("""
+    ┌────────────────┐
+    │▭◇▀▄▐◇▀▀▐▀▀▀▄▄▄▄│
+    │▐▐▀▀            │
+    └────────────────┘
+    """)
+
+# outputs cell 1 * cell 2 + 48 three times, in a loop which is entered three times
+# with cell 1 one larger each time
+INVARIANT = dedent("""
+    ┏━━━━━━━━━━━━━━━━━━━━━━┓
+    ┃◇▀▀▀▨▀▀▀              ┃
+    ┡━━━━━━━━━━━━━━━━━━━━━━┩
+    │┏━━━━━━━━━━━━━━━━━━━┓ │
+    │┃◇▀▄▨▀▀▀            ┃ │
+    │┡━━━━━━━━━━━━━━━━━━━┩ │
+    ││▭◇▀▀▘◇▀▀▄▐▀▀▀▄▄▄▄  │ │
+    ││▀▄◈◇▀▄▐▀▀          │ │
+    │└───────────────────┘ │
+    │▀▄◈▀▄                 │
+    │▀▀◈◇▀▀▐▀▀             │
+    │▀▀▀◈◇▀▀▀▐▀▀           │
+    └──────────────────────┘
+    """)
+
+
+def run(code: str, engine: str, inputs: dict, **kwargs: object) -> tuple:
+    """Test helper method to run code, and get everything about the result."""
+    interpreter = Interpreter(engine, output=Buffer(), **kwargs)
+    try:
+        result = interpreter.run(code, inputs, max_steps=2000)
+    except Exception as e:
+        return type(e), str(e)
+    return result.output, result.memory, list(result.memory), result.steps
+
+
+class TestMachine(unittest.TestCase):
+    """Tests boxscript.vm for running code the same way as the tree."""
+
+    def assertSame(self, code: str, inputs: dict) -> None:
+        expected = run(code, "tree", inputs, optimize=False)
+        for optimize in (False, True):
+            with self.subTest(optimize=optimize):
+                self.assertEqual(run(code, "vm", inputs, optimize=optimize), expected)
+
+    def test_programs(self) -> None:
+        """The example and generated programs run the same as on the tree"""
+        programs = [*docs().values(), generate(3, 2, 3, 5), generate(2, 8, 1, 2)]
+        for code in programs:
+            for inputs in ({}, {0: 3, 1: 4}, {5: -7}):
+                self.assertSame(code, inputs)
+
+    def test_invariant(self) -> None:
+        """Kept values are computed again whenever the loop is entered"""
+        self.assertSame(INVARIANT, {1: 3, 2: 5})
+        program = Program(tokenize(INVARIANT), "vm")
+        self.assertEqual(program.report.hoisted, [7])
+        self.assertIn("CACHED", str(program.function))
+
+    def test_fallback(self) -> None:
+        """Expressions which pop from an empty stack are executed as Nodes"""
+        script = Script(tokenize(UNDERFLOW))
+        self.assertIn("CALL", disassemble(script))
+        self.assertSame(UNDERFLOW, {0: 1, 1: 2})
+        self.assertEqual(run(UNDERFLOW, "vm", {})[0], IndexError)
+
+    def test_flat(self) -> None:
+        """Loops are jumps back to their start, whichever way they are nested"""
+        script = Script(tokenize(counting_loop(10)))
+        optimize_script(script)
+        opcodes = [line.split()[1] for line in disassemble(script).splitlines()]
+        self.assertEqual(opcodes.count("LOOP"), 1)
+        self.assertNotIn("CALL", opcodes)
+
+        nested = disassemble(Script(tokenize(generate(1, 40, 1, 1))))
+        self.assertEqual(nested.count("LOOP"), 40)
+        self.assertNotIn("CALL", nested)